@@ -47,15 +47,18 @@ static float g_last_t1 = 0.0f;
 static float g_last_t2 = 0.0f;
 static float g_last_pot = 0.0f;
 static uint32_t g_last_power_sample_ms = 0;
+static uint64_t g_last_power_sample_us = 0;   // RP2040 sample clock
+static bool g_last_power_from_device = false;
 static uint32_t g_last_chart_sample_ms = 0;
 static bool g_has_power_timestamp = false;
 static bool g_has_chart_sample = false;
 
 // ----------------------------------------------------
 // UART data parser (RP2040 -> ESP32)
-// Expected line: DATA,<tb_v>,<tb_a>,<aux_a>,<sink_t_c>,<batt_t_c>,<pot_v>\n
+// Expected line: DATA,<tb_v>,<tb_a>,<aux_a>,<sink_t_c>,<batt_t_c>,<pot_v>[,<seq>,<t_us>]\n
+// <t_us> is the RP2040 monotonic sample time; older firmware omits it.
 // ----------------------------------------------------
-static constexpr size_t UART_LINE_MAX = 96;
+static constexpr size_t UART_LINE_MAX = 160;
 static constexpr uint32_t CHART_BUFFER_SAMPLE_INTERVAL_MS = 150000UL;
 static constexpr uint16_t CHART_POINT_COUNT = 72;
 static char g_uart_line[UART_LINE_MAX];
@@ -240,7 +243,8 @@ static void ui_sync_test_battery_title_values()
 
 static bool parse_data_line(const char* line,
                             float& tb_v, float& tb_a,
-                            float& aux_a, float& sink_t_c, float& batt_t_c, float& pot_v)
+                            float& aux_a, float& sink_t_c, float& batt_t_c, float& pot_v,
+                            uint64_t& t_us, bool& has_t_us)
 {
   if (!line) return false;
   if (strncmp(line, "DATA,", 5) != 0) return false;
@@ -249,6 +253,19 @@ static bool parse_data_line(const char* line,
   int n = sscanf(line + 5, "%f,%f,%f,%f,%f,%f", &v1, &v2, &v3, &v4, &v5, &v6);
   if (n != 6) return false;
 
+  // Optional <seq>,<t_us> after the six values
+  has_t_us = false;
+  const char* p = line + 5;
+  for (int commas = 0; p && commas < 7; commas++) {
+    p = strchr(p, ',');
+    if (p) p++;
+  }
+  if (p && *p) {
+    char* end = NULL;
+    t_us = strtoull(p, &end, 10);
+    has_t_us = (end != p);
+  }
+
   tb_v = roundf(v1 * 1000.0f) / 1000.0f;
   tb_a = roundf(v2 * 1000.0f) / 1000.0f;
   aux_a = roundf(v3 * 1000.0f) / 1000.0f;
@@ -263,12 +280,15 @@ static void handle_uart_line(const char* line)
   if (!line) return;
 
   if (strncmp(line, "STATUS,", 7) == 0) {
+    // STATUS,<state>[,<i2c_hz>,<i2c_error_rate>]
     const char* status = line + 7;
+    const char* state_end = strchr(status, ',');
+    const size_t state_len = state_end ? (size_t)(state_end - status) : strlen(status);
     Serial.printf("RP2040 status: %s\n", status);
 
-    if (strcmp(status, "ACTIVE") == 0) {
+    if (state_len == 6 && strncmp(status, "ACTIVE", 6) == 0) {
       ui_set_start_status("Start: ACTIVE", lv_palette_main(LV_PALETTE_GREEN));
-    } else if (strcmp(status, "IDLE") == 0) {
+    } else if (state_len == 4 && strncmp(status, "IDLE", 4) == 0) {
       ui_set_start_status("Start: IDLE", lv_palette_main(LV_PALETTE_GREY));
     } else {
       ui_set_start_status("Start: STATUS", lv_palette_main(LV_PALETTE_BLUE));
@@ -277,19 +297,29 @@ static void handle_uart_line(const char* line)
   }
 
   float tb_v, tb_a, aux_a, sink_t_c, batt_t_c, pot_v;
-  if (!parse_data_line(line, tb_v, tb_a, aux_a, sink_t_c, batt_t_c, pot_v)) return;
+  uint64_t t_us = 0;
+  bool has_t_us = false;
+  if (!parse_data_line(line, tb_v, tb_a, aux_a, sink_t_c, batt_t_c, pot_v, t_us, has_t_us)) return;
 
   const uint32_t now_ms = millis();
 
   // Update latest UART sample for ring buffer
   const float power_w = roundf((tb_v * tb_a) * 1000.0f) / 1000.0f;
   if (g_has_power_timestamp) {
-    const float dt_h = (float)(now_ms - g_last_power_sample_ms) / 3600000.0f;
+    // Prefer the RP2040 sample clock: arrival time includes UART/loop jitter
+    float dt_h;
+    if (has_t_us && g_last_power_from_device && t_us > g_last_power_sample_us) {
+      dt_h = (float)(t_us - g_last_power_sample_us) / 3600000000.0f;
+    } else {
+      dt_h = (float)(now_ms - g_last_power_sample_ms) / 3600000.0f;
+    }
     g_last_energy_wh = roundf((g_last_energy_wh + (power_w * dt_h)) * 1000.0f) / 1000.0f;
   } else {
     g_has_power_timestamp = true;
   }
   g_last_power_sample_ms = now_ms;
+  g_last_power_sample_us = t_us;
+  g_last_power_from_device = has_t_us;
 
   g_last_tb1 = tb_v;
   g_last_tb2 = tb_a;
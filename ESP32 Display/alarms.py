@@ -0,0 +1,193 @@
+"""
+Limit and alarm rules, evaluated on whole batches.
+
+A rule watches one DATA field: its value above/below a limit, or its rate
+of change (units per second over RATE_WINDOW_S) above/below a limit, and
+optionally only once that has held for sustain_s seconds. AlarmEngine
+checks all rules against a batch at once: the rules are the columns of
+one (samples x rules) matrix, so a batch costs the same handful of NumPy
+calls however many rules there are, and nothing runs per sample in Python.
+Only state changes (raised / cleared) come back, as event dicts.
+
+Rules can be loaded from JSON (gui.py / recorder.py --alarms FILE):
+
+    [{"name": "Heatsink hot", "channel": "heatsink_temp_C",
+      "kind": "above", "limit": 70, "sustain_s": 5, "severity": "warning"}]
+"""
+
+import json
+import time
+
+import numpy as np
+
+import protocol
+
+KIND_ABOVE = "above"
+KIND_BELOW = "below"
+KIND_RATE_ABOVE = "rate_above"     # rising faster than limit units/s
+KIND_RATE_BELOW = "rate_below"     # falling faster (limit < 0)
+KINDS = (KIND_ABOVE, KIND_BELOW, KIND_RATE_ABOVE, KIND_RATE_BELOW)
+RATE_KINDS = (KIND_RATE_ABOVE, KIND_RATE_BELOW)
+
+SEVERITY_WARNING = "warning"
+SEVERITY_CRITICAL = "critical"
+
+RATE_WINDOW_S = 5.0
+
+STATE_RAISED = "raised"
+STATE_CLEARED = "cleared"
+
+
+class AlarmRule:
+    __slots__ = ("name", "channel", "kind", "limit", "sustain_s", "severity", "enabled")
+
+    def __init__(self, name, channel, kind, limit, sustain_s=0.0,
+                 severity=SEVERITY_WARNING, enabled=True):
+        if channel not in protocol.DATA_FIELDS:
+            raise ValueError(f"alarm {name!r}: unknown channel {channel!r}")
+        if kind not in KINDS:
+            raise ValueError(f"alarm {name!r}: kind must be one of {', '.join(KINDS)}")
+        self.name = name
+        self.channel = channel
+        self.kind = kind
+        self.limit = float(limit)
+        self.sustain_s = float(sustain_s)
+        self.severity = severity
+        self.enabled = bool(enabled)
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(**d)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def describe(self):
+        op = ">" if self.kind in (KIND_ABOVE, KIND_RATE_ABOVE) else "<"
+        what = f"d({self.channel})/dt" if self.kind in RATE_KINDS else self.channel
+        unit = "/s" if self.kind in RATE_KINDS else ""
+        held = f" for {self.sustain_s:g} s" if self.sustain_s else ""
+        return f"{what} {op} {self.limit:g}{unit}{held}"
+
+
+DEFAULT_RULES = (
+    AlarmRule("Heatsink hot", "heatsink_temp_C", KIND_ABOVE, 70.0, sustain_s=5.0),
+    AlarmRule("Heatsink overtemperature", "heatsink_temp_C", KIND_ABOVE, 85.0,
+              sustain_s=2.0, severity=SEVERITY_CRITICAL),
+    AlarmRule("Battery hot", "battery_temp_C", KIND_ABOVE, 45.0, sustain_s=10.0),
+    AlarmRule("Battery below cutoff", "test_battery_voltage_V", KIND_BELOW, 10.5,
+              sustain_s=10.0, severity=SEVERITY_CRITICAL),
+    AlarmRule("Battery voltage sag", "test_battery_voltage_V", KIND_RATE_BELOW, -0.05,
+              sustain_s=1.0),
+)
+
+
+def load_rules(path):
+    with open(path) as f:
+        return [AlarmRule.from_dict(d) for d in json.load(f)]
+
+
+def format_event(event):
+    """One log line, e.g. '14:03:12 RAISED Heatsink hot: heatsink_temp_C = 71.2 (limit 70)'."""
+    stamp = time.strftime("%H:%M:%S", time.localtime(event.get("time", time.time())))
+    what = f"d({event['channel']})/dt" if event.get("rate") else event["channel"]
+    rig = f"[{event['rig']}] " if event.get("rig") else ""
+    return (f"{stamp} {rig}{event['state'].upper()} {event['rule']}: "
+            f"{what} = {event['value']:.4g} (limit {event['limit']:g})")
+
+
+class AlarmEngine:
+    def __init__(self, rules=DEFAULT_RULES, rate_window_s=RATE_WINDOW_S):
+        self.rate_window_s = rate_window_s
+        self.rules = [AlarmRule.from_dict(r.as_dict()) for r in rules]
+        self.compile()
+        self.reset()
+
+    def compile(self):
+        """Rebuilds the per-rule vectors; call after editing limit, sustain_s or enabled."""
+        rules = self.rules
+        self._col = np.array([protocol.DATA_FIELDS.index(r.channel) for r in rules], dtype=np.intp)
+        self._sign = np.array([1.0 if r.kind in (KIND_ABOVE, KIND_RATE_ABOVE) else -1.0 for r in rules])
+        self._limit = np.array([r.limit for r in rules])
+        self._sustain = np.array([r.sustain_s for r in rules])
+        self._enabled = np.array([r.enabled for r in rules], dtype=bool)
+
+        is_rate = np.array([r.kind in RATE_KINDS for r in rules], dtype=bool)
+        self._rate_rules = np.flatnonzero(is_rate)
+        self._rate_cols = np.unique(self._col[is_rate])
+        # Which rate column each rate rule reads
+        self._rate_of_rule = np.searchsorted(self._rate_cols, self._col[is_rate])
+
+    def reset(self):
+        n = len(self.rules)
+        self._since = np.full(n, np.nan)     # start of the current true run
+        self.active = np.zeros(n, dtype=bool)
+        self._hist_t = np.empty(0)
+        self._hist = np.empty((0, len(self._rate_cols)))
+
+    def active_rules(self):
+        return [rule for rule, on in zip(self.rules, self.active.tolist()) if on]
+
+    # -------- Evaluation (one call per batch) --------
+    def _rates(self, t, values):
+        """d/dt of the rate channels over rate_window_s, (n, len(rate_cols))."""
+        all_t = np.concatenate((self._hist_t, t))
+        all_v = np.concatenate((self._hist, values))
+        then = np.maximum(t - self.rate_window_s, all_t[0])
+        span = t - then
+        rates = np.empty_like(values)
+        for k in range(values.shape[1]):
+            rates[:, k] = (values[:, k] - np.interp(then, all_t, all_v[:, k])) / np.where(span > 0, span, np.nan)
+        # Too little history for a meaningful slope yet
+        rates[span < self.rate_window_s / 2] = np.nan
+
+        keep = np.searchsorted(all_t, all_t[-1] - self.rate_window_s, side="right") - 1
+        keep = max(keep, 0)
+        self._hist_t, self._hist = all_t[keep:], all_v[keep:]
+        return rates
+
+    def evaluate(self, t_s, samples):
+        """
+        t_s: (n,) seconds; samples: (n, len(DATA_FIELDS)). Returns the
+        alarms raised or cleared in this batch, in time order.
+        """
+        t = np.asarray(t_s, dtype=np.float64)
+        n = len(t)
+        if not n or not self.rules:
+            return []
+        x = samples[:, self._col]
+        if len(self._rate_rules):
+            rates = self._rates(t, samples[:, self._rate_cols])
+            x[:, self._rate_rules] = rates[:, self._rate_of_rule]
+
+        with np.errstate(invalid="ignore"):
+            cond = (self._sign * (x - self._limit) > 0) & self._enabled
+
+        # Start of the run of True each sample belongs to: one past the
+        # last False at or before it (runs from earlier batches carry on)
+        idx = np.arange(n)[:, None]
+        start = np.maximum.accumulate(np.where(cond, -1, idx), axis=0) + 1
+        start_t = t[np.minimum(start, n - 1)]
+        carried = (start == 0) & ~np.isnan(self._since)
+        start_t = np.where(carried, self._since, start_t)
+        active = cond & (t[:, None] - start_t >= self._sustain)
+
+        changed = np.vstack((self.active, active))
+        changed = changed[1:] != changed[:-1]
+        events = []
+        for i, r in zip(*np.nonzero(changed)):
+            rule = self.rules[r]
+            events.append({
+                "t_s": float(t[i]),
+                "rule": rule.name,
+                "channel": rule.channel,
+                "severity": rule.severity,
+                "state": STATE_RAISED if active[i, r] else STATE_CLEARED,
+                "value": float(x[i, r]),
+                "limit": rule.limit,
+                "rate": rule.kind in RATE_KINDS,
+            })
+
+        self._since = np.where(cond[-1], start_t[-1], np.nan)
+        self.active = active[-1].copy()
+        return events
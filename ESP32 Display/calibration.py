@@ -0,0 +1,243 @@
+"""
+Host-side re-conversion of RP2040 RAW telemetry.
+
+Mirrors the conversion math in RP2040 Code/main.py (thermistor_temp,
+read_shunt_current, the test battery voltage scaling and the aux hall
+current) as NumPy array operations, so a whole log can be re-converted
+with corrected constants after the fact.
+"""
+
+import numpy as np
+
+# -------------------------
+# ADC scaling (must match main.py)
+# -------------------------
+ADC_LSB = 6.144 / 32768      # ±6.144V PGA
+SHUNT_LSB = 0.256 / 32768    # ±0.256V PGA
+
+# Slot order of the codes in a RAW line
+RAW_CHANNELS = (
+    "v_sense", "test_v1_div", "driver_v", "power_v",          # 0x48
+    "pyranometer", "i_set_pot", "panel_t", "vr_5v",           # 0x49
+    "batt_t", "sink_t", "aux_i", "pre_driver",                # 0x4A
+    "shunt",                                                  # 0x48 AIN0 @ ±0.256V
+)
+RAW_SLOT = {name: i for i, name in enumerate(RAW_CHANNELS)}
+
+# Field order of a CAL line after the version
+CAL_FIELDS = (
+    "divider_ratio",
+    "voltage_cal",
+    "current_cal",
+    "shunt_resistance",
+    "shunt_zero",
+    "hall_v_per_amp",
+    "uout_zero",
+    "aux_i_offset",
+    "r_fixed",
+    "r0",
+    "t0",
+    "beta",
+)
+
+
+class Calibration:
+    def __init__(self, version, **constants):
+        self.version = version
+        for name in CAL_FIELDS:
+            setattr(self, name, float(constants[name]))
+
+    def replace(self, **changes):
+        version = changes.pop("version", self.version)
+        constants = {name: getattr(self, name) for name in CAL_FIELDS}
+        constants.update(changes)
+        return Calibration(version, **constants)
+
+    def as_dict(self):
+        out = {"version": self.version}
+        out.update({name: getattr(self, name) for name in CAL_FIELDS})
+        return out
+
+    @classmethod
+    def from_cal_line(cls, line):
+        parts = line.strip().split(",")
+        if parts[0] != "CAL" or len(parts) != len(CAL_FIELDS) + 2:
+            raise ValueError(f"not a CAL line: {line!r}")
+        return cls(int(parts[1]), **dict(zip(CAL_FIELDS, parts[2:])))
+
+
+# Constants shipped with each firmware CAL_VERSION. shunt_zero is measured
+# at every START, so take it from the log's CAL line when there is one.
+KNOWN_CALIBRATIONS = {
+    1: Calibration(
+        1,
+        divider_ratio=11.0,
+        voltage_cal=12.1 / 11.8,
+        current_cal=8.4 / 11.6,
+        shunt_resistance=0.0025,
+        shunt_zero=0.0,
+        hall_v_per_amp=0.150,
+        uout_zero=2.5,
+        aux_i_offset=0.05,
+        r_fixed=4990.0,
+        r0=12000.0,
+        t0=298.15,
+        beta=3950.0,
+    ),
+}
+
+
+# -------------------------
+# Vectorized conversions
+# -------------------------
+def codes_to_volts(codes):
+    return np.asarray(codes, dtype=np.float64) * ADC_LSB
+
+
+def thermistor_temp(v_adc, v_supply, cal):
+    """NaN where main.py's thermistor_temp() would return None."""
+    v_adc = np.asarray(v_adc, dtype=np.float64)
+    v_supply = np.broadcast_to(np.asarray(v_supply, dtype=np.float64), v_adc.shape)
+
+    valid = (v_adc > 0) & (v_adc < v_supply)
+    r = np.full(v_adc.shape, np.nan)
+    np.divide(cal.r_fixed * (v_supply - v_adc), v_adc, out=r, where=valid)
+    valid &= r > 0
+
+    temp_c = np.full(v_adc.shape, np.nan)
+    ln = np.log(r / cal.r0, out=np.full(v_adc.shape, np.nan), where=valid)
+    temp_c[valid] = 1.0 / ((1.0 / cal.t0) + (ln[valid] / cal.beta)) - 273.15
+    return temp_c
+
+
+def shunt_current(shunt_codes, cal):
+    v_shunt = np.asarray(shunt_codes, dtype=np.float64) * SHUNT_LSB
+    return ((v_shunt - cal.shunt_zero) / cal.shunt_resistance) * cal.current_cal
+
+
+def test_voltage(test_v1_div_codes, cal):
+    return codes_to_volts(test_v1_div_codes) * cal.divider_ratio * cal.voltage_cal
+
+
+def aux_current(aux_codes, cal):
+    return -((codes_to_volts(aux_codes) - cal.uout_zero) / cal.hall_v_per_amp) - cal.aux_i_offset
+
+
+def convert(codes, cal):
+    """
+    codes: (n, 13) int array of RAW slots. Returns a dict of float64 arrays
+    with the same quantities the RP2040 puts in its DATA lines (NaN where
+    the firmware would send 0 for an invalid temperature).
+    """
+    codes = np.asarray(codes)
+    vr_5v = codes_to_volts(codes[:, RAW_SLOT["vr_5v"]])
+
+    return {
+        "test_battery_voltage_V": test_voltage(codes[:, RAW_SLOT["test_v1_div"]], cal),
+        "test_battery_current_A": shunt_current(codes[:, RAW_SLOT["shunt"]], cal),
+        "aux_battery_current_A": aux_current(codes[:, RAW_SLOT["aux_i"]], cal),
+        "heatsink_temp_C": thermistor_temp(codes_to_volts(codes[:, RAW_SLOT["sink_t"]]), vr_5v, cal),
+        "battery_temp_C": thermistor_temp(codes_to_volts(codes[:, RAW_SLOT["batt_t"]]), vr_5v, cal),
+        "panel_temp_C": thermistor_temp(codes_to_volts(codes[:, RAW_SLOT["panel_t"]]), vr_5v, cal),
+        "i_set_pot_V": codes_to_volts(codes[:, RAW_SLOT["i_set_pot"]]),
+        "vr_5v_V": vr_5v,
+    }
+
+
+# -------------------------
+# RAW log parsing
+# -------------------------
+def parse_raw_lines(lines):
+    """
+    Collects RAW and CAL lines from an iterable of text lines.
+
+    Returns (seq, t_us, cal_version, codes, cals, bad) where codes is
+    (n, 13) int16, cals lists (row, Calibration) for every CAL line in log
+    order (row being the index of the first RAW row after it) and bad
+    counts RAW lines that didn't parse (e.g. truncated), which are skipped.
+    """
+    width = 3 + len(RAW_CHANNELS)
+    rows = []
+    cal_lines = []
+    for line in lines:
+        if line.startswith("RAW,"):
+            rows.append(line.strip()[4:])
+        elif line.startswith("CAL,"):
+            try:
+                cal_lines.append((len(rows), Calibration.from_cal_line(line)))
+            except (ValueError, KeyError):
+                pass
+
+    ok = np.fromiter((row.count(",") == width - 1 for row in rows), dtype=bool, count=len(rows))
+    table = None
+    if ok.all():
+        try:
+            table = np.array(" ".join(rows).replace(",", " ").split(), dtype=np.int64)
+        except ValueError:
+            pass
+    if table is None or table.size != len(rows) * width:
+        # Something isn't a whole RAW line: sort it out line by line
+        parsed = []
+        for i, row in enumerate(rows):
+            try:
+                parsed.append([int(v) for v in row.split(",")] if ok[i] else None)
+            except ValueError:
+                parsed.append(None)
+            ok[i] = parsed[-1] is not None
+        table = np.array([p for p in parsed if p is not None], dtype=np.int64)
+    table = table.reshape(-1, width)
+
+    # Row indices of the CAL lines, counted in kept rows only
+    kept_before = np.concatenate(([0], np.cumsum(ok)))
+    cals = [(int(kept_before[row]), cal) for row, cal in cal_lines]
+    bad = len(rows) - len(table)
+    return table[:, 0], table[:, 1], table[:, 2], table[:, 3:].astype(np.int16), cals, bad
+
+
+def load_raw_log(path):
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return parse_raw_lines(f)
+
+
+def recalibrate_session(session, overrides=None):
+    """
+    recalibrate_log() on a recorded session's raw.log (session_store.Session).
+    Match the result to the session's columns by seq.
+    """
+    path = session.raw_log_path
+    if path is None:
+        raise ValueError(f"{session.path} has no RAW data (record with MODE,RAW on)")
+    return recalibrate_log(path, overrides)
+
+
+def recalibrate_log(path, overrides=None):
+    """
+    Re-converts every RAW sample in a log. Each sample uses the last CAL
+    line of its version before it (the firmware sends one with a fresh
+    shunt zero at every START; samples before the first use the first),
+    falling back to KNOWN_CALIBRATIONS, with any constants in overrides
+    replaced. Unparseable RAW lines are skipped. Returns (seq, t_us, values).
+    """
+    seq, t_us, versions, codes, cals, _ = load_raw_log(path)
+    values = {}
+
+    for version in np.unique(versions):
+        recorded = [(row, cal) for row, cal in cals if cal.version == int(version)]
+        if not recorded:
+            known = KNOWN_CALIBRATIONS.get(int(version))
+            if known is None:
+                raise ValueError(f"no calibration for version {version}")
+            recorded = [(0, known)]
+
+        bounds = [0] + [row for row, _ in recorded[1:]] + [len(seq)]
+        for (_, cal), lo, hi in zip(recorded, bounds, bounds[1:]):
+            rows = np.flatnonzero(versions[lo:hi] == version) + lo
+            if not len(rows):
+                continue
+            if overrides:
+                cal = cal.replace(**overrides)
+            for name, arr in convert(codes[rows], cal).items():
+                out = values.setdefault(name, np.full(len(seq), np.nan))
+                out[rows] = arr
+
+    return seq, t_us, values
@@ -0,0 +1,120 @@
+"""
+RP2040 clock -> host clock mapping, from SYNC round trips.
+
+The host sends SYNC,<token> and notes the send time; the firmware answers
+SYNC,<t_us>,<token> with its monotonic clock (the same time base as DATA
+t_us). Each answered exchange pairs t_us with the midpoint of its round
+trip. Of the last `window` exchanges only the fastest keep_fraction (half)
+are fitted, since a slow round trip was held up in a UART/OS buffer on one
+leg and its midpoint is biased:
+
+    host_s = offset + rate * device_s
+
+rate stays 1.0 until the kept exchanges span enough device time to show
+drift. SerialReader sends a request every SYNC_INTERVAL_S.
+"""
+
+import time
+from collections import deque
+
+
+class ClockSync:
+    """
+    Maps RP2040 sample times (monotonic us since boot) onto the host clock.
+
+    Each SYNC exchange gives (host_send, device_t, host_recv). The device
+    stamp is paired with the midpoint of the round trip; only the fastest
+    exchanges are used for the fit, since slow ones were held up in a
+    UART/OS buffer on one leg and carry a biased midpoint.
+    """
+
+    def __init__(self, window=64, keep_fraction=0.5, clock=time.monotonic):
+        self.clock = clock
+        self.keep_fraction = keep_fraction
+        self.samples = deque(maxlen=window)  # (device_s, host_mid_s, rtt_s)
+        self.pending = {}                    # token -> host_send_s
+        self.next_token = 0
+
+        self.offset = None   # host_s at device_t == 0
+        self.rate = 1.0      # host seconds per device second
+
+    # -------- Request / reply --------
+    def make_request(self):
+        token = self.next_token
+        self.next_token += 1
+        self.pending[token] = self.clock()
+        # Forget requests that never got an answer
+        while len(self.pending) > 16:
+            self.pending.pop(next(iter(self.pending)))
+        return f"SYNC,{token}\n"
+
+    def handle_reply(self, line, recv_time=None):
+        """Parses SYNC,<t_us>,<token>. Returns True if the reply was used."""
+        recv_time = self.clock() if recv_time is None else recv_time
+        parts = line.strip().split(",")
+        if len(parts) != 3 or parts[0] != "SYNC":
+            return False
+        try:
+            device_us = int(parts[1])
+            token = int(parts[2])
+        except ValueError:
+            return False
+
+        send_time = self.pending.pop(token, None)
+        if send_time is None:
+            return False
+
+        self.add_exchange(send_time, device_us, recv_time)
+        return True
+
+    # -------- Estimation --------
+    def add_exchange(self, host_send, device_us, host_recv):
+        rtt = host_recv - host_send
+        if rtt < 0:
+            return
+        self.samples.append((device_us / 1e6, (host_send + host_recv) / 2.0, rtt))
+        self._fit()
+
+    def _fit(self):
+        ranked = sorted(self.samples, key=lambda s: s[2])
+        n = max(2, int(len(ranked) * self.keep_fraction))
+        best = ranked[:n]
+
+        if len(best) < 2:
+            device_s, host_s, _ = best[0]
+            self.rate = 1.0
+            self.offset = host_s - device_s
+            return
+
+        mean_d = sum(s[0] for s in best) / len(best)
+        mean_h = sum(s[1] for s in best) / len(best)
+        var_d = sum((s[0] - mean_d) ** 2 for s in best)
+
+        # Too short a baseline to see drift yet
+        if var_d < 1.0:
+            self.rate = 1.0
+        else:
+            cov = sum((s[0] - mean_d) * (s[1] - mean_h) for s in best)
+            self.rate = cov / var_d
+
+        self.offset = mean_h - self.rate * mean_d
+
+    @property
+    def synced(self):
+        return self.offset is not None
+
+    @property
+    def drift_ppm(self):
+        return (self.rate - 1.0) * 1e6
+
+    @property
+    def uncertainty_s(self):
+        if not self.samples:
+            return None
+        return min(s[2] for s in self.samples) / 2.0
+
+    def to_host(self, device_us):
+        """Host-clock time (seconds) of a device timestamp."""
+        if self.offset is None:
+            raise ValueError("no SYNC exchange yet")
+        return self.offset + self.rate * (device_us / 1e6)
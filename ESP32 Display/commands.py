@@ -0,0 +1,149 @@
+"""
+Command round-trip latency, host <-> RP2040.
+
+Commands sent through SerialReader.send_command() go out as
+CMD,<id>,<command>. The firmware answers ACK,<id>,RX,<t_us> as soon as it
+has parsed the line, and ACK,<id>,DONE,<t_us> once the command has taken
+effect (e.g. after START's shunt calibration). Per command type this keeps
+the last LATENCY_WINDOW of:
+
+    ack     host send -> RX received   (queueing + link + parse)
+    done    host send -> DONE received (what the user waits for)
+    device  RX t_us -> DONE t_us       (time spent in the RP2040 handler)
+
+Commands with no DONE after COMMAND_TIMEOUT_S count as timed out. Ids
+start at a random offset and ACKs for ids this tracker didn't issue (e.g.
+another host's commands on the same UART) are ignored.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+import protocol
+
+LATENCY_WINDOW = 256
+# Longer than START's shunt calibration (~2.7 s) with a full sample frame
+COMMAND_TIMEOUT_S = 30.0
+ID_SPACE = 1_000_000_000
+
+
+class LatencyStats:
+    def __init__(self, window=LATENCY_WINDOW):
+        self.values = deque(maxlen=window)
+
+    def add(self, seconds):
+        self.values.append(seconds)
+
+    def summary(self):
+        """{"n", "p50", "p95", "max"} in seconds, or None before the first value."""
+        if not self.values:
+            return None
+        v = np.fromiter(self.values, dtype=np.float64, count=len(self.values))
+        p50, p95 = np.percentile(v, (50, 95))
+        return {"n": len(v), "p50": float(p50), "p95": float(p95), "max": float(v.max())}
+
+
+class _CommandType:
+    def __init__(self):
+        self.sent = 0
+        self.timeouts = 0
+        self.unknown = 0
+        self.ack = LatencyStats()
+        self.done = LatencyStats()
+        self.device = LatencyStats()
+
+
+class CommandTracker:
+    def __init__(self, clock=time.monotonic, timeout_s=COMMAND_TIMEOUT_S):
+        self.clock = clock
+        self.timeout_s = timeout_s
+        self.types = {}         # command type -> _CommandType
+        self.pending = {}       # id -> [type, host send time, RX t_us or None]
+        self.next_id = random.randrange(1, ID_SPACE)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def command_type(command):
+        return command.split(",", 1)[0].upper()
+
+    # -------- Sending side --------
+    def make_command(self, command):
+        """Registers a command; returns (id, line to send)."""
+        with self._lock:
+            cmd_id = self.next_id
+            self.next_id = self.next_id % ID_SPACE + 1
+            kind = self.command_type(command)
+            self.types.setdefault(kind, _CommandType()).sent += 1
+            self.pending[cmd_id] = [kind, self.clock(), None]
+        return cmd_id, protocol.format_command(cmd_id, command)
+
+    def forget(self, cmd_id):
+        """Drops a command that never made it onto the wire."""
+        with self._lock:
+            entry = self.pending.pop(cmd_id, None)
+            if entry is not None:
+                self.types[entry[0]].sent -= 1
+
+    # -------- Reader side --------
+    def handle_ack(self, line, recv_time=None):
+        """
+        Parses an ACK line. Returns (id, stage, t_us) if it answered one of
+        our pending commands; None for anything else, including ACKs for
+        ids we never issued.
+        """
+        ack = protocol.parse_ack(line)
+        if ack is None:
+            return None
+        cmd_id, stage, t_us = ack
+        recv_time = self.clock() if recv_time is None else recv_time
+        with self._lock:
+            entry = self.pending.get(cmd_id)
+            if entry is None:
+                return None
+            kind, sent, rx_us = entry
+            stats = self.types[kind]
+            if stage == protocol.ACK_RECEIVED:
+                stats.ack.add(recv_time - sent)
+                entry[2] = t_us
+            else:
+                del self.pending[cmd_id]
+                if stage == protocol.ACK_UNKNOWN:
+                    stats.unknown += 1
+                else:
+                    stats.done.add(recv_time - sent)
+                    if rx_us is not None:
+                        stats.device.add((t_us - rx_us) / 1e6)
+        return ack
+
+    # -------- Reporting --------
+    def expire(self, now=None):
+        now = self.clock() if now is None else now
+        with self._lock:
+            for cmd_id, (kind, sent, _) in list(self.pending.items()):
+                if now - sent > self.timeout_s:
+                    del self.pending[cmd_id]
+                    self.types[kind].timeouts += 1
+
+    def summary(self):
+        """{command type: {"sent", "pending", "timeouts", "unknown", "ack", "done", "device"}}"""
+        self.expire()
+        with self._lock:
+            pending = {}
+            for kind, _, _ in self.pending.values():
+                pending[kind] = pending.get(kind, 0) + 1
+            return {
+                kind: {
+                    "sent": t.sent,
+                    "pending": pending.get(kind, 0),
+                    "timeouts": t.timeouts,
+                    "unknown": t.unknown,
+                    "ack": t.ack.summary(),
+                    "done": t.done.summary(),
+                    "device": t.device.summary(),
+                }
+                for kind, t in sorted(self.types.items())
+            }
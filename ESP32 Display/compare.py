@@ -0,0 +1,152 @@
+"""
+Comparison view: overlays the voltage curves of recorded sessions.
+
+    python gui.py --compare sessions/elb_A sessions/elb_B ...
+
+Lists the sessions under the record directory (plus any added by hand);
+tick one to overlay its battery voltage, aligned either by elapsed time
+or by delivered Ah. Curves come from curves.load_curves(), so each session
+is read from its small curves.npz cache after the first time it is shown.
+"""
+
+import os
+
+import pyqtgraph as pg
+from PySide6.QtCore import QSignalBlocker, Qt
+from PySide6.QtWidgets import (
+    QComboBox,
+    QFileDialog,
+    QHBoxLayout,
+    QLabel,
+    QListWidget,
+    QListWidgetItem,
+    QMainWindow,
+    QMessageBox,
+    QPushButton,
+    QSplitter,
+    QVBoxLayout,
+    QWidget,
+)
+
+from curves import AXIS_AH, AXIS_MINUTES, load_curves
+from session_store import Session, list_sessions
+
+# (label, curves axis, x-axis title)
+X_AXES = (
+    ("Elapsed time", AXIS_MINUTES, "Elapsed (minutes)"),
+    ("Delivered Ah", AXIS_AH, "Delivered (Ah)"),
+)
+CURVE_COLORS = 12
+
+
+class CompareWindow(QMainWindow):
+    def __init__(self, session_dir, paths=()):
+        super().__init__()
+        self.setWindowTitle("ELB Display - Compare sessions")
+        self.resize(1100, 650)
+
+        self.session_dir = session_dir
+        self.curves = {}        # path -> SessionCurves, once loaded
+        self.plotted = {}       # path -> PlotDataItem
+        self.items = {}         # path -> QListWidgetItem
+
+        splitter = QSplitter()
+        self.setCentralWidget(splitter)
+
+        # ---- Session list ----
+        side = QWidget()
+        side_layout = QVBoxLayout(side)
+        self.session_list = QListWidget()
+        self.session_list.itemChanged.connect(self.on_item_changed)
+        side_layout.addWidget(QLabel("Sessions (tick to overlay):"))
+        side_layout.addWidget(self.session_list)
+
+        buttons = QHBoxLayout()
+        add_btn = QPushButton("Add Session...")
+        add_btn.clicked.connect(self.choose_session)
+        clear_btn = QPushButton("Clear")
+        clear_btn.clicked.connect(self.clear_overlay)
+        buttons.addWidget(add_btn)
+        buttons.addWidget(clear_btn)
+        side_layout.addLayout(buttons)
+
+        self.x_axis = QComboBox()
+        for label, axis, _ in X_AXES:
+            self.x_axis.addItem(label, axis)
+        self.x_axis.currentIndexChanged.connect(lambda _: self.redraw())
+        side_layout.addWidget(QLabel("Align by:"))
+        side_layout.addWidget(self.x_axis)
+        splitter.addWidget(side)
+
+        # ---- Overlay plot ----
+        self.plot = pg.PlotWidget(title="Test Battery Voltage")
+        self.plot.setLabel("left", "Voltage (V)")
+        self.plot.showGrid(x=True, y=True)
+        self.plot.addLegend()
+        splitter.addWidget(self.plot)
+        splitter.setStretchFactor(1, 1)
+
+        self.redraw()
+        for path in list_sessions(session_dir):
+            self.add_session(path)
+        for path in paths:
+            self.add_session(path, checked=True)
+
+    def add_session(self, path, checked=False):
+        path = os.path.normpath(path)
+        item = self.items.get(path)
+        if item is None:
+            item = QListWidgetItem(os.path.basename(path))
+            item.setData(Qt.ItemDataRole.UserRole, path)
+            item.setToolTip(path)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Unchecked)
+            self.items[path] = item
+            self.session_list.addItem(item)
+        if checked:
+            item.setCheckState(Qt.CheckState.Checked)
+
+    def choose_session(self):
+        path = QFileDialog.getExistingDirectory(self, "Add Session", self.session_dir)
+        if path:
+            self.add_session(path, checked=True)
+
+    def clear_overlay(self):
+        for item in self.items.values():
+            item.setCheckState(Qt.CheckState.Unchecked)
+
+    def on_item_changed(self, item):
+        path = item.data(Qt.ItemDataRole.UserRole)
+        if item.checkState() != Qt.CheckState.Checked:
+            curve = self.plotted.pop(path, None)
+            if curve is not None:
+                self.plot.removeItem(curve)
+            return
+        if path in self.plotted:
+            return
+        if path not in self.curves:
+            try:
+                self.curves[path] = load_curves(Session(path))
+            except (OSError, ValueError, KeyError) as e:
+                item.setCheckState(Qt.CheckState.Unchecked)
+                QMessageBox.critical(self, "Compare", f"Could not open session:\n{e}")
+                return
+            curves = self.curves[path]
+            blocker = QSignalBlocker(self.session_list)   # setText() would re-enter here
+            item.setText(f"{os.path.basename(path)}  ({curves.duration_minutes:.0f} min, "
+                         f"{curves.amp_hours:.2f} Ah)")
+            blocker.unblock()
+        self.plot_session(path)
+
+    def plot_session(self, path):
+        x, y = self.curves[path].xy(self.x_axis.currentData())
+        color = pg.intColor(list(self.items).index(path), hues=CURVE_COLORS)
+        self.plotted[path] = self.plot.plot(
+            x, y, pen=pg.mkPen(color, width=1), name=os.path.basename(path), skipFiniteCheck=True,
+        )
+
+    def redraw(self):
+        self.plot.setLabel("bottom", X_AXES[self.x_axis.currentIndex()][2])
+        for path in list(self.plotted):
+            self.plot.removeItem(self.plotted.pop(path))
+            self.plot_session(path)
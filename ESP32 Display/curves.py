@@ -0,0 +1,104 @@
+"""
+Disk-cached overview curves of recorded sessions, for the comparison view.
+
+A session's battery voltage is reduced once to CURVE_BUCKETS min/max
+buckets, each with its elapsed time and delivered Ah at both ends, and
+saved next to the columns as curves.npz. Later opens read that small file
+instead of the columns, so overlaying twenty multi-hour tests costs twenty
+tiny reads. The cache records the row count it was built from and is
+rebuilt when the session has grown (still recording) or the layout
+version changes.
+"""
+
+import os
+
+import numpy as np
+
+CURVES_FILE = "curves.npz"
+CURVES_VERSION = 1
+CURVE_BUCKETS = 2048
+
+# Row layout of SessionCurves.rows
+R_T0, R_T1, R_AH0, R_AH1, R_VMIN, R_VMAX = range(6)
+
+AXIS_MINUTES = "minutes"
+AXIS_AH = "ah"
+
+
+class SessionCurves:
+    """Bucketed voltage of one session against elapsed minutes and delivered Ah."""
+
+    def __init__(self, rows, count):
+        self.rows = rows
+        self.count = count      # session rows the buckets were built from
+
+    def xy(self, axis=AXIS_MINUTES):
+        """(x, y) min/max pairs for plotting, like LodSeries.view()."""
+        rows = self.rows
+        lo, hi = (R_T0, R_T1) if axis == AXIS_MINUTES else (R_AH0, R_AH1)
+        x = np.empty(2 * len(rows))
+        y = np.empty(2 * len(rows))
+        x[0::2] = rows[:, lo]
+        x[1::2] = rows[:, hi]
+        y[0::2] = rows[:, R_VMIN]
+        y[1::2] = rows[:, R_VMAX]
+        return x, y
+
+    @property
+    def duration_minutes(self):
+        return float(self.rows[-1, R_T1]) if len(self.rows) else 0.0
+
+    @property
+    def amp_hours(self):
+        return float(self.rows[-1, R_AH1]) if len(self.rows) else 0.0
+
+
+def build_curves(session, buckets=CURVE_BUCKETS):
+    t = np.asarray(session.column("time_minutes"), dtype=np.float64)
+    v = np.asarray(session.column("test_battery_voltage_V"), dtype=np.float64)
+    i = np.nan_to_num(np.asarray(session.column("test_battery_current_A"), dtype=np.float64))
+    n = len(t)
+    if not n:
+        return SessionCurves(np.empty((0, 6)), 0)
+
+    elapsed = t - t[0]
+    # Trapezoidal Ah, as in DischargeMetrics
+    ah = np.empty(n)
+    ah[0] = 0.0
+    np.cumsum(0.5 * (i[1:] + i[:-1]) * np.diff(elapsed) / 60.0, out=ah[1:])
+
+    size = -(-n // buckets)
+    edges = np.arange(0, n, size)
+    last = np.minimum(edges + size, n) - 1
+    rows = np.empty((len(edges), 6))
+    rows[:, R_T0] = elapsed[edges]
+    rows[:, R_T1] = elapsed[last]
+    rows[:, R_AH0] = ah[edges]
+    rows[:, R_AH1] = ah[last]
+    rows[:, R_VMIN] = np.fmin.reduceat(v, edges)
+    rows[:, R_VMAX] = np.fmax.reduceat(v, edges)
+    return SessionCurves(rows, n)
+
+
+def load_curves(session, buckets=CURVE_BUCKETS):
+    """A session's curves from its cache, (re)building and saving it if stale."""
+    path = os.path.join(session.path, CURVES_FILE)
+    try:
+        with np.load(path) as cached:
+            version, count = cached["header"].tolist()
+            if version == CURVES_VERSION and count == len(session):
+                return SessionCurves(cached["rows"], count)
+    except (OSError, KeyError, ValueError):
+        pass
+
+    curves = build_curves(session, buckets)
+    # Write-then-rename so a reader never sees a torn cache; a read-only
+    # session directory just means no cache
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            np.savez(f, header=np.array([CURVES_VERSION, curves.count]), rows=curves.rows)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+    return curves
@@ -0,0 +1,133 @@
+"""
+Chunked, cancellable data export on a worker thread.
+
+The GUI describes what to export as a row count plus a read_chunk(lo, hi)
+callback returning a (hi - lo, len(names)) array, so the source can be the
+in-memory ring buffer or a memory-mapped session of any length. The job
+writes CHUNK_ROWS rows at a time and exposes progress/cancel for the GUI to
+poll, the same way SerialReader is drained.
+"""
+
+import importlib.util
+import os
+import threading
+
+import numpy as np
+
+CHUNK_ROWS = 100_000
+
+FORMAT_CSV = "csv"
+FORMAT_NPY = "npy"
+FORMAT_PARQUET = "parquet"
+
+FORMAT_SUFFIX = {
+    FORMAT_CSV: ".csv",
+    FORMAT_NPY: ".npy",
+    FORMAT_PARQUET: ".parquet",
+}
+
+
+def parquet_available():
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def available_formats():
+    formats = [FORMAT_CSV, FORMAT_NPY]
+    if parquet_available():
+        formats.append(FORMAT_PARQUET)
+    return formats
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class ExportJob(threading.Thread):
+    def __init__(self, path, fmt, names, total_rows, read_chunk, chunk_rows=CHUNK_ROWS):
+        super().__init__(name="export", daemon=True)
+        if fmt not in FORMAT_SUFFIX:
+            raise ValueError(f"unknown export format {fmt!r}")
+        self.path = path
+        self.fmt = fmt
+        self.names = tuple(names)
+        self.total_rows = int(total_rows)
+        self.read_chunk = read_chunk
+        self.chunk_rows = chunk_rows
+
+        self._cancel = threading.Event()
+        self.rows_written = 0
+        self.error = None
+        self.cancelled = False
+        self.done = False
+
+    @property
+    def progress(self):
+        return self.rows_written / self.total_rows if self.total_rows else 1.0
+
+    def cancel(self):
+        self._cancel.set()
+
+    # -------- Thread --------
+    def run(self):
+        try:
+            writer = {
+                FORMAT_CSV: self._write_csv,
+                FORMAT_NPY: self._write_npy,
+                FORMAT_PARQUET: self._write_parquet,
+            }[self.fmt]
+            writer()
+        except ExportCancelled:
+            self.cancelled = True
+            self._remove_partial()
+        except Exception as exc:  # reported to the GUI, not raised on a dead thread
+            self.error = exc
+            self._remove_partial()
+        finally:
+            self.done = True
+
+    def _chunks(self):
+        for lo in range(0, self.total_rows, self.chunk_rows):
+            if self._cancel.is_set():
+                raise ExportCancelled()
+            hi = min(lo + self.chunk_rows, self.total_rows)
+            yield np.asarray(self.read_chunk(lo, hi), dtype=np.float64)
+            self.rows_written = hi
+
+    def _remove_partial(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def _write_csv(self):
+        with open(self.path, "w", newline="") as f:
+            f.write(",".join(self.names) + "\n")
+            for chunk in self._chunks():
+                np.savetxt(f, chunk, fmt="%.6f", delimiter=",")
+
+    def _write_npy(self):
+        # Structured array, so column names travel with the data:
+        #   np.load(path)["time_minutes"]
+        dtype = np.dtype([(name, "<f8") for name in self.names])
+        out = np.lib.format.open_memmap(self.path, mode="w+", dtype=dtype, shape=(self.total_rows,))
+        try:
+            lo = 0
+            for chunk in self._chunks():
+                hi = lo + len(chunk)
+                for i, name in enumerate(self.names):
+                    out[name][lo:hi] = chunk[:, i]
+                lo = hi
+            out.flush()
+        finally:
+            del out
+
+    def _write_parquet(self):
+        import pyarrow as pa  # optional; offered only if installed
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([(name, pa.float64()) for name in self.names])
+        with pq.ParquetWriter(self.path, schema) as writer:
+            for chunk in self._chunks():
+                writer.write_table(pa.Table.from_arrays(
+                    [pa.array(chunk[:, i]) for i in range(len(self.names))], schema=schema
+                ))
@@ -0,0 +1,81 @@
+"""
+Streaming min/max over a sliding window of the most recent samples.
+"""
+
+from collections import deque
+
+import numpy as np
+
+
+class WindowExtrema:
+    """
+    Monotonic-deque min/max over the last `window` samples of a stream.
+
+    Each deque holds (sample_index, value) candidates in sorted order, so
+    the current extreme is always at the front and samples that can no
+    longer become the extreme are never stored. Batches are pre-reduced
+    with NumPy: only the batch's strict suffix minima (maxima) can ever be
+    the window minimum (maximum), so typically a handful of entries are
+    pushed per batch regardless of its size. Query cost is O(1); update
+    cost is amortised O(1) per candidate. NaN samples are ignored.
+    """
+
+    def __init__(self, window):
+        self.window = int(window)
+        self.count = 0          # samples seen
+        self._min = deque()
+        self._max = deque()
+
+    def clear(self):
+        self.count = 0
+        self._min.clear()
+        self._max.clear()
+
+    @staticmethod
+    def _candidates(values, accumulate):
+        # accumulate over the reversed batch = running extreme of values[i:]
+        suffix = accumulate(values[::-1])[::-1]
+        keep = values == suffix
+        # Strictly better than everything after it (ties: keep the later one)
+        keep[:-1] &= values[:-1] != suffix[1:]
+        return np.flatnonzero(keep)
+
+    @staticmethod
+    def _push(dq, indexes, values, first_index, worse):
+        if not len(indexes):
+            return
+        head = values[indexes[0]]
+        while dq and worse(dq[-1][1], head):
+            dq.pop()
+        dq.extend(zip((first_index + indexes).tolist(), values[indexes].tolist()))
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        n = len(values)
+        if n == 0:
+            return
+        if n > self.window:
+            self.count += n - self.window
+            values = values[-self.window:]
+            n = self.window
+
+        first = self.count
+        self._push(self._min, self._candidates(values, np.fmin.accumulate), values, first,
+                   lambda old, new: old >= new)
+        self._push(self._max, self._candidates(values, np.fmax.accumulate), values, first,
+                   lambda old, new: old <= new)
+        self.count += n
+
+        oldest = self.count - self.window
+        while self._min and self._min[0][0] < oldest:
+            self._min.popleft()
+        while self._max and self._max[0][0] < oldest:
+            self._max.popleft()
+
+    @property
+    def min(self):
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self):
+        return self._max[0][1] if self._max else None
@@ -0,0 +1,247 @@
+"""
+Local fan-out of one rig's stream to any number of viewers.
+
+Only one process can own a serial port. The owner (gui.py or recorder.py
+with --serve) attaches a FanoutServer to its SerialReader: every chunk of
+complete lines the reader parses is also queued, byte for byte, to each
+connected TCP client. A viewer (gui.py --connect HOST:PORT) runs an
+ordinary SerialReader over the socket through RemotePort, so remote data
+goes through the same parser, batches and plots as a local port.
+
+Each client has its own sender thread and a bounded queue. A client that
+falls behind is sent only every Nth DATA line (STATUS, ERROR, CAL, ...
+always pass); if its backlog still reaches MAX_QUEUE_BYTES, the oldest
+chunks are dropped. The reader and the other clients never wait on a slow
+client. Clients are read-only: anything they send is discarded, and the
+owner's ACK and SYNC replies are not forwarded (they answer the owner's
+commands, not the viewer's).
+"""
+
+import select
+import socket
+import threading
+from collections import deque
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+MAX_QUEUE_BYTES = 4_000_000         # per client; oldest chunks dropped beyond
+MAX_DECIMATION = 64                 # reached as the queue approaches MAX_QUEUE_BYTES
+DECIMATE_LOW_BYTES = 100_000        # backlog below which decimation relaxes again
+POLL_INTERVAL_S = 0.5
+# Replies to the owner's commands; never forwarded
+OWNER_REPLIES = (b"ACK,", b"SYNC,")
+RECV_CHUNK = 4096
+
+
+def parse_address(text, default_host=DEFAULT_HOST):
+    """'8765' / ':8765' / 'host:8765' -> (host, port)."""
+    host, _, port = text.rpartition(":")
+    return host or default_host, int(port)
+
+
+def decimate_lines(chunk, keep_every, phase):
+    """
+    Keeps every keep_every-th DATA line of a chunk of complete lines, and
+    every other line. Returns (chunk, phase); phase carries the count over
+    to the next chunk so the spacing stays even.
+    """
+    out = []
+    for line in chunk.split(b"\n")[:-1]:
+        if line.startswith(b"DATA,"):
+            phase += 1
+            if phase % keep_every:
+                continue
+        out.append(line)
+    return (b"\n".join(out) + b"\n" if out else b""), phase
+
+
+def drop_owner_replies(chunk):
+    """Removes ACK and SYNC lines from a chunk of complete lines."""
+    if not any(prefix in chunk for prefix in OWNER_REPLIES):
+        return chunk
+    out = [line for line in chunk.split(b"\n")[:-1] if not line.startswith(OWNER_REPLIES)]
+    return b"\n".join(out) + b"\n" if out else b""
+
+
+class _Client:
+    def __init__(self, sock, address, on_close):
+        self.sock = sock
+        self.address = address
+        self.on_close = on_close
+        self.cond = threading.Condition()
+        self.queue = deque()
+        self.queued_bytes = 0
+        self.closed = False
+
+        self.decimation = 1
+        self._phase = 0
+        self.sent_bytes = 0
+        self.dropped_bytes = 0
+
+        self.thread = threading.Thread(target=self.run, name=f"fanout-{address[0]}:{address[1]}", daemon=True)
+
+    def offer(self, chunk):
+        with self.cond:
+            if self.closed:
+                return
+            if self.decimation > 1:
+                chunk, self._phase = decimate_lines(chunk, self.decimation, self._phase)
+                if not chunk:
+                    return
+            self.queue.append(chunk)
+            self.queued_bytes += len(chunk)
+
+            # Slow client: thin its DATA lines as the queue fills (1x, 2x,
+            # 4x ... MAX_DECIMATION), then drop whole chunks at the cap
+            level = self.queued_bytes * MAX_DECIMATION.bit_length() // MAX_QUEUE_BYTES
+            self.decimation = max(self.decimation, min(1 << level, MAX_DECIMATION))
+            while self.queued_bytes > MAX_QUEUE_BYTES and len(self.queue) > 1:
+                old = self.queue.popleft()
+                self.queued_bytes -= len(old)
+                self.dropped_bytes += len(old)
+            self.cond.notify()
+
+    def run(self):
+        try:
+            while True:
+                with self.cond:
+                    if not self.queue and not self.closed:
+                        self.cond.wait(POLL_INTERVAL_S)
+                    if self.closed:
+                        return
+                    chunks = list(self.queue)
+                    self.queue.clear()
+                    backlog, self.queued_bytes = self.queued_bytes, 0
+                    if backlog < DECIMATE_LOW_BYTES and self.decimation > 1:
+                        self.decimation //= 2   # caught up
+                if chunks:
+                    data = b"".join(chunks)
+                    self.sock.sendall(data)
+                    self.sent_bytes += len(data)
+                if not self._discard_input():
+                    return
+        except OSError:
+            pass
+        finally:
+            self.close()
+
+    def _discard_input(self):
+        """Reads and drops whatever the client sent; False once it hung up."""
+        while select.select([self.sock], [], [], 0)[0]:
+            if not self.sock.recv(RECV_CHUNK):
+                return False
+        return True
+
+    def close(self):
+        with self.cond:
+            if self.closed:
+                return
+            self.closed = True
+            self.cond.notify()
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+        self.on_close(self)
+
+    def stats(self):
+        return {
+            "address": f"{self.address[0]}:{self.address[1]}",
+            "sent_bytes": self.sent_bytes,
+            "queued_bytes": self.queued_bytes,
+            "dropped_bytes": self.dropped_bytes,
+            "decimation": self.decimation,
+        }
+
+
+class FanoutServer(threading.Thread):
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        super().__init__(name=f"fanout-server-{port}", daemon=True)
+        # Bind here so a busy port fails in the caller, and port 0 resolves
+        self._sock = socket.create_server((host, port))
+        self._sock.settimeout(POLL_INTERVAL_S)
+        self.address = self._sock.getsockname()[:2]
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self.clients = []
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                sock, address = self._sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            sock.settimeout(None)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            client = _Client(sock, address[:2], self._remove)
+            with self._lock:
+                self.clients.append(client)
+            client.thread.start()
+
+    def _remove(self, client):
+        with self._lock:
+            if client in self.clients:
+                self.clients.remove(client)
+
+    def publish(self, chunk):
+        """Queues a chunk of complete lines to every client (reader thread)."""
+        with self._lock:
+            clients = list(self.clients)
+        if not clients:
+            return
+        chunk = drop_owner_replies(chunk)
+        if not chunk:
+            return
+        for client in clients:
+            client.offer(chunk)
+
+    def stats(self):
+        with self._lock:
+            return [client.stats() for client in self.clients]
+
+    def stop(self):
+        self._stop_event.set()
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+        with self._lock:
+            clients = list(self.clients)
+        for client in clients:
+            client.close()
+
+
+class RemotePort:
+    """A FanoutServer connection with the port interface SerialReader reads."""
+
+    def __init__(self, host, port, timeout=0.05):
+        self.sock = socket.create_connection((host, port), timeout=2.0)
+        self.sock.settimeout(timeout)
+
+    @property
+    def in_waiting(self):
+        return RECV_CHUNK if select.select([self.sock], [], [], 0)[0] else 0
+
+    def read(self, n):
+        try:
+            data = self.sock.recv(n)
+        except socket.timeout:
+            return b""
+        if not data:
+            raise OSError("fan-out server closed the connection")
+        return data
+
+    def write(self, data):
+        self.sock.sendall(data)     # the server discards it
+        return len(data)
+
+    def close(self):
+        self.sock.close()
+
+
+def open_remote(address):
+    host, port = parse_address(address)
+    return RemotePort(host, port)
@@ -1,10 +1,22 @@
+import os
 import sys
 import time
+
+# First, so --profile-startup can time every import below
+import startup
+if "--profile-startup" in sys.argv:
+    startup.enable()
+
 import random
 import math
+import argparse
+
 from collections import deque
 
+import numpy as np
+
 from PySide6.QtCore import QTimer, Qt
+from PySide6.QtGui import QColor
 from PySide6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -19,16 +31,91 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QCheckBox,
     QGroupBox,
+    QComboBox,
+    QProgressBar,
+    QSlider,
+    QDoubleSpinBox,
+    QTableWidget,
+    QTableWidgetItem,
+    QPlainTextEdit,
+    QHeaderView,
 )
 
-import pyqtgraph as pg
+import alarms
+import protocol
+import export
+from fanout import open_remote
+from ingest import Batch, SerialReader
+from lod import LodSeries
+from metrics import DEFAULT_CUTOFF_V, ROLLING_CHANNELS, DischargeMetrics
+from recorder import DEFAULT_SESSION_DIR, SampleClock, open_rig, record_device_lines, serve_addresses
+from render import ViewRegistry
+from replay import SPEED_MAX, ReplaySource
+from ring_buffer import RingBuffer
+from session_store import Session
+
+startup.mark("imports done")
+
+# Repaint cap; serial ingestion runs on its own thread at whatever rate the
+# RP2040 streams and is drained once per repaint.
+REFRESH_INTERVAL_MS = 50
+
+# Samples kept in memory per channel
+HISTORY_POINTS = 200_000
+
+# Channels of the in-memory store (shared time axis in minutes)
+CH_BATT_V = "test_battery_voltage_V"
+CH_SHUNT_V = "shunt_voltage_V"
+CH_AUX_I = "aux_battery_current_A"
+STORE_CHANNELS = (CH_BATT_V, CH_SHUNT_V, CH_AUX_I)
+
+# Indexes into a protocol.DATA_FIELDS sample
+F_TEST_V = protocol.DATA_FIELDS.index("test_battery_voltage_V")
+F_TEST_I = protocol.DATA_FIELDS.index("test_battery_current_A")
+F_AUX_I = protocol.DATA_FIELDS.index("aux_battery_current_A")
+F_T_US = protocol.DATA_FIELDS.index("t_us")
+
+# pyqtgraph (and with it most of QtGui/QtOpenGL) is imported by the first
+# tab that draws a plot, after the window has painted once; tabs are built on
+# first activation.
+
+# Replay speed choices (label, speed factor)
+REPLAY_SPEEDS = (("1x", 1.0), ("10x", 10.0), ("60x", 60.0), ("600x", 600.0), ("Max", SPEED_MAX))
+REPLAY_SLIDER_STEPS = 1000
+
+# Alarm rules for new windows (gui.py --alarms FILE) and events kept in view
+ALARM_RULES = alarms.DEFAULT_RULES
+ALARM_LOG_LINES = 500
+ALARM_COLUMNS = ("Rule", "Condition", "Limit", "Sustain (s)", "Severity", "State")
+ALARM_COLOR = QColor("red")
+
+# Diagnostics tab: commands with buttons, and how often its table refreshes
+DIAG_COMMANDS = ("START", "STOP", "STATUS")
+DIAG_COLUMNS = ("Command", "Sent", "Pending", "Timeouts",
+                "ACK ms p50/p95/max", "Done ms p50/p95/max", "On RP2040 ms p50/max")
+DIAG_REFRESH_MS = 1000
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, reader=None, recorder=None, rig_name=None):
         super().__init__()
-        self.setWindowTitle("ELB Display")
+        self.setWindowTitle(f"ELB Display - {rig_name}" if rig_name else "ELB Display")
         self.resize(900, 600)
+        self.rig_name = rig_name
+
+        # Live data source (None = built-in demo model)
+        self.reader = reader
+        # Append-only session file (None = not recording)
+        self.recorder = recorder
+        # Session shown/exported from disk: the recording, or one reopened
+        self.session = Session(recorder.path) if recorder is not None else None
+        self.clock = SampleClock()
+        self.device_state = None    # last STATUS state
+
+        # Recorded test played back through the same path as live data
+        self.replay = reader if isinstance(reader, ReplaySource) else None
+        if self.replay is not None:
+            self.clock.device_t0_us = 0.0   # replay stamps t_us with recorded time
 
         # -------------------------
         # Demo / mock values
@@ -58,11 +145,20 @@ class MainWindow(QMainWindow):
 
         self.start_time = time.time()
 
-        # Plot buffers (shared x for all plots)
-        self.x_data = deque(maxlen=2000)     # minutes
-        self.y_data = deque(maxlen=2000)     # test batt volts
-        self.shunt_y = deque(maxlen=2000)    # shunt volts
-        self.aux_i_y = deque(maxlen=2000)    # aux current amps
+        # Running export (export.ExportJob) and its progress poll
+        self.export_job = None
+        self.export_timer = QTimer(self)
+        self.export_timer.timeout.connect(self.poll_export)
+
+        # Session comparison window (compare.CompareWindow), opened on demand
+        self.compare_window = None
+
+        # Plot buffers (shared x in minutes for all plots)
+        self.store = RingBuffer(HISTORY_POINTS, STORE_CHANNELS, track_extrema=True)
+
+        # Full-length min/max pyramid for zoomed-out / long-test rendering
+        self.lod = LodSeries(STORE_CHANNELS)
+        self.follow_live = True
 
         # Smoothed y-axis bounds (separate per plot)
         self.batt_ymin = None
@@ -73,28 +169,92 @@ class MainWindow(QMainWindow):
 
         self.auxi_ymin = None
         self.auxi_ymax = None
+        self.y_settling = False
+
+        # Latest sample (DATA field -> value) and the widgets that show it;
+        # views only repaint while their tab is visible and their data changed
+        self.latest = {}
+        self.views = ViewRegistry()
+
+        # Streaming Ah/Wh, cutoff projection, internal resistance, rolling stats
+        self.metrics = DischargeMetrics()
+
+        # Limit/rate alarms, checked on every batch; raised/cleared events
+        # go to the status bar, the Alarms tab and the session's event log
+        self.alarms = alarms.AlarmEngine(ALARM_RULES)
+        self.alarm_log = deque(maxlen=ALARM_LOG_LINES)
+        self.alarm_sound = True
 
         # -------------------------
-        # Tabs (4 total)
+        # Tabs (7 total), each built on first activation
         # -------------------------
-        tabs = QTabWidget()
-        self.setCentralWidget(tabs)
-
-        tabs.addTab(self.build_battery_tab(), "Battery")
-        tabs.addTab(self.build_voltage_tab(), "Voltages")
-        tabs.addTab(self.build_temp_tab(), "Temperatures")
-        tabs.addTab(self.build_storage_tab(), "File Storage")
+        self.tabs = QTabWidget()
+        self.setCentralWidget(self.tabs)
+        self.tab_builders = {}      # page -> builder, until built
+        for title, builder in (
+            ("Battery", self.build_battery_tab),
+            ("Voltages", self.build_voltage_tab),
+            ("Temperatures", self.build_temp_tab),
+            ("Analysis", self.build_metrics_tab),
+            ("Alarms", self.build_alarms_tab),
+            ("File Storage", self.build_storage_tab),
+            ("Diagnostics", self.build_diagnostics_tab),
+        ):
+            page = QWidget()
+            self.tab_builders[page] = builder
+            self.tabs.addTab(page, title)
+        self.battery_page = self.tabs.widget(0)
+        self.alarms_page = self.tabs.widget(4)
+        self.storage_page = self.tabs.widget(5)
+        # Active-alarm count on the tab title, whichever tab is showing
+        self.views.subscribe(self.tabs, ("alarms",), self.show_alarm_indicator)
+        self.plot_curves = ()
+        self.first_paint_done = False
+        self.tabs.currentChanged.connect(self.on_tab_changed)
 
         # -------------------------
-        # Timer update (fast for demo)
+        # Timer update (repaint rate, independent of ingestion)
         # -------------------------
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_plot)
-        self.timer.start(50)  # 20 Hz so the 10-second demo looks smooth
+        self.timer.start(REFRESH_INTERVAL_MS)
+        startup.mark(f"window constructed{f' ({rig_name})' if rig_name else ''}")
+
+    # -------- Lazy tabs --------
+    def ensure_tab(self, page):
+        builder = self.tab_builders.pop(page, None)
+        if builder is not None:
+            builder(page)
+            startup.mark(f"{self.tabs.tabText(self.tabs.indexOf(page))} tab built")
+
+    def on_tab_changed(self, index):
+        self.ensure_tab(self.tabs.widget(index))
+        # The new page is only visible once the switch completes
+        QTimer.singleShot(0, self.views.render)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_paint_done:
+            # Window frame and tab bar are up; now build what's visible
+            self.first_paint_done = True
+            startup.mark("first paint")
+            QTimer.singleShot(0, self.show_current_tab)
+
+    def show_current_tab(self):
+        page = self.tabs.currentWidget()
+        self.ensure_tab(page)
+        self.views.render()
+        profile = startup.PROFILE
+        if profile is not None and not profile.reported:
+            page.repaint()
+            startup.mark("current tab painted")
+            profile.report()
 
     # -------- Tab 1: Battery + Shunt + Aux Current Graphs --------
-    def build_battery_tab(self) -> QWidget:
-        tab = QWidget()
+    def build_battery_tab(self, tab):
+        import pyqtgraph as pg
+
+        pg.setConfigOptions(antialias=True)
         root = QVBoxLayout(tab)
 
         title = QLabel("Live Monitoring")
@@ -105,8 +265,6 @@ class MainWindow(QMainWindow):
         # ---- Row of two plots (side-by-side) ----
         top_row = QHBoxLayout()
 
-        pg.setConfigOptions(antialias=True)
-
         # --- Plot 1: Test Battery Voltage ---
         left_col = QVBoxLayout()
         batt_label = QLabel("Test Battery Voltage")
@@ -183,47 +341,306 @@ class MainWindow(QMainWindow):
 
         root.addLayout(bottom_col, stretch=1)
 
-        return tab
+        # Shared time axis: pan/zoom one plot, all three follow
+        self.plot_shunt.setXLink(self.plot_batt)
+        self.plot_auxi.setXLink(self.plot_batt)
+        self.plot_curves = (
+            (self.plot_batt, self.curve_batt, CH_BATT_V),
+            (self.plot_shunt, self.curve_shunt, CH_SHUNT_V),
+            (self.plot_auxi, self.curve_auxi, CH_AUX_I),
+        )
+        for plot, _, _ in self.plot_curves:
+            plot.getViewBox().sigRangeChangedManually.connect(self.on_manual_range)
+        self.plot_batt.getViewBox().sigXRangeChanged.connect(self.on_x_range_changed)
+
+        # Subscriptions: readouts follow their DATA field, plots the store
+        self.views.subscribe(tab, ("test_battery_voltage_V",), lambda: self.batt_value_label.setText(
+            self.format_latest("test_battery_voltage_V", "{:.2f} V")
+        ))
+        self.views.subscribe(tab, ("test_battery_current_A",), lambda: self.shunt_value_label.setText(
+            self.format_latest("test_battery_current_A", "{:.1f} mV", protocol.SHUNT_RESISTANCE * 1000)
+        ))
+        self.views.subscribe(tab, ("aux_battery_current_A",), lambda: self.aux_value_label.setText(
+            self.format_latest("aux_battery_current_A", "{:.2f} A")
+        ))
+        self.plot_view = self.views.subscribe(tab, STORE_CHANNELS, self.render_plots)
+
+        self.cb_follow_live = QCheckBox("Follow live data")
+        self.cb_follow_live.setChecked(True)
+        self.cb_follow_live.toggled.connect(self.set_follow_live)
+        root.addWidget(self.cb_follow_live)
+
+        if self.replay is not None:
+            root.addLayout(self.build_replay_bar())
+            self.views.subscribe(tab, ("replay",), self.show_replay_position)
+
+    # ---- Replay transport (only when playing back a recording) ----
+    def build_replay_bar(self):
+        bar = QHBoxLayout()
+
+        self.replay_play_btn = QPushButton("Pause")
+        self.replay_play_btn.clicked.connect(self.toggle_replay)
+
+        self.replay_speed = QComboBox()
+        for label, speed in REPLAY_SPEEDS:
+            self.replay_speed.addItem(label, speed)
+        self.replay_speed.setCurrentIndex(
+            max(0, self.replay_speed.findData(self.replay.speed))
+        )
+        self.replay_speed.currentIndexChanged.connect(
+            lambda _: self.replay.set_speed(self.replay_speed.currentData())
+        )
 
-    # -------- Tab 2: Pre/Driver/Power Voltages (+ Vset) --------
-    def build_voltage_tab(self) -> QWidget:
-        tab = QWidget()
-        layout = QGridLayout(tab)
+        self.replay_slider = QSlider(Qt.Orientation.Horizontal)
+        self.replay_slider.setRange(0, REPLAY_SLIDER_STEPS)
+        self.replay_slider.sliderMoved.connect(self.scrub_replay)
+        self.replay_slider.sliderReleased.connect(
+            lambda: self.scrub_replay(self.replay_slider.value())
+        )
+        self.replay_slider.actionTriggered.connect(self.on_replay_slider_action)
 
-        layout.addWidget(QLabel("Pre-Driver Voltage:"), 0, 0)
-        layout.addWidget(QLabel(f"{self.pre_driver_voltage:.2f} V"), 0, 1)
+        self.replay_label = QLabel()
+        self.replay_label.setMinimumWidth(140)
 
-        layout.addWidget(QLabel("Driver Voltage:"), 1, 0)
-        layout.addWidget(QLabel(f"{self.driver_voltage:.2f} V"), 1, 1)
+        bar.addWidget(QLabel(f"Replay: {self.replay.name}"))
+        bar.addWidget(self.replay_play_btn)
+        bar.addWidget(self.replay_speed)
+        bar.addWidget(self.replay_slider, stretch=1)
+        bar.addWidget(self.replay_label)
+        return bar
 
-        layout.addWidget(QLabel("Power Stage Voltage:"), 2, 0)
-        layout.addWidget(QLabel(f"{self.power_stage_voltage:.2f} V"), 2, 1)
+    # -------- Tab 2: Pre/Driver/Power Voltages (+ Vset) --------
+    def build_voltage_tab(self, tab):
+        layout = QGridLayout(tab)
 
-        layout.addWidget(QLabel("Vset (POT):"), 3, 0)
-        layout.addWidget(QLabel(f"{self.vset_pot:.2f} V"), 3, 1)
+        self.add_readout(tab, layout, 0, "Pre-Driver Voltage:", "pre_driver_V", "{:.2f} V")
+        self.add_readout(tab, layout, 1, "Driver Voltage:", "driver_V", "{:.2f} V")
+        self.add_readout(tab, layout, 2, "Power Stage Voltage:", "power_stage_V", "{:.2f} V")
+        self.add_readout(tab, layout, 3, "Vset (POT):", "i_set_pot_V", "{:.2f} V")
 
         layout.setColumnStretch(0, 1)
         layout.setColumnStretch(1, 1)
-        return tab
 
     # -------- Tab 3: Temperatures --------
-    def build_temp_tab(self) -> QWidget:
-        tab = QWidget()
+    def build_temp_tab(self, tab):
         layout = QGridLayout(tab)
 
-        layout.addWidget(QLabel("Test Battery Temperature:"), 0, 0)
-        layout.addWidget(QLabel(f"{self.test_battery_temp:.1f} °C"), 0, 1)
-
-        layout.addWidget(QLabel("Heatsink Temperature:"), 1, 0)
-        layout.addWidget(QLabel(f"{self.heatsink_temp:.1f} °C"), 1, 1)
+        self.add_readout(tab, layout, 0, "Test Battery Temperature:", "battery_temp_C", "{:.1f} °C")
+        self.add_readout(tab, layout, 1, "Heatsink Temperature:", "heatsink_temp_C", "{:.1f} °C")
 
         layout.setColumnStretch(0, 1)
         layout.setColumnStretch(1, 1)
-        return tab
 
-    # -------- Tab 4: File Storage / Export with checkbox selection --------
-    def build_storage_tab(self) -> QWidget:
-        tab = QWidget()
+    # -------- Tab 4: Derived discharge metrics --------
+    def build_metrics_tab(self, tab):
+        layout = QGridLayout(tab)
+
+        self.metric_labels = {}
+        rows = (
+            ("amp_hours", "Capacity delivered:"),
+            ("watt_hours", "Energy delivered:"),
+            ("slope", "Discharge slope:"),
+            ("time_to_cutoff", "Time to cutoff:"),
+            ("resistance", "Internal resistance:"),
+        )
+        for row, (key, title) in enumerate(rows):
+            value = QLabel("--")
+            layout.addWidget(QLabel(title), row, 0)
+            layout.addWidget(value, row, 1, 1, 4)
+            self.metric_labels[key] = value
+
+        row = len(rows)
+        self.cutoff_spin = QDoubleSpinBox()
+        self.cutoff_spin.setRange(0.0, 60.0)
+        self.cutoff_spin.setDecimals(2)
+        self.cutoff_spin.setSingleStep(0.1)
+        self.cutoff_spin.setSuffix(" V")
+        self.cutoff_spin.setValue(DEFAULT_CUTOFF_V)
+        self.cutoff_spin.valueChanged.connect(self.set_cutoff_voltage)
+        layout.addWidget(QLabel("Cutoff voltage:"), row, 0)
+        layout.addWidget(self.cutoff_spin, row, 1)
+
+        # Rolling statistics over a selectable window
+        row += 1
+        self.rolling_window = QComboBox()
+        for window_s in self.metrics.windows_s:
+            self.rolling_window.addItem(f"last {window_s / 60:.0f} min", window_s)
+        self.rolling_window.currentIndexChanged.connect(lambda _: self.render_metrics())
+        layout.addWidget(QLabel("Rolling statistics:"), row, 0)
+        layout.addWidget(self.rolling_window, row, 1)
+
+        row += 1
+        for col, head in enumerate(("mean", "std", "min", "max"), start=1):
+            layout.addWidget(QLabel(head), row, col)
+        self.rolling_labels = {}
+        for name in ROLLING_CHANNELS:
+            row += 1
+            layout.addWidget(QLabel(name), row, 0)
+            cells = []
+            for col in range(1, 5):
+                cell = QLabel("--")
+                layout.addWidget(cell, row, col)
+                cells.append(cell)
+            self.rolling_labels[name] = cells
+
+        layout.setRowStretch(row + 1, 1)
+        self.views.subscribe(tab, ("metrics",), self.render_metrics)
+
+    def set_cutoff_voltage(self, volts):
+        self.metrics.cutoff_v = volts
+        self.views.touch("metrics")
+        self.views.render()
+
+    def render_metrics(self):
+        m = self.metrics
+        labels = self.metric_labels
+        labels["amp_hours"].setText(f"{m.amp_hours:.3f} Ah")
+        labels["watt_hours"].setText(f"{m.watt_hours:.2f} Wh")
+
+        slope = m.discharge_slope()
+        labels["slope"].setText("--" if slope is None else f"{slope * 3600 * 1000:.1f} mV/h")
+
+        remaining = m.time_to_cutoff()
+        if remaining is None:
+            labels["time_to_cutoff"].setText("--")
+        elif remaining <= 0:
+            labels["time_to_cutoff"].setText("at or below cutoff")
+        else:
+            hours, rest = divmod(int(remaining), 3600)
+            labels["time_to_cutoff"].setText(f"{hours}:{rest // 60:02d} h (projected)")
+
+        resistance = m.internal_resistance()
+        labels["resistance"].setText(
+            "--" if resistance is None
+            else f"{resistance * 1000:.1f} mΩ ({len(m.resistance_steps)} load steps)"
+        )
+
+        window_s = self.rolling_window.currentData()
+        for name, cells in self.rolling_labels.items():
+            stats = m.rolling[(name, window_s)].stats()
+            for cell, key in zip(cells, ("mean", "std", "min", "max")):
+                cell.setText("--" if stats is None else f"{stats[key]:.4f}")
+
+    # Live "name: value" row on a grid tab
+    def add_readout(self, tab, layout, row, title, field, fmt):
+        value = QLabel("--")
+        layout.addWidget(QLabel(title), row, 0)
+        layout.addWidget(value, row, 1)
+        self.views.subscribe(tab, (field,), lambda: value.setText(self.format_latest(field, fmt)))
+
+    def format_latest(self, field, fmt, scale=1.0):
+        value = self.latest.get(field, math.nan)
+        return "--" if math.isnan(value) else fmt.format(value * scale)
+
+    # -------- Tab 5: Alarm rules and event log --------
+    def build_alarms_tab(self, tab):
+        layout = QVBoxLayout(tab)
+
+        self.alarm_table = QTableWidget(len(self.alarms.rules), len(ALARM_COLUMNS))
+        self.alarm_table.setHorizontalHeaderLabels(ALARM_COLUMNS)
+        self.alarm_table.verticalHeader().setVisible(False)
+        self.alarm_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.alarm_table.horizontalHeader().setStretchLastSection(True)
+        for row, rule in enumerate(self.alarms.rules):
+            cells = (
+                rule.name,
+                rule.describe(),
+                f"{rule.limit:g}",
+                f"{rule.sustain_s:g}",
+                rule.severity,
+                "",
+            )
+            for col, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                flags = Qt.ItemFlag.ItemIsEnabled
+                if col == 0:
+                    flags |= Qt.ItemFlag.ItemIsUserCheckable
+                    item.setCheckState(Qt.CheckState.Checked if rule.enabled else Qt.CheckState.Unchecked)
+                elif col in (2, 3):
+                    flags |= Qt.ItemFlag.ItemIsEditable | Qt.ItemFlag.ItemIsSelectable
+                item.setFlags(flags)
+                self.alarm_table.setItem(row, col, item)
+        self.alarm_table.itemChanged.connect(self.on_alarm_rule_edited)
+        layout.addWidget(self.alarm_table)
+
+        controls = QHBoxLayout()
+        self.cb_alarm_sound = QCheckBox("Sound on alarm")
+        self.cb_alarm_sound.setChecked(self.alarm_sound)
+        self.cb_alarm_sound.toggled.connect(lambda on: setattr(self, "alarm_sound", on))
+        clear_btn = QPushButton("Clear log")
+        clear_btn.clicked.connect(self.clear_alarm_log)
+        controls.addWidget(self.cb_alarm_sound)
+        controls.addStretch()
+        controls.addWidget(clear_btn)
+        layout.addLayout(controls)
+
+        self.alarm_log_view = QPlainTextEdit()
+        self.alarm_log_view.setReadOnly(True)
+        self.alarm_log_view.setMaximumBlockCount(ALARM_LOG_LINES)
+        layout.addWidget(self.alarm_log_view)
+
+        self.views.subscribe(tab, ("alarms",), self.render_alarms)
+
+    def on_alarm_rule_edited(self, item):
+        rule = self.alarms.rules[item.row()]
+        col = item.column()
+        if col == 0:
+            rule.enabled = item.checkState() == Qt.CheckState.Checked
+        elif col in (2, 3):
+            attr = "limit" if col == 2 else "sustain_s"
+            try:
+                value = float(item.text())
+            except ValueError:
+                value = None
+            if value is None or (attr == "sustain_s" and value < 0):
+                item.setText(f"{getattr(rule, attr):g}")   # re-enters with the old value
+                return
+            setattr(rule, attr, value)
+            self.alarm_table.item(item.row(), 1).setText(rule.describe())
+        else:
+            return
+        self.alarms.compile()
+
+    def clear_alarm_log(self):
+        self.alarm_log.clear()
+        self.views.touch("alarms")
+        self.views.render()
+
+    def render_alarms(self):
+        for row, on in enumerate(self.alarms.active.tolist()):
+            item = self.alarm_table.item(row, len(ALARM_COLUMNS) - 1)
+            item.setText("ACTIVE" if on else "ok")
+            item.setForeground(ALARM_COLOR if on else self.alarm_table.palette().text().color())
+        self.alarm_log_view.setPlainText("\n".join(alarms.format_event(e) for e in self.alarm_log))
+        self.alarm_log_view.verticalScrollBar().setValue(self.alarm_log_view.verticalScrollBar().maximum())
+
+    def show_alarm_indicator(self):
+        count = int(self.alarms.active.sum())
+        index = self.tabs.indexOf(self.alarms_page)
+        self.tabs.setTabText(index, f"Alarms ({count})" if count else "Alarms")
+        self.tabs.tabBar().setTabTextColor(
+            index, ALARM_COLOR if count else self.tabs.palette().windowText().color()
+        )
+
+    def on_alarm_events(self, events):
+        raised = None
+        for event in events:
+            event["time"] = time.time()
+            if self.rig_name:
+                event["rig"] = self.rig_name
+            if self.recorder is not None:
+                self.recorder.log_event(event)
+            self.alarm_log.append(event)
+            if event["state"] == alarms.STATE_RAISED:
+                raised = event
+        if raised is not None:
+            self.statusBar().showMessage(f"ALARM {alarms.format_event(raised)}", 30000)
+            if self.alarm_sound:
+                QApplication.beep()
+        self.views.touch("alarms")
+
+    # -------- Tab 6: File Storage / Export with checkbox selection --------
+    def build_storage_tab(self, tab):
         layout = QVBoxLayout(tab)
 
         title = QLabel("File Storage")
@@ -231,8 +648,9 @@ class MainWindow(QMainWindow):
         title.setStyleSheet("font-size: 18px; font-weight: bold;")
 
         info = QLabel(
-            "Select which data streams to export to a CSV file.\n"
-            "All exports include the shared time_minutes column."
+            "Select which data streams to export.\n"
+            "All exports include the shared time_minutes column.\n"
+            "Recorded/opened sessions export in full, not just the data in memory."
         )
         info.setStyleSheet("font-size: 12px;")
 
@@ -251,100 +669,371 @@ class MainWindow(QMainWindow):
         select_layout.addWidget(self.cb_export_shunt)
         select_layout.addWidget(self.cb_export_auxi)
 
-        button_row = QHBoxLayout()
-        export_btn = QPushButton("Export CSV")
-        export_btn.setMinimumHeight(40)
-        export_btn.clicked.connect(self.export_csv)
+        self.cb_export_visible = QCheckBox("Visible time range only")
+        select_layout.addWidget(self.cb_export_visible)
 
-        button_row.addWidget(export_btn)
+        format_names = {
+            export.FORMAT_CSV: "CSV (.csv)",
+            export.FORMAT_NPY: "NumPy binary (.npy)",
+            export.FORMAT_PARQUET: "Parquet (.parquet)",
+        }
+        self.export_format = QComboBox()
+        for fmt in export.available_formats():
+            self.export_format.addItem(format_names[fmt], fmt)
+
+        button_row = QHBoxLayout()
+        self.export_btn = QPushButton("Export")
+        self.export_btn.setMinimumHeight(40)
+        self.export_btn.clicked.connect(self.export_data)
+
+        self.export_cancel_btn = QPushButton("Cancel")
+        self.export_cancel_btn.setMinimumHeight(40)
+        self.export_cancel_btn.setEnabled(False)
+        self.export_cancel_btn.clicked.connect(self.cancel_export)
+
+        open_btn = QPushButton("Open Session...")
+        open_btn.setMinimumHeight(40)
+        open_btn.clicked.connect(self.choose_session)
+
+        compare_btn = QPushButton("Compare Sessions...")
+        compare_btn.setMinimumHeight(40)
+        compare_btn.clicked.connect(self.open_compare)
+
+        button_row.addWidget(self.export_format)
+        button_row.addWidget(self.export_btn)
+        button_row.addWidget(self.export_cancel_btn)
+        button_row.addWidget(open_btn)
+        button_row.addWidget(compare_btn)
         button_row.addStretch()
 
+        self.export_progress = QProgressBar()
+        self.export_progress.setRange(0, 1000)
+        self.export_progress.setTextVisible(False)
+
         self.export_status = QLabel("Status: ready")
+        if self.recorder is not None:
+            self.export_status.setText(f"Status: recording to {self.recorder.path}")
         self.export_status.setStyleSheet("font-size: 12px;")
 
         layout.addWidget(title)
         layout.addWidget(info)
         layout.addWidget(select_group)
         layout.addLayout(button_row)
+        layout.addWidget(self.export_progress)
         layout.addWidget(self.export_status)
         layout.addStretch()
 
-        return tab
+    # -------- Tab 7: Link and command latency diagnostics --------
+    def build_diagnostics_tab(self, tab):
+        layout = QVBoxLayout(tab)
 
-    # -------- Export Function (selected columns) --------
-    def export_csv(self):
-        if len(self.x_data) < 2:
-            QMessageBox.warning(self, "Export CSV", "Not enough data to export yet.")
+        # Only a link that returns ACKs takes commands (not the demo, a
+        # replay, a fan-out viewer or the USB frame stream)
+        can_send = getattr(self.reader, "supports_commands", False)
+        buttons = QHBoxLayout()
+        for command in DIAG_COMMANDS:
+            btn = QPushButton(f"Send {command}")
+            btn.setEnabled(can_send)
+            btn.clicked.connect(lambda _=False, command=command: self.send_command(command))
+            buttons.addWidget(btn)
+        buttons.addStretch()
+        layout.addLayout(buttons)
+
+        self.diag_table = QTableWidget(0, len(DIAG_COLUMNS))
+        self.diag_table.setHorizontalHeaderLabels(DIAG_COLUMNS)
+        self.diag_table.verticalHeader().setVisible(False)
+        self.diag_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.diag_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        layout.addWidget(self.diag_table)
+
+        self.diag_link_label = QLabel("--")
+        self.diag_link_label.setWordWrap(True)
+        layout.addWidget(self.diag_link_label)
+
+        # Pending/timeouts and byte counts move without new ACKs
+        self.diag_timer = QTimer(self)
+        self.diag_timer.timeout.connect(lambda: self.views.touch("commands"))
+        self.diag_timer.start(DIAG_REFRESH_MS)
+        self.views.subscribe(tab, ("commands",), self.render_diagnostics)
+
+    def send_command(self, command):
+        cmd_id = self.reader.send_command(command)
+        if cmd_id is None:
+            self.statusBar().showMessage(f"{command} not sent: {self.reader.last_error or 'no link'}", 5000)
+        else:
+            self.statusBar().showMessage(f"Sent {command} (#{cmd_id})", 5000)
+        self.views.touch("commands")
+        self.views.render()
+
+    def render_diagnostics(self):
+        reader = self.reader
+        summary = reader.commands.summary() if hasattr(reader, "commands") else {}
+
+        def ms(stats, keys=("p50", "p95", "max")):
+            return "--" if stats is None else " / ".join(f"{stats[k] * 1e3:.1f}" for k in keys)
+
+        self.diag_table.setRowCount(len(summary))
+        for row, (kind, s) in enumerate(summary.items()):
+            cells = (
+                kind,
+                str(s["sent"]),
+                str(s["pending"]),
+                str(s["timeouts"]) + (f" (+{s['unknown']} unknown)" if s["unknown"] else ""),
+                ms(s["ack"]),
+                ms(s["done"]),
+                ms(s["device"], ("p50", "max")),
+            )
+            for col, text in enumerate(cells):
+                item = self.diag_table.item(row, col)
+                if item is None:
+                    self.diag_table.setItem(row, col, QTableWidgetItem(text))
+                else:
+                    item.setText(text)
+
+        if reader is None or not hasattr(reader, "bytes_read"):
+            self.diag_link_label.setText("Link: none (demo model or replay)")
+            return
+        text = (f"Link: {'connected' if reader.connected else 'no link'}, "
+                f"{reader.bytes_read / 1e6:.2f} MB, {reader.lines_read} lines, "
+                f"{reader.samples_read} samples")
+        rtts = [rtt for _, _, rtt in reader.clock_sync.samples]
+        if rtts:
+            text += (f"  |  SYNC round trip {np.median(rtts) * 1e3:.1f} ms median, "
+                     f"{max(rtts) * 1e3:.1f} ms max ({len(rtts)} exchanges)")
+        self.diag_link_label.setText(text)
+
+    # -------- Export (worker thread, selected columns) --------
+    def export_source(self):
+        # Whole session from disk when there is one, else the in-memory
+        # window. Columns are (array, scale) so the shunt voltage is only
+        # computed chunk by chunk.
+        if self.session is not None and self.session.refresh() >= 2:
+            s = self.session
+            return s.column("time_minutes"), {
+                CH_BATT_V: (s.column("test_battery_voltage_V"), 1.0),
+                CH_SHUNT_V: (s.column("test_battery_current_A"), protocol.SHUNT_RESISTANCE),
+                CH_AUX_I: (s.column("aux_battery_current_A"), 1.0),
+            }
+        # Copy: the ring buffer keeps being written while the job runs
+        return self.store.time().copy(), {
+            name: (self.store.channel(name).copy(), 1.0) for name in STORE_CHANNELS
+        }
+
+    def export_data(self):
+        if self.export_job is not None:
+            return
+        if len(self.store) < 2 and self.session is None:
+            QMessageBox.warning(self, "Export", "Not enough data to export yet.")
             return
 
-        export_batt = self.cb_export_batt.isChecked()
-        export_shunt = self.cb_export_shunt.isChecked()
-        export_auxi = self.cb_export_auxi.isChecked()
-
-        if not (export_batt or export_shunt or export_auxi):
-            QMessageBox.warning(self, "Export CSV", "Please select at least one dataset to export.")
+        selected = [
+            name for name, cb in (
+                (CH_BATT_V, self.cb_export_batt),
+                (CH_SHUNT_V, self.cb_export_shunt),
+                (CH_AUX_I, self.cb_export_auxi),
+            ) if cb.isChecked()
+        ]
+        if not selected:
+            QMessageBox.warning(self, "Export", "Please select at least one dataset to export.")
             return
 
-        default_name = f"elb_log_{time.strftime('%Y%m%d_%H%M%S')}.csv"
+        fmt = self.export_format.currentData()
+        suffix = export.FORMAT_SUFFIX[fmt]
+        default_name = f"elb_log_{time.strftime('%Y%m%d_%H%M%S')}{suffix}"
 
         path, _ = QFileDialog.getSaveFileName(
             self,
-            "Save CSV",
+            "Export",
             default_name,
-            "CSV Files (*.csv)"
+            f"{self.export_format.currentText()} (*{suffix})"
         )
 
         if not path:
             return  # user cancelled
 
-        # Build header + column extractors in the order we want
-        header_cols = ["time_minutes"]
-        series = []  # list of (col_name, data_deque)
-
-        if export_batt:
-            header_cols.append("test_battery_voltage_V")
-            series.append(("test_battery_voltage_V", self.y_data))
+        t, data = self.export_source()
+        lo, hi = 0, len(t)
+        if self.cb_export_visible.isChecked():
+            x0, x1 = self.plot_batt.getViewBox().viewRange()[0]
+            lo = int(np.searchsorted(t, x0))
+            hi = int(np.searchsorted(t, x1, side="right"))
+        if hi - lo < 1:
+            QMessageBox.warning(self, "Export", "No samples in the selected range.")
+            return
 
-        if export_shunt:
-            header_cols.append("shunt_voltage_V")
-            series.append(("shunt_voltage_V", self.shunt_y))
+        columns = [(t, 1.0)] + [data[name] for name in selected]
 
-        if export_auxi:
-            header_cols.append("aux_battery_current_A")
-            series.append(("aux_battery_current_A", self.aux_i_y))
+        def read_chunk(a, b):
+            return np.column_stack([col[lo + a:lo + b] * scale for col, scale in columns])
 
-        try:
-            with open(path, "w", newline="") as f:
-                f.write(",".join(header_cols) + "\n")
+        self.export_job = export.ExportJob(path, fmt, ["time_minutes"] + selected, hi - lo, read_chunk)
+        self.export_job.start()
 
-                # Ensure all selected series align with x_data length
-                n = min(len(self.x_data), *(len(d) for _, d in series))
+        self.export_btn.setEnabled(False)
+        self.export_cancel_btn.setEnabled(True)
+        self.export_progress.setValue(0)
+        self.export_status.setText(f"Status: exporting {hi - lo} rows to {path}")
+        self.export_timer.start(100)
 
-                # Convert to lists once (fast + stable)
-                x_list = list(self.x_data)[:n]
-                selected_lists = [(name, list(d)[:n]) for name, d in series]
+    def cancel_export(self):
+        if self.export_job is not None:
+            self.export_job.cancel()
 
-                for i in range(n):
-                    row = [f"{x_list[i]:.6f}"]
-                    for _, y_list in selected_lists:
-                        row.append(f"{y_list[i]:.6f}")
-                    f.write(",".join(row) + "\n")
+    def poll_export(self):
+        job = self.export_job
+        if job is None:
+            self.export_timer.stop()
+            return
+        self.export_progress.setValue(int(job.progress * 1000))
+        if not job.done:
+            return
 
-            self.export_status.setText(f"Status: exported to {path}")
-            QMessageBox.information(self, "Export CSV", "Export completed successfully!")
+        self.export_timer.stop()
+        self.export_job = None
+        self.export_btn.setEnabled(True)
+        self.export_cancel_btn.setEnabled(False)
 
-        except Exception as e:
-            QMessageBox.critical(self, "Export CSV", f"Export failed:\n{e}")
+        if job.error is not None:
+            QMessageBox.critical(self, "Export", f"Export failed:\n{job.error}")
             self.export_status.setText("Status: export failed")
+        elif job.cancelled:
+            self.export_progress.setValue(0)
+            self.export_status.setText("Status: export cancelled")
+        else:
+            self.export_status.setText(f"Status: exported {job.rows_written} rows to {job.path}")
+            QMessageBox.information(self, "Export", "Export completed successfully!")
+
+    # -------- Sessions --------
+    def choose_session(self):
+        path = QFileDialog.getExistingDirectory(self, "Open Session", DEFAULT_SESSION_DIR)
+        if not path:
+            return
+        try:
+            self.open_session(path)
+        except (OSError, ValueError, KeyError) as e:
+            QMessageBox.critical(self, "Open Session", f"Could not open session:\n{e}")
+
+    def open_compare(self):
+        from compare import CompareWindow
+
+        # Sessions next to the current recording, else the default directory
+        session_dir = DEFAULT_SESSION_DIR
+        if self.session is not None:
+            session_dir = os.path.dirname(os.path.abspath(self.session.path))
+        if self.compare_window is None:
+            self.compare_window = CompareWindow(session_dir)
+        self.compare_window.show()
+        self.compare_window.raise_()
+
+    def open_session(self, path):
+        session = Session(path)
+        for page in (self.battery_page, self.storage_page):
+            self.ensure_tab(page)
+
+        # Viewing a finished test: stop live updates into the plots
+        self.timer.stop()
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+        if self.reader is not None:
+            self.reader.stop()
+            self.reader = None
+        if self.replay is not None:
+            self.replay = None
+            for widget in (self.replay_play_btn, self.replay_speed, self.replay_slider):
+                widget.setEnabled(False)
+        self.session = session
+
+        t = session.column("time_minutes")
+        values = np.column_stack((
+            session.column("test_battery_voltage_V"),
+            session.column("test_battery_current_A") * protocol.SHUNT_RESISTANCE,
+            session.column("aux_battery_current_A"),
+        ))
+        self.store.clear()
+        self.lod.clear()
+        self.store.extend(t[-HISTORY_POINTS:], values[-HISTORY_POINTS:])
+        self.lod.extend(t, values)
+
+        self.metrics.clear()
+        self.metrics.extend(t * 60.0, {
+            name: session.column(name) for name in ROLLING_CHANNELS if name in session.columns
+        })
+        self.alarms.reset()
+        self.alarm_log.clear()
+        self.alarm_log.extend(e for e in session.events() if "rule" in e)
+        self.views.touch("metrics", "alarms")
+        self.views.render()
+
+        self.cb_follow_live.setChecked(False)
+        if len(t):
+            self.plot_batt.setXRange(t[0], t[-1], padding=0)
+            self.redraw_curves()
+            for plot, _, channel in self.plot_curves:
+                y_min, y_max = self.lod.min_max(channel)
+                if y_min is not None:
+                    plot.setYRange(y_min, y_max, padding=0.15)
+
+        self.export_status.setText(f"Status: viewing {path} ({len(t)} samples)")
+
+    # -------- Replay --------
+    def toggle_replay(self):
+        if self.replay.paused:
+            self.replay.resume()
+            self.replay_play_btn.setText("Pause")
+        else:
+            self.replay.pause()
+            self.replay_play_btn.setText("Play")
+
+    def on_replay_slider_action(self, _action):
+        # Page/step clicks on the groove (drags go through sliderMoved)
+        if not self.replay_slider.isSliderDown():
+            QTimer.singleShot(0, lambda: self.scrub_replay(self.replay_slider.value()))
+
+    def scrub_replay(self, value):
+        replay = self.replay
+        self.seek_replay(replay.first_time + replay.duration * value / REPLAY_SLIDER_STEPS)
+
+    def seek_replay(self, t_minutes):
+        replay = self.replay
+        old_index = replay.index
+        replay.seek(t_minutes)
+
+        if replay.index >= old_index:
+            # Forward: just fast-feed the skipped samples
+            self.apply_samples(replay.samples[old_index:replay.index])
+        else:
+            # Backward: rebuild the plots from the recording up to here
+            self.store.clear()
+            self.lod.clear()
+            self.metrics.clear()
+            self.alarms.reset()
+            self.batt_ymin = self.batt_ymax = None
+            self.shunt_ymin = self.shunt_ymax = None
+            self.auxi_ymin = self.auxi_ymax = None
+            self.apply_samples(replay.history())
+        self.cb_follow_live.setChecked(True)
+        self.update_plot()
+
+    def show_replay_position(self):
+        replay = self.replay
+        pos = min(replay.position(), replay.first_time + replay.duration)
+        if not self.replay_slider.isSliderDown() and replay.duration > 0:
+            self.replay_slider.setValue(
+                int((pos - replay.first_time) / replay.duration * REPLAY_SLIDER_STEPS)
+            )
+        self.replay_label.setText(
+            f"{pos:.1f} / {replay.first_time + replay.duration:.1f} min"
+        )
 
-    # -------- Update loop --------
-    def update_plot(self):
+    # -------- Data sources --------
+    def mock_sample(self):
         real_elapsed = time.time() - self.start_time
         simulated_minutes = real_elapsed * self.time_scale
 
         if simulated_minutes > self.max_minutes:
             self.timer.stop()
-            return
+            return None
 
         # ---- Battery discharge model ----
         V_start = self.test_battery_voltage_start
@@ -366,60 +1055,285 @@ class MainWindow(QMainWindow):
         aux_noise = random.gauss(0.0, 0.05)  # amps noise
         aux_i = max(0.0, aux_base + aux_ripple + aux_noise)
 
-        # Update numeric displays
-        self.batt_value_label.setText(f"{batt_v:.2f} V")
-        self.shunt_value_label.setText(f"{shunt_v * 1000:.1f} mV")
-        self.aux_value_label.setText(f"{aux_i:.2f} A")
-
-        # Store X + Y data
-        self.x_data.append(simulated_minutes)
-        self.y_data.append(batt_v)
-        self.shunt_y.append(shunt_v)
-        self.aux_i_y.append(aux_i)
-
-        # Update plot lines
-        x = list(self.x_data)
-        self.curve_batt.setData(x, list(self.y_data))
-        self.curve_shunt.setData(x, list(self.shunt_y))
-        self.curve_auxi.setData(x, list(self.aux_i_y))
-
-        # Helper for smoothed Y range
-        def smooth_y_range(y_vals, ymin, ymax, plot, pad_frac=0.15, alpha=0.15):
-            if len(y_vals) < 2:
-                return ymin, ymax
-
-            y_min = min(y_vals)
-            y_max = max(y_vals)
-            base_range = (y_max - y_min) if (y_max != y_min) else 1.0
-            y_pad = pad_frac * base_range
-
-            target_min = y_min - y_pad
-            target_max = y_max + y_pad
-
-            if ymin is None or ymax is None:
-                ymin = target_min
-                ymax = target_max
-            else:
-                ymin += alpha * (target_min - ymin)
-                ymax += alpha * (target_max - ymax)
-
-            plot.setYRange(ymin, ymax, padding=0)
-            return ymin, ymax
+        # Same layout as a parsed DATA line
+        return (
+            batt_v,
+            shunt_v / protocol.SHUNT_RESISTANCE,
+            aux_i,
+            self.heatsink_temp,
+            self.test_battery_temp,
+            self.vset_pot,
+            float("nan"),
+            simulated_minutes * 60e6,
+            self.pre_driver_voltage,
+            self.driver_voltage,
+            self.power_stage_voltage,
+        )
+
+    def sample_minutes(self, t_us):
+        return self.clock.minutes(t_us)
+
+    def apply_batch(self, batch):
+        for status in batch.status:
+            self.show_status(status)
+        for line in batch.errors:
+            self.statusBar().showMessage(f"RP2040 {line}", 10000)
+        if self.recorder is not None:
+            record_device_lines(self.recorder, batch.other)
+
+        return self.apply_samples(batch.sample_array())
+
+    def apply_samples(self, samples):
+        # samples: (n, len(DATA_FIELDS)) array
+        if not len(samples):
+            return 0
+        values = np.column_stack((
+            samples[:, F_TEST_V],
+            samples[:, F_TEST_I] * protocol.SHUNT_RESISTANCE,
+            samples[:, F_AUX_I],
+        ))
+        minutes = self.sample_minutes(samples[:, F_T_US])
+        self.store.extend(minutes, values)
+        self.lod.extend(minutes, values)
+        self.metrics.extend(minutes * 60.0, {
+            name: samples[:, protocol.DATA_FIELDS.index(name)] for name in ROLLING_CHANNELS
+        })
+        if self.recorder is not None:
+            dropped = self.recorder.rows_dropped
+            self.recorder.append(np.column_stack((minutes, samples)))
+            self.recorder.update_meta(metrics=self.metrics.summary())
+            if self.recorder.rows_dropped != dropped:
+                self.statusBar().showMessage(
+                    f"Recording can't keep up with the disk: {self.recorder.rows_dropped} rows dropped", 5000)
+        events = self.alarms.evaluate(minutes * 60.0, samples)
+        if events:
+            self.on_alarm_events(events)
+
+        # Readouts only repaint for fields whose latest value changed
+        latest = dict(zip(protocol.DATA_FIELDS, samples[-1].tolist()))
+        changed = []
+        for name, value in latest.items():
+            prev = self.latest.get(name)
+            if prev is None or not (value == prev or (math.isnan(value) and math.isnan(prev))):
+                changed.append(name)
+        self.latest = latest
+        self.views.touch(*STORE_CHANNELS, "metrics", *changed)
+        return len(samples)
+
+    def show_status(self, status):
+        self.device_state = status["state"]
+        self.views.touch("status")
+        text = f"RP2040: {status['state']}"
+        if "i2c_hz" in status:
+            text += f"  |  I2C {status['i2c_hz'] / 1000:.0f} kHz, {status['i2c_error_rate'] * 100:.2f}% errors"
+        self.statusBar().showMessage(text)
+
+    # -------- Update loop --------
+    def update_plot(self):
+        if self.reader is None:
+            batch = Batch()
+            sample = self.mock_sample()
+            if sample is not None:
+                batch.samples.append(sample)
+        else:
+            batch = self.reader.drain()
+
+        if self.replay is not None:
+            self.views.touch("replay")
+
+        if batch.acks:
+            self.views.touch("commands")
+        self.apply_batch(batch)
+        self.views.render()
+
+    def render_plots(self):
+        # Returns True while the smoothed Y ranges are still settling, so
+        # the view keeps animating after the data stops changing.
+        if not len(self.store):
+            return False
+
+        if not self.follow_live:
+            # The user is panning/zooming history; only new data at the
+            # right edge changes, redraw_curves() handles range changes.
+            self.redraw_curves()
+            return False
+
+        # Let long real tests run past the default window
+        self.plot_batt.setXRange(0, max(self.max_minutes, self.store.last_time()), padding=0)
+        self.redraw_curves()
+        self.y_settling = False
 
         # Apply smoothed autoscaling to each plot independently
-        self.batt_ymin, self.batt_ymax = smooth_y_range(
-            self.y_data, self.batt_ymin, self.batt_ymax, self.plot_batt
+        self.batt_ymin, self.batt_ymax = self.smooth_y_range(
+            CH_BATT_V, self.batt_ymin, self.batt_ymax, self.plot_batt
         )
-        self.shunt_ymin, self.shunt_ymax = smooth_y_range(
-            self.shunt_y, self.shunt_ymin, self.shunt_ymax, self.plot_shunt
+        self.shunt_ymin, self.shunt_ymax = self.smooth_y_range(
+            CH_SHUNT_V, self.shunt_ymin, self.shunt_ymax, self.plot_shunt
         )
-        self.auxi_ymin, self.auxi_ymax = smooth_y_range(
-            self.aux_i_y, self.auxi_ymin, self.auxi_ymax, self.plot_auxi
+        self.auxi_ymin, self.auxi_ymax = self.smooth_y_range(
+            CH_AUX_I, self.auxi_ymin, self.auxi_ymax, self.plot_auxi
         )
+        return self.y_settling
+
+    # -------- Level-of-detail rendering --------
+    def curve_data(self, channel, x0, x1, max_points):
+        # Raw samples from the ring buffer when the view is inside it and
+        # sparse enough, otherwise min/max pairs from the LOD pyramid.
+        t = self.store.time()
+        if len(t) and t[0] <= x0:
+            lo = np.searchsorted(t, x0)
+            hi = np.searchsorted(t, x1, side="right")
+            if hi - lo <= max_points:
+                lo = max(0, lo - 1)
+                hi = min(len(t), hi + 1)
+                return t[lo:hi], self.store.channel(channel)[lo:hi]
+        return self.lod.view(channel, x0, x1, max_points)
+
+    def redraw_curves(self):
+        if not len(self.store):
+            return
+        x0, x1 = self.plot_batt.getViewBox().viewRange()[0]
+        for plot, curve, channel in self.plot_curves:
+            # ~one min/max pair per horizontal pixel
+            max_points = 2 * max(200, int(plot.getViewBox().width()))
+            x, y = self.curve_data(channel, x0, x1, max_points)
+            curve.setData(x, y, skipFiniteCheck=True)
+
+    def on_manual_range(self, *_):
+        if self.follow_live:
+            self.cb_follow_live.setChecked(False)
+
+    def on_x_range_changed(self, *_):
+        if not self.follow_live:
+            self.redraw_curves()
+
+    def set_follow_live(self, enabled):
+        self.follow_live = enabled
+        if enabled:
+            self.views.invalidate(self.plot_view)
+            self.views.render()
+
+    def channel_min_max(self, channel):
+        # The ring buffer's running extrema cover the whole test until it
+        # starts evicting; after that use the pyramid's whole-history range.
+        if self.store.total == self.store.count:
+            return self.store.min_max(channel)
+        return self.lod.min_max(channel)
+
+    # Smoothed Y range from O(1) running min/max
+    def smooth_y_range(self, channel, ymin, ymax, plot, pad_frac=0.15, alpha=0.15):
+        if len(self.store) < 2:
+            return ymin, ymax
+
+        y_min, y_max = self.channel_min_max(channel)
+        if y_min is None:
+            return ymin, ymax
+        base_range = (y_max - y_min) if (y_max != y_min) else 1.0
+        y_pad = pad_frac * base_range
+
+        target_min = y_min - y_pad
+        target_max = y_max + y_pad
+
+        if ymin is None or ymax is None:
+            ymin = target_min
+            ymax = target_max
+        else:
+            ymin += alpha * (target_min - ymin)
+            ymax += alpha * (target_max - ymax)
+
+        if abs(target_min - ymin) + abs(target_max - ymax) > 1e-3 * base_range:
+            self.y_settling = True
+
+        plot.setYRange(ymin, ymax, padding=0)
+        return ymin, ymax
+
+    def closeEvent(self, event):
+        if self.reader is not None:
+            self.reader.stop()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.export_job is not None:
+            self.export_job.cancel()
+            self.export_job.join()
+        super().closeEvent(event)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="ELB desktop display")
+    parser.add_argument("--port", action="append",
+                        help="RP2040 serial port (usb:PORT for the USB frame stream), "
+                             "optionally NAME=PORT; repeat for several rigs "
+                             "(omit for the demo model)")
+    parser.add_argument("--baud", type=int, default=115200)
+    parser.add_argument("--record-dir", default=DEFAULT_SESSION_DIR,
+                        help="directory for recorded sessions (default: %(default)s)")
+    parser.add_argument("--no-record", action="store_true", help="don't record the session to disk")
+    parser.add_argument("--open", metavar="SESSION", help="open a recorded session instead of a port")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="play back a session directory or exported CSV through the live view")
+    parser.add_argument("--speed", default="1",
+                        help="replay speed factor, or 'max' (default: %(default)s)")
+    parser.add_argument("--serve", metavar="[HOST:]PORT",
+                        help="stream each --port rig to viewers on PORT, PORT+1, ... "
+                             "(host defaults to 127.0.0.1)")
+    parser.add_argument("--connect", action="append", metavar="[HOST:]PORT",
+                        help="view a rig streamed by another gui.py/recorder.py --serve; "
+                             "repeat for several")
+    parser.add_argument("--compare", nargs="*", metavar="SESSION",
+                        help="open the session comparison view (sessions under --record-dir, "
+                             "these ones overlaid)")
+    parser.add_argument("--alarms", metavar="FILE",
+                        help="alarm rules as JSON (default: built-in temperature/voltage limits)")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print import times and startup milestones (time to first paint)")
+    return parser.parse_known_args(argv)[0]
 
 
 if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    if args.alarms:
+        ALARM_RULES = alarms.load_rules(args.alarms)
+
+    reader = None
+    recorder = None
+    rig_sources = []
+    if args.replay:
+        speed = SPEED_MAX if args.speed.lower() == "max" else float(args.speed)
+        reader = ReplaySource.open(args.replay, speed=speed)
+        reader.start()
+    elif (args.port or args.connect) and not args.open and args.compare is None:
+        # One reader thread (and recorder) per rig
+        ports = args.port or []
+        record_dir = None if args.no_record else args.record_dir
+        for spec, serve in zip(ports, serve_addresses(args.serve, len(ports))):
+            name, reader, recorder, _ = open_rig(
+                spec, args.baud, record_dir, multi=len(ports) > 1, serve=serve,
+            )
+            rig_sources.append((name, reader, recorder))
+
+        # Remote rigs: the owning process records; viewers only display
+        for address in args.connect or []:
+            reader = SerialReader(lambda address=address: open_remote(address), name=address,
+                                  sync_interval=0, supports_commands=False)
+            reader.start()
+            rig_sources.append((address, reader, None))
+        name, reader, recorder = rig_sources[0]
+
     app = QApplication(sys.argv)
-    window = MainWindow()
+    if args.compare is not None:
+        from compare import CompareWindow
+
+        window = CompareWindow(args.record_dir, args.compare)
+    elif len(rig_sources) > 1:
+        from overview import RigOverview
+
+        window = RigOverview([
+            (name, MainWindow(reader, recorder, rig_name=name))
+            for name, reader, recorder in rig_sources
+        ])
+    else:
+        window = MainWindow(reader, recorder)
+        if args.open:
+            window.open_session(args.open)
     window.show()
     sys.exit(app.exec())
@@ -0,0 +1,251 @@
+"""
+Serial ingestion for the desktop GUI.
+
+A SerialReader thread reads the RP2040 stream, splits and parses lines off
+the GUI thread and accumulates them in a pending Batch. The GUI drains that
+batch on its own refresh timer, so the ingestion rate and the repaint rate
+are independent: however many lines arrive between two repaints, the UI
+sees one batch.
+
+Each read is split into lines once: DATA lines go to
+protocol.parse_data_block() as one block (a single NumPy pass), everything
+else (STATUS, ERROR, SYNC, ACK, ...) is routed line by line, and a partial last
+line is carried into the next read.
+
+Any object with read(n) -> bytes and write(bytes) works as a port (a
+pyserial Serial, a pty opened with pyserial, or a fake in a test).
+"""
+
+import threading
+import time
+
+import numpy as np
+
+import protocol
+from clock_sync import ClockSync
+from commands import CommandTracker
+
+READ_CHUNK = 4096
+SYNC_INTERVAL_S = 10.0
+RECONNECT_DELAY_S = 1.0
+MAX_PENDING_SAMPLES = 500_000   # oldest samples are dropped beyond this
+
+
+class Batch:
+    def __init__(self):
+        self.blocks = []    # (n, len(DATA_FIELDS)) arrays from the bulk parser
+        self.samples = []   # single tuples in protocol.DATA_FIELDS order
+        self.status = []    # dicts from protocol.parse_status()
+        self.errors = []    # ERROR lines
+        self.acks = []      # (id, stage, t_us) answering our own commands
+        self.other = []     # everything else (SET, PROFILE, CAL, RAW, ...)
+        self.dropped = 0    # samples discarded because nobody drained
+
+    def __len__(self):
+        return (self.sample_count() + len(self.status) + len(self.errors)
+                + len(self.acks) + len(self.other))
+
+    def sample_count(self):
+        return sum(len(block) for block in self.blocks) + len(self.samples)
+
+    def sample_array(self):
+        """All DATA samples, blocks first, as one (n, len(DATA_FIELDS)) array."""
+        parts = list(self.blocks)
+        if self.samples:
+            parts.append(np.asarray(self.samples, dtype=np.float64))
+        if not parts:
+            return np.empty((0, len(protocol.DATA_FIELDS)))
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def extend(self, other):
+        self.blocks.extend(other.blocks)
+        self.samples.extend(other.samples)
+        self.status.extend(other.status)
+        self.errors.extend(other.errors)
+        self.acks.extend(other.acks)
+        self.other.extend(other.other)
+        self.dropped += other.dropped
+
+    def trim(self, max_samples):
+        """Drops the oldest samples beyond max_samples; returns how many."""
+        excess = self.sample_count() - max_samples
+        if excess <= 0:
+            return 0
+        self.blocks = [self.sample_array()[excess:]]
+        self.samples = []
+        self.dropped += excess
+        return excess
+
+
+def open_serial(port, baudrate=115200, timeout=0.05):
+    import serial  # pyserial; only needed for real ports
+
+    return serial.Serial(port, baudrate=baudrate, timeout=timeout)
+
+
+class SerialReader(threading.Thread):
+    def __init__(self, open_port, name="rp2040", sync_interval=SYNC_INTERVAL_S,
+                 supports_commands=True):
+        super().__init__(name=f"reader-{name}", daemon=True)
+        # open_port() -> port; called again after a disconnect
+        self.open_port = open_port
+        self.sync_interval = sync_interval
+        self.clock_sync = ClockSync()
+        # CMD/ACK round trips of send_command(). False for links where
+        # commands can't round-trip (fan-out viewers, the USB frame stream)
+        self.supports_commands = supports_commands
+        self.commands = CommandTracker()
+
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._pending = Batch()
+        self._port = None
+        # Optional callable(bytes) handed every chunk of complete lines as
+        # read, before parsing (e.g. fanout.FanoutServer.publish)
+        self.tap = None
+
+        self.connected = False
+        self.last_error = None
+        self.bytes_read = 0
+        self.lines_read = 0
+        self.samples_read = 0
+
+    # -------- Thread --------
+    def run(self):
+        carry = b""
+        last_sync = 0.0
+
+        while not self._stop_event.is_set():
+            if self._port is None:
+                carry = b""
+                if not self._connect():
+                    self._stop_event.wait(RECONNECT_DELAY_S)
+                    continue
+
+            now = time.monotonic()
+            if self.sync_interval and now - last_sync >= self.sync_interval:
+                last_sync = now
+                self.send(self.clock_sync.make_request())
+
+            try:
+                waiting = getattr(self._port, "in_waiting", 0)
+                chunk = self._port.read(min(max(waiting, 1), READ_CHUNK))
+            except (OSError, ValueError) as exc:
+                self._disconnect(exc)
+                continue
+
+            if chunk:
+                self.bytes_read += len(chunk)
+                carry = self._consume(carry + chunk, time.monotonic())
+
+        self._disconnect(None)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _connect(self):
+        try:
+            self._port = self.open_port()
+        except (OSError, ValueError) as exc:
+            self.last_error = str(exc)
+            return False
+        self.connected = True
+        self.last_error = None
+        return True
+
+    def _disconnect(self, exc):
+        port, self._port = self._port, None
+        self.connected = False
+        if exc is not None:
+            self.last_error = str(exc)
+        if port is not None:
+            try:
+                port.close()
+            except (OSError, AttributeError):
+                pass
+
+    # -------- Parsing (reader thread) --------
+    def _consume(self, data, recv_time):
+        """Parses every complete line in data; returns the partial tail."""
+        lines = data.split(b"\n")
+        carry = lines.pop()
+        batch = Batch()
+        if self.tap is not None and lines:
+            self.tap(data[:len(data) - len(carry)])
+
+        data_lines = []
+        rest = []
+        for raw in lines:
+            (data_lines if raw.startswith(b"DATA,") else rest).append(raw)
+
+        if data_lines:
+            samples, _ = protocol.parse_data_block(data_lines)
+            if len(samples):
+                batch.blocks.append(samples)
+
+        for raw in rest:
+            line = raw.decode("ascii", "ignore").strip()
+            if not line:
+                continue
+            kind = protocol.line_kind(line)
+
+            if kind == protocol.KIND_DATA:
+                sample = protocol.parse_data(line)
+                if sample is not None:
+                    batch.samples.append(sample)
+            elif kind == protocol.KIND_STATUS:
+                batch.status.append(protocol.parse_status(line))
+            elif kind == protocol.KIND_ERROR:
+                batch.errors.append(line)
+            elif kind == protocol.KIND_SYNC:
+                self.clock_sync.handle_reply(line, recv_time)
+            elif kind == protocol.KIND_ACK:
+                ack = self.commands.handle_ack(line, recv_time)
+                if ack is not None:
+                    batch.acks.append(ack)
+            else:
+                batch.other.append(line)
+
+        self.lines_read += len(lines)
+        self.samples_read += batch.sample_count()
+        if len(batch):
+            self._publish(batch)
+        return carry
+
+    def _publish(self, batch):
+        with self._lock:
+            self._pending.extend(batch)
+            self._pending.trim(MAX_PENDING_SAMPLES)
+
+    # -------- GUI side --------
+    def drain(self):
+        """Returns everything received since the last drain as one Batch."""
+        with self._lock:
+            batch, self._pending = self._pending, Batch()
+        return batch
+
+    def send_command(self, command):
+        """Sends an acknowledged command; returns its id, or None if not sent."""
+        if not self.supports_commands:
+            self.last_error = "link doesn't take commands"
+            return None
+        cmd_id, text = self.commands.make_command(command)
+        if not self.send(text):
+            self.commands.forget(cmd_id)
+            return None
+        return cmd_id
+
+    def send(self, text):
+        port = self._port
+        if port is None:
+            return False
+        if not text.endswith("\n"):
+            text += "\n"
+        try:
+            with self._write_lock:
+                port.write(text.encode("ascii"))
+        except (OSError, ValueError) as exc:
+            self.last_error = str(exc)
+            return False
+        return True
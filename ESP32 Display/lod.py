@@ -0,0 +1,167 @@
+"""
+Multi-resolution min/max pyramid for long time series.
+
+levels[0] bins BASE_BIN raw samples; every further level bins FACTOR bins
+of the level below. Each bin keeps its first/last time and, per channel, its
+min and max. All levels are built incrementally as batches arrive, so a
+multi-hour test never has to be re-decimated. view() picks the finest
+level that fits a point budget for the requested time span and returns
+min/max pairs, which keeps spikes visible at any zoom.
+"""
+
+import numpy as np
+
+BASE_BIN = 16
+FACTOR = 4
+MAX_LEVELS = 12
+
+
+class _Growable:
+    """Append-only 2-D float array with amortised O(1) growth."""
+
+    def __init__(self, width, capacity=1024):
+        self._buf = np.empty((capacity, width))
+        self.count = 0
+
+    def extend(self, rows):
+        n = len(rows)
+        if self.count + n > len(self._buf):
+            size = max(len(self._buf) * 2, self.count + n)
+            buf = np.empty((size, self._buf.shape[1]))
+            buf[:self.count] = self._buf[:self.count]
+            self._buf = buf
+        self._buf[self.count:self.count + n] = rows
+        self.count += n
+
+    @property
+    def rows(self):
+        return self._buf[:self.count]
+
+
+class LodSeries:
+    """
+    Shared-time-axis pyramid for several channels.
+
+    Row layout of a level: [t_first, t_last, min_0, max_0, min_1, max_1, ...]
+    Raw samples that don't yet fill a level-1 bin are kept in a small tail
+    buffer so the newest data is always drawable.
+    """
+
+    def __init__(self, channels, base_bin=BASE_BIN, factor=FACTOR, max_levels=MAX_LEVELS):
+        self.channels = tuple(channels)
+        self.index = {name: i for i, name in enumerate(self.channels)}
+        self.base_bin = base_bin
+        self.factor = factor
+
+        width = 2 + 2 * len(self.channels)
+        self.levels = [_Growable(width) for _ in range(max_levels)]
+        self._consumed = [0] * max_levels   # rows of level k folded into level k+1
+
+        self._tail_t = np.empty(0)
+        self._tail_v = np.empty((0, len(self.channels)))
+        self.total = 0
+
+    def clear(self):
+        self.__init__(self.channels, self.base_bin, self.factor, len(self.levels))
+
+    # -------- Building --------
+    def extend(self, t, values):
+        t = np.asarray(t, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64).reshape(len(t), len(self.channels))
+        if not len(t):
+            return
+        self.total += len(t)
+
+        t = np.concatenate((self._tail_t, t))
+        values = np.concatenate((self._tail_v, values))
+        full = (len(t) // self.base_bin) * self.base_bin
+
+        if full:
+            bt = t[:full].reshape(-1, self.base_bin)
+            bv = values[:full].reshape(-1, self.base_bin, len(self.channels))
+            rows = np.empty((len(bt), 2 + 2 * len(self.channels)))
+            rows[:, 0] = bt[:, 0]
+            rows[:, 1] = bt[:, -1]
+            rows[:, 2::2] = np.fmin.reduce(bv, axis=1)
+            rows[:, 3::2] = np.fmax.reduce(bv, axis=1)
+            self.levels[0].extend(rows)
+            self._cascade()
+
+        self._tail_t = t[full:]
+        self._tail_v = values[full:]
+
+    def _cascade(self):
+        for k in range(len(self.levels) - 1):
+            below = self.levels[k]
+            start = self._consumed[k]
+            ready = ((below.count - start) // self.factor) * self.factor
+            if not ready:
+                return
+
+            src = below.rows[start:start + ready].reshape(-1, self.factor, below.rows.shape[1])
+            rows = np.empty((len(src), src.shape[2]))
+            rows[:, 0] = src[:, 0, 0]
+            rows[:, 1] = src[:, -1, 1]
+            rows[:, 2::2] = np.fmin.reduce(src[:, :, 2::2], axis=1)
+            rows[:, 3::2] = np.fmax.reduce(src[:, :, 3::2], axis=1)
+
+            self.levels[k + 1].extend(rows)
+            self._consumed[k] = start + ready
+
+    # -------- Queries --------
+    def min_max(self, name):
+        """Whole-history (min, max) from the coarsest level plus leftovers."""
+        ch = self.index[name]
+        top = 0
+        while top + 1 < len(self.levels) and self.levels[top + 1].count:
+            top += 1
+        rows = np.concatenate((self.levels[top].rows, self._unabsorbed(top)))
+
+        lows = [rows[:, 2 + 2 * ch], self._tail_v[:, ch]]
+        highs = [rows[:, 3 + 2 * ch], self._tail_v[:, ch]]
+        lo = np.fmin.reduce(np.concatenate(lows)) if self.total else np.nan
+        hi = np.fmax.reduce(np.concatenate(highs)) if self.total else np.nan
+        if np.isnan(lo):
+            return None, None
+        return float(lo), float(hi)
+
+    def _unabsorbed(self, k):
+        """Rows finer than level k that level k hasn't absorbed yet (few)."""
+        parts = [self.levels[j].rows[self._consumed[j]:] for j in range(k - 1, -1, -1)]
+        return np.concatenate(parts) if parts else self.levels[0].rows[:0]
+
+    def view(self, name, x0, x1, max_points):
+        """
+        (x, y) arrays covering [x0, x1] with at most ~max_points points,
+        as min/max pairs from the finest level that fits the budget.
+        """
+        ch = self.index[name]
+        budget_bins = max(1, max_points // 2)
+
+        k = 0
+        while True:
+            rows = self.levels[k].rows
+            lo = max(0, int(np.searchsorted(rows[:, 1], x0)) - 1)
+            hi = min(len(rows), int(np.searchsorted(rows[:, 0], x1, side="right")) + 1)
+            coarser = k + 1 < len(self.levels) and self.levels[k + 1].count > 0
+            if hi - lo <= budget_bins or not coarser:
+                break
+            k += 1
+
+        rows = rows[lo:hi]
+        if hi >= self.levels[k].count:
+            # View reaches the newest data: add the finer leftovers
+            extra = self._unabsorbed(k)
+            rows = np.concatenate((rows, extra[extra[:, 0] <= x1])) if len(extra) else rows
+
+        x = np.empty(2 * len(rows))
+        y = np.empty(2 * len(rows))
+        x[0::2] = rows[:, 0]
+        x[1::2] = rows[:, 1]
+        y[0::2] = rows[:, 2 + 2 * ch]
+        y[1::2] = rows[:, 3 + 2 * ch]
+
+        if len(self._tail_t) and (not len(rows) or hi >= self.levels[k].count):
+            x = np.concatenate((x, self._tail_t))
+            y = np.concatenate((y, self._tail_v[:, ch]))
+        return x, y
@@ -0,0 +1,261 @@
+"""
+Streaming discharge metrics, updated once per batch.
+
+Every quantity is kept as running state (sums, a few deques), so the cost
+of a batch is proportional to the batch and independent of how long the
+test has been running:
+
+* cumulative Ah / Wh (trapezoidal integration of I and V*I),
+* time to the cutoff voltage from an exponentially weighted linear fit of
+  V(t) (recent minutes count most),
+* internal resistance -dV/dI at load steps,
+* rolling mean/std/min/max per channel over several time windows.
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+
+from extrema import WindowExtrema
+
+CH_VOLTS = "test_battery_voltage_V"
+CH_AMPS = "test_battery_current_A"
+ROLLING_CHANNELS = (CH_VOLTS, CH_AMPS, "aux_battery_current_A")
+
+DEFAULT_CUTOFF_V = 10.5         # 12 V lead-acid, fully discharged
+FIT_TAU_S = 900.0               # weight of a sample halves every ~10 min
+STEP_THRESHOLD_A = 0.5          # |dI| between samples that counts as a load step
+RESISTANCE_STEPS = 16           # recent steps in the median
+ROLLING_WINDOWS_S = (300.0, 1800.0, 7200.0)
+
+
+class TimeWindowExtrema(WindowExtrema):
+    """WindowExtrema over the last `window` seconds instead of samples."""
+
+    def extend(self, t, values):
+        values = np.asarray(values, dtype=np.float64)
+        t = np.asarray(t, dtype=np.float64)
+        if not len(values):
+            return
+        for dq, accumulate, worse in (
+            (self._min, np.fmin.accumulate, lambda old, new: old >= new),
+            (self._max, np.fmax.accumulate, lambda old, new: old <= new),
+        ):
+            idx = self._candidates(values, accumulate)
+            if len(idx):
+                head = values[idx[0]]
+                while dq and worse(dq[-1][1], head):
+                    dq.pop()
+                dq.extend(zip(t[idx].tolist(), values[idx].tolist()))
+            oldest = t[-1] - self.window
+            while dq and dq[0][0] <= oldest:
+                dq.popleft()
+        self.count += len(values)
+
+
+class RollingStats:
+    """mean/std/min/max of one channel over the last window_s seconds."""
+
+    def __init__(self, window_s):
+        self.window_s = window_s
+        self._t = np.empty(1024)
+        self._s1 = np.empty(1024)    # prefix sums of v and v^2
+        self._s2 = np.empty(1024)
+        self._n = 0
+        self._start = 0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self.extrema = TimeWindowExtrema(window_s)
+
+    def extend(self, t, values):
+        t = np.asarray(t, dtype=np.float64)
+        v = np.asarray(values, dtype=np.float64)
+        ok = ~np.isnan(v)
+        t, v = t[ok], v[ok]
+        if not len(t):
+            return
+
+        s1 = self._sum + np.cumsum(v)
+        s2 = self._sumsq + np.cumsum(v * v)
+        self._sum, self._sumsq = s1[-1], s2[-1]
+        self._append(t, s1, s2)
+        self.extrema.extend(t, v)
+
+        # Drop samples that left the window (binary search, amortised O(1))
+        cut = np.searchsorted(self._t[self._start:self._n], t[-1] - self.window_s, side="right")
+        self._start += int(cut)
+
+    def _append(self, t, s1, s2):
+        n = len(t)
+        if self._n + n > len(self._t):
+            # Compact to the live window (rebasing the prefix sums so they
+            # don't grow for the whole test) and grow if still too small
+            live = self._n - self._start
+            size = max(2 * (live + n), 1024)
+            base1, base2 = self._bases()
+            for name, base in (("_t", 0.0), ("_s1", base1), ("_s2", base2)):
+                old = getattr(self, name)
+                buf = np.empty(size)
+                buf[:live] = old[self._start:self._n] - base
+                setattr(self, name, buf)
+            s1 -= base1
+            s2 -= base2
+            self._sum -= base1
+            self._sumsq -= base2
+            self._n, self._start = live, 0
+        self._t[self._n:self._n + n] = t
+        self._s1[self._n:self._n + n] = s1
+        self._s2[self._n:self._n + n] = s2
+        self._n += n
+
+    def _bases(self):
+        # Prefix sums just before the window start
+        if self._start:
+            return self._s1[self._start - 1], self._s2[self._start - 1]
+        return 0.0, 0.0
+
+    def stats(self):
+        count = self._n - self._start
+        if not count:
+            return None
+        base1, base2 = self._bases()
+        mean = (self._s1[self._n - 1] - base1) / count
+        var = max(0.0, (self._s2[self._n - 1] - base2) / count - mean * mean)
+        return {
+            "count": count,
+            "mean": float(mean),
+            "std": math.sqrt(var),
+            "min": self.extrema.min,
+            "max": self.extrema.max,
+        }
+
+
+class DischargeMetrics:
+    def __init__(self, cutoff_v=DEFAULT_CUTOFF_V, fit_tau_s=FIT_TAU_S,
+                 step_threshold_a=STEP_THRESHOLD_A, windows_s=ROLLING_WINDOWS_S):
+        self.cutoff_v = cutoff_v
+        self.fit_tau_s = fit_tau_s
+        self.step_threshold_a = step_threshold_a
+        self.windows_s = tuple(windows_s)
+        self.clear()
+
+    def clear(self):
+        self.amp_hours = 0.0
+        self.watt_hours = 0.0
+        self.samples = 0
+        self._last = None               # (t, v, i) of the previous sample
+
+        # Exponentially weighted sums for the V(t) fit, referenced to _t_fit
+        self._t_fit = None
+        self._t_fit_now = None
+        self._w = self._wx = self._wy = self._wxx = self._wxy = 0.0
+
+        self.resistance_steps = deque(maxlen=RESISTANCE_STEPS)
+        self.rolling = {
+            (name, w): RollingStats(w) for name in ROLLING_CHANNELS for w in self.windows_s
+        }
+
+    # -------- Update (one call per batch) --------
+    def extend(self, t_s, columns):
+        """t_s: (n,) seconds; columns: {DATA field name: (n,) values}."""
+        t = np.asarray(t_s, dtype=np.float64)
+        if not len(t):
+            return
+        v = np.asarray(columns[CH_VOLTS], dtype=np.float64)
+        i = np.asarray(columns[CH_AMPS], dtype=np.float64)
+
+        # Prepend the previous batch's last sample so steps/integrals join up
+        if self._last is not None:
+            tt = np.concatenate(([self._last[0]], t))
+            vv = np.concatenate(([self._last[1]], v))
+            ii = np.concatenate(([self._last[2]], i))
+        else:
+            tt, vv, ii = t, v, i
+
+        if len(tt) > 1:
+            dt_h = np.diff(tt) / 3600.0
+            i_mid = (ii[1:] + ii[:-1]) / 2
+            p_mid = (vv[1:] * ii[1:] + vv[:-1] * ii[:-1]) / 2
+            ok = ~(np.isnan(i_mid) | np.isnan(p_mid)) & (dt_h > 0)
+            self.amp_hours += float(np.sum(i_mid[ok] * dt_h[ok]))
+            self.watt_hours += float(np.sum(p_mid[ok] * dt_h[ok]))
+
+            di = np.diff(ii)
+            dv = np.diff(vv)
+            steps = np.abs(di) >= self.step_threshold_a
+            steps &= ~np.isnan(dv)
+            for r in (-dv[steps] / di[steps]).tolist():
+                self.resistance_steps.append(r)
+
+        self._fit(t, v)
+        for (name, _), stats in self.rolling.items():
+            if name in columns:
+                stats.extend(t, columns[name])
+
+        self._last = (t[-1], v[-1], i[-1])
+        self.samples += len(t)
+
+    def _fit(self, t, v):
+        ok = ~np.isnan(v)
+        t, v = t[ok], v[ok]
+        if not len(t):
+            return
+        if self._t_fit is None:
+            self._t_fit = t[0]
+        t_now = t[-1]
+        x = t - self._t_fit
+
+        # Decay the old sums to the new "now", then add this batch
+        decay = math.exp(-(t_now - self._t_fit_now) / self.fit_tau_s) if self._w else 0.0
+        w = np.exp(-(t_now - t) / self.fit_tau_s)
+        self._w = self._w * decay + float(w.sum())
+        self._wx = self._wx * decay + float((w * x).sum())
+        self._wy = self._wy * decay + float((w * v).sum())
+        self._wxx = self._wxx * decay + float((w * x * x).sum())
+        self._wxy = self._wxy * decay + float((w * x * v).sum())
+        self._t_fit_now = t_now
+
+    # -------- Results --------
+    def discharge_slope(self):
+        """Fitted dV/dt in V/s, or None before there's enough spread."""
+        if not self._w:
+            return None
+        den = self._wxx * self._w - self._wx * self._wx
+        if den <= 1e-12 * max(1.0, self._wxx * self._w):
+            return None
+        return (self._wxy * self._w - self._wx * self._wy) / den
+
+    def time_to_cutoff(self):
+        """Projected seconds until the fitted voltage reaches cutoff_v."""
+        slope = self.discharge_slope()
+        if slope is None:
+            return None
+        x_now = self._t_fit_now - self._t_fit
+        v_now = (self._wy + slope * (x_now * self._w - self._wx)) / self._w
+        if v_now <= self.cutoff_v:
+            return 0.0
+        if slope >= 0:
+            return None
+        return (self.cutoff_v - v_now) / slope
+
+    def internal_resistance(self):
+        if not self.resistance_steps:
+            return None
+        return float(np.median(self.resistance_steps))
+
+    def summary(self):
+        slope = self.discharge_slope()
+        return {
+            "samples": self.samples,
+            "amp_hours": self.amp_hours,
+            "watt_hours": self.watt_hours,
+            "cutoff_v": self.cutoff_v,
+            "discharge_slope_v_per_h": slope * 3600 if slope is not None else None,
+            "time_to_cutoff_s": self.time_to_cutoff(),
+            "internal_resistance_ohm": self.internal_resistance(),
+            "resistance_steps": len(self.resistance_steps),
+            "rolling": {
+                f"{name}@{int(w)}s": stats.stats() for (name, w), stats in self.rolling.items()
+            },
+        }
@@ -0,0 +1,411 @@
+"""
+RP2040 emulator on a pseudo-terminal, for load-testing without hardware.
+
+    python mock.py [--rate 1000] [--link /tmp/elb-rp2040] [--autostart]
+                   [--noise 1.0] [--drop-rate 1e-5] [--reconnect-every 60]
+    python gui.py --port /tmp/elb-rp2040        # or recorder.py --port ...
+
+Speaks the firmware's line protocol on a pty: START / STOP / STATUS /
+SYNC[,token] in, optionally wrapped as CMD,<id>,<command>; STATUS, DATA
+(all 11 fields), SYNC, ACK and ERROR lines out. START blocks for
+--start-delay like the firmware's shunt calibration. STREAM,USB switches
+the samples to usb_stream frames (as if this pty were the USB console;
+the sample rate stays --rate) and STREAM,OFF back to DATA lines.
+Samples come from DischargeModel, a constant-current battery discharge,
+generated in NumPy blocks on a fixed schedule, so rates of tens of kHz
+are possible (well beyond a real 115200 baud UART).
+
+Faults for exercising the host side:
+
+* --noise scales the model's measurement noise.
+* --drop-rate deletes that fraction of output bytes at random, which
+  corrupts or merges lines.
+* --reconnect-every closes the pty and opens a new one. The device keeps
+  sampling while the link is down, so the host sees a seq gap. --link
+  always points at the current pty, so hosts can reopen the same path.
+
+Output the host doesn't read fast enough is buffered up to
+MAX_PENDING_BYTES and then dropped, counted as overrun.
+"""
+
+import argparse
+import os
+import select
+import signal
+import sys
+import threading
+import time
+import tty
+
+import numpy as np
+
+import protocol
+import usb_stream
+
+DEFAULT_RATE_HZ = 10.0
+TICK_S = 0.005
+MAX_BLOCK_S = 0.5               # longest backlog generated in one go after a stall
+MAX_PENDING_BYTES = 1 << 20
+RECONNECT_DOWN_S = 2.0
+START_DELAY_S = 2.7             # firmware: LED blink + 2 s settle + 100 shunt reads
+STATS_INTERVAL_S = 5.0
+I2C_HZ = 400_000
+
+# Firmware-like formatting of a DATA line (seq and t_us as integers)
+DATA_FORMAT = "DATA,%.4f,%.4f,%.4f,%.2f,%.2f,%.4f,%d,%d,%.4f,%.4f,%.4f"
+
+F_SEQ = protocol.DATA_FIELDS.index("seq")
+F_T_US = protocol.DATA_FIELDS.index("t_us")
+
+
+class DischargeModel:
+    """
+    A battery under constant-current load. Terminal voltage is the open-
+    circuit voltage at the current state of charge, with a knee near empty,
+    less I*R. Temperatures rise towards their steady state with first-order
+    lags. Noise is Gaussian, in measurement units, scaled by `noise`.
+    """
+
+    def __init__(self, capacity_ah=7.0, current_a=2.0, v_full=12.7, v_empty=11.6,
+                 resistance_ohm=0.05, aux_current_a=1.5, ambient_c=25.0,
+                 noise=1.0, seed=None):
+        self.capacity_ah = capacity_ah
+        self.current_a = current_a
+        self.v_full = v_full
+        self.v_empty = v_empty
+        self.resistance_ohm = resistance_ohm
+        self.aux_current_a = aux_current_a
+        self.ambient_c = ambient_c
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+
+        self.knee_v = 0.8
+        self.knee_soc = 0.03
+        self.battery_c_per_w = 4.0
+        self.battery_tau_s = 900.0
+        self.sink_c_per_w = 1.2
+        self.sink_tau_s = 300.0
+        self.pot_v = 1.65
+        self.rails = (5.10, 10.02, 12.58)     # pre-driver, driver, power stage
+
+    def voltage(self, t_s):
+        soc = np.clip(1.0 - self.current_a * t_s / 3600.0 / self.capacity_ah, 0.0, 1.0)
+        ocv = (self.v_empty + (self.v_full - self.v_empty) * soc
+               - self.knee_v * np.exp(-soc / self.knee_soc))
+        return ocv - self.current_a * self.resistance_ohm
+
+    def samples(self, t_s):
+        """(n, len(DATA_FIELDS)) block at times t_s; seq and t_us are left NaN."""
+        t_s = np.asarray(t_s, dtype=np.float64)
+        n = len(t_s)
+        out = np.full((n, len(protocol.DATA_FIELDS)), np.nan)
+        i = self.current_a
+        v = self.voltage(t_s)
+        heat = i * i * self.resistance_ohm
+        out[:, 0] = v
+        out[:, 1] = i
+        out[:, 2] = self.aux_current_a
+        out[:, 3] = self.ambient_c + v * i * self.sink_c_per_w * (1.0 - np.exp(-t_s / self.sink_tau_s))
+        out[:, 4] = self.ambient_c + heat * self.battery_c_per_w * (1.0 - np.exp(-t_s / self.battery_tau_s))
+        out[:, 5] = self.pot_v
+        out[:, 8:11] = self.rails
+
+        if self.noise:
+            # Per-column noise: V, A, A, degC, degC, V, -, -, V, V, V
+            sigma = np.array((0.002, 0.01, 0.02, 0.1, 0.05, 0.001, 0, 0, 0.005, 0.005, 0.005))
+            out += self.rng.standard_normal(out.shape) * (sigma * self.noise)
+        return out
+
+
+class Rp2040Emulator:
+    def __init__(self, model, rate_hz=DEFAULT_RATE_HZ, link=None, autostart=False,
+                 drop_rate=0.0, reconnect_every=None, reconnect_down_s=RECONNECT_DOWN_S,
+                 start_delay_s=START_DELAY_S, seed=None):
+        self.model = model
+        self.rate_hz = float(rate_hz)
+        self.link = link
+        self.active = autostart
+        self.usb_stream = False
+        self.drop_rate = drop_rate
+        self.reconnect_every = reconnect_every
+        self.reconnect_down_s = reconnect_down_s
+        self.start_delay_s = start_delay_s
+        self.rng = np.random.default_rng(seed)
+
+        self.master = None
+        self.slave = None
+        self.path = None
+        self._in = b""
+        self._out = bytearray()
+
+        self.boot = time.monotonic()
+        self.test_s = 0.0           # model time, advanced only while active
+        self._last_tick = None
+        self._due = 0.0             # fractional samples owed
+        self.seq = 0
+
+        self.samples = 0            # DATA lines generated (sent or not)
+        self.bytes_sent = 0
+        self.bytes_dropped = 0      # deliberately deleted (--drop-rate)
+        self.bytes_overrun = 0      # host too slow or link down
+        self.commands = 0
+        self.reconnects = 0
+        self._down_until = None
+        self._next_reconnect = None
+
+    # -------- Pseudo-terminal --------
+    def open(self):
+        self.master, self.slave = os.openpty()
+        # Raw, no echo: otherwise our own output echoes back as commands
+        tty.setraw(self.slave)
+        os.set_blocking(self.master, False)
+        self.path = os.ttyname(self.slave)
+        if self.link:
+            tmp = f"{self.link}.tmp"
+            if os.path.lexists(tmp):
+                os.remove(tmp)
+            os.symlink(self.path, tmp)
+            os.replace(tmp, self.link)
+        if self.reconnect_every:
+            self._next_reconnect = time.monotonic() + self.reconnect_every
+        return self.path
+
+    def close(self):
+        for fd in (self.master, self.slave):
+            if fd is not None:
+                os.close(fd)
+        self.master = self.slave = None
+        self._in = b""
+        self.bytes_overrun += len(self._out)
+        self._out.clear()
+
+    def drop_link(self, down_s):
+        """Closes the pty; a new one (same --link) appears after down_s."""
+        self.close()
+        self.reconnects += 1
+        self._down_until = time.monotonic() + down_s
+
+    def now_us(self):
+        return int((time.monotonic() - self.boot) * 1e6)
+
+    # -------- Protocol --------
+    def send(self, text):
+        self._queue(text.encode("ascii"))
+
+    def send_status(self):
+        state = "ACTIVE" if self.active else "IDLE"
+        self.send(f"STATUS,{state},{I2C_HZ},{0.0:.5f}\n")
+
+    def send_ack(self, cmd_id, stage):
+        self.send(f"ACK,{cmd_id},{stage},{self.now_us()}\n")
+
+    def handle_command(self, command):
+        """Returns False for commands the emulator doesn't know."""
+        self.commands += 1
+        if command == "START":
+            if not self.active:
+                time.sleep(self.start_delay_s)      # blocks everything, as on the RP2040
+                self.active = True
+                self._last_tick = None
+                self.send_status()
+        elif command == "STOP":
+            if self.active:
+                self.active = False
+                self.send_status()
+        elif command == "STATUS":
+            self.send_status()
+        elif command == "STREAM,OFF":
+            self.usb_stream = False
+            self.send("STREAM,OFF\n")
+        elif command == "STREAM,USB" or command.startswith("STREAM,USB,"):
+            self.usb_stream = True
+            fields = command.split(",")
+            interval = fields[2] if len(fields) > 2 else usb_stream.DEFAULT_INTERVAL_MS
+            self.send(f"STREAM,USB,{interval}\n")
+        elif command == "SYNC" or command.startswith("SYNC,"):
+            fields = command.split(",", 1)
+            token = f",{fields[1]}" if len(fields) > 1 else ""
+            self.send(f"SYNC,{self.now_us()}{token}\n")
+        else:
+            # CAL, MODE and PROFILE need the real ADC/DAC chain
+            self.send(f"ERROR,UNSUPPORTED,{command.split(',', 1)[0]}\n")
+            return False
+        return True
+
+    def _read_commands(self):
+        try:
+            data = os.read(self.master, 4096)
+        except (BlockingIOError, OSError):
+            return
+        self._in += data
+        *lines, self._in = self._in.split(b"\n")
+        for line in lines:
+            command = line.strip().decode("ascii", "ignore").upper()
+            if not command:
+                continue
+            fields = command.split(",", 2)
+            if fields[0] == "CMD" and len(fields) == 3:
+                self.send_ack(fields[1], protocol.ACK_RECEIVED)
+                self._flush()       # the UART sends RX while the handler runs
+                ok = self.handle_command(fields[2])
+                self.send_ack(fields[1], protocol.ACK_DONE if ok else protocol.ACK_UNKNOWN)
+            else:
+                self.handle_command(command)
+
+    # -------- Sampling --------
+    def _generate(self, now):
+        if not self.active:
+            self._last_tick = None
+            return
+        if self._last_tick is None:
+            self._last_tick = now
+            return
+        elapsed = min(now - self._last_tick, MAX_BLOCK_S)
+        self._last_tick = now
+        self._due += elapsed * self.rate_hz
+        n = int(self._due)
+        if not n:
+            return
+        self._due -= n
+
+        period = 1.0 / self.rate_hz
+        t_s = self.test_s + period * np.arange(1, n + 1)
+        block = self.model.samples(t_s)
+        block[:, F_SEQ] = np.arange(self.seq, self.seq + n)
+        end_us = self.now_us()
+        block[:, F_T_US] = end_us - (t_s[-1] - t_s) * 1e6
+        self.test_s = float(t_s[-1])
+        self.seq += n
+        self.samples += n
+
+        if self.usb_stream:
+            data = usb_stream.encode_frames(block)
+        else:
+            data = ("\n".join(DATA_FORMAT % row for row in map(tuple, block.tolist())) + "\n").encode("ascii")
+        self._queue(data)
+
+    def _queue(self, data):
+        if self.master is None:
+            self.bytes_overrun += len(data)
+            return
+        if self.drop_rate:
+            lost = self.rng.binomial(len(data), self.drop_rate)
+            if lost:
+                keep = np.ones(len(data), dtype=bool)
+                keep[self.rng.choice(len(data), lost, replace=False)] = False
+                data = np.frombuffer(data, dtype=np.uint8)[keep].tobytes()
+                self.bytes_dropped += lost
+        room = MAX_PENDING_BYTES - len(self._out)
+        if len(data) > room:
+            self.bytes_overrun += len(data) - room
+            data = data[:room]
+        self._out += data
+
+    def _flush(self):
+        while self._out:
+            try:
+                written = os.write(self.master, self._out)
+            except (BlockingIOError, OSError):
+                return
+            del self._out[:written]
+            self.bytes_sent += written
+
+    # -------- Main loop --------
+    def step(self, timeout=TICK_S):
+        now = time.monotonic()
+        if self.master is None:
+            # Link down: keep sampling (into the void) until it comes back
+            self._generate(now)
+            if now >= self._down_until:
+                self._down_until = None
+                self.open()
+            else:
+                time.sleep(timeout)
+            return
+        if self._next_reconnect is not None and now >= self._next_reconnect:
+            self.drop_link(self.reconnect_down_s)
+            return
+
+        wait_write = [self.master] if self._out else []
+        readable, _, _ = select.select([self.master], wait_write, [], timeout)
+        if readable:
+            self._read_commands()
+        self._generate(time.monotonic())
+        self._flush()
+
+    def stats_line(self):
+        link = self.path if self._down_until is None else "link down"
+        return (f"{link}: {'ACTIVE' if self.active else 'IDLE'}, {self.samples} samples, "
+                f"{self.bytes_sent / 1e6:.1f} MB sent, {self.bytes_dropped} bytes dropped, "
+                f"{self.bytes_overrun} bytes overrun, {self.reconnects} reconnects")
+
+    def run(self, stop_event, stats_interval=STATS_INTERVAL_S):
+        if self.master is None:
+            self.open()
+        last_stats = time.monotonic()
+        try:
+            while not stop_event.is_set():
+                self.step()
+                now = time.monotonic()
+                if stats_interval and now - last_stats >= stats_interval:
+                    print(self.stats_line(), flush=True)
+                    last_stats = now
+        finally:
+            self.close()
+            if self.link and os.path.islink(self.link):
+                os.remove(self.link)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="RP2040 protocol emulator on a pty")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE_HZ,
+                        help="DATA lines per second (default: %(default)s)")
+    parser.add_argument("--link", metavar="PATH",
+                        help="symlink kept pointing at the current pty, e.g. /tmp/elb-rp2040")
+    parser.add_argument("--autostart", action="store_true",
+                        help="stream without waiting for START (gui.py never sends it)")
+    parser.add_argument("--capacity", type=float, default=7.0, metavar="AH")
+    parser.add_argument("--current", type=float, default=2.0, metavar="A",
+                        help="test load current (default: %(default)s)")
+    parser.add_argument("--noise", type=float, default=1.0,
+                        help="measurement noise scale, 0 for clean data (default: %(default)s)")
+    parser.add_argument("--drop-rate", type=float, default=0.0,
+                        help="fraction of output bytes to delete at random")
+    parser.add_argument("--reconnect-every", type=float, metavar="SECONDS",
+                        help="drop and reopen the pty this often")
+    parser.add_argument("--reconnect-down", type=float, default=RECONNECT_DOWN_S, metavar="SECONDS",
+                        help="how long the link stays down (default: %(default)s)")
+    parser.add_argument("--start-delay", type=float, default=START_DELAY_S, metavar="SECONDS",
+                        help="how long START blocks, like the shunt calibration (default: %(default)s)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--stats", type=float, default=STATS_INTERVAL_S, metavar="SECONDS",
+                        help="stats interval, 0 to disable (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    model = DischargeModel(capacity_ah=args.capacity, current_a=args.current,
+                           noise=args.noise, seed=args.seed)
+    emulator = Rp2040Emulator(
+        model, rate_hz=args.rate, link=args.link, autostart=args.autostart,
+        drop_rate=args.drop_rate, reconnect_every=args.reconnect_every,
+        reconnect_down_s=args.reconnect_down, start_delay_s=args.start_delay, seed=args.seed,
+    )
+    path = emulator.open()
+    print(f"RP2040 emulator on {args.link or path}"
+          + (f" -> {path}" if args.link else "")
+          + f", {args.rate:g} Hz{'' if args.autostart else ', waiting for START'}", flush=True)
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    try:
+        emulator.run(stop_event, args.stats)
+    except KeyboardInterrupt:
+        pass
+    print(emulator.stats_line(), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+Multi-rig monitoring: several RP2040 benches in one GUI process.
+
+Every rig is a full gui.MainWindow with its own SerialReader thread, ring
+buffer, LOD pyramid and session recorder, so a slow or disconnected port
+only ever stalls its own reader. RigOverview stacks those windows behind a
+grid of compact RigCards; double-click a card to drill down.
+
+Hidden rig windows keep ingesting but, through render.ViewRegistry, draw
+nothing until shown. Each card subscribes to its rig's registry, so a card
+repaints only when that rig's readings changed.
+"""
+
+import math
+
+import pyqtgraph as pg
+from PySide6.QtCore import QTimer, Qt
+from PySide6.QtWidgets import (
+    QFrame,
+    QGridLayout,
+    QHBoxLayout,
+    QLabel,
+    QMainWindow,
+    QPushButton,
+    QScrollArea,
+    QStackedWidget,
+    QVBoxLayout,
+    QWidget,
+)
+
+CARD_COLUMNS = 3
+SPARKLINE_POINTS = 300
+LINK_CHECK_INTERVAL_MS = 1000
+
+# (DATA field, format) shown on a card
+CARD_FIELDS = (
+    ("test_battery_voltage_V", "{:.3f} V"),
+    ("test_battery_current_A", "{:.2f} A"),
+    ("aux_battery_current_A", "{:.2f} A aux"),
+    ("battery_temp_C", "batt {:.1f} °C"),
+    ("heatsink_temp_C", "sink {:.1f} °C"),
+)
+
+
+class RigCard(QFrame):
+    def __init__(self, name, rig, on_open):
+        super().__init__()
+        self.name = name
+        self.rig = rig
+        self.on_open = on_open
+        self.setFrameShape(QFrame.Shape.StyledPanel)
+
+        layout = QVBoxLayout(self)
+
+        header = QHBoxLayout()
+        title = QLabel(name)
+        title.setStyleSheet("font-size: 16px; font-weight: bold;")
+        self.link_label = QLabel()
+        self.state_label = QLabel("--")
+        header.addWidget(title)
+        header.addStretch()
+        header.addWidget(self.state_label)
+        header.addWidget(self.link_label)
+        layout.addLayout(header)
+
+        values = QGridLayout()
+        self.value_labels = {}
+        for i, (field, _) in enumerate(CARD_FIELDS):
+            label = QLabel("--")
+            label.setStyleSheet("font-size: 15px;" if i else "font-size: 22px;")
+            self.value_labels[field] = label
+            values.addWidget(label, i // 2, i % 2)
+        layout.addLayout(values)
+
+        self.sparkline = pg.PlotWidget()
+        self.sparkline.setFixedHeight(70)
+        self.sparkline.hideAxis("left")
+        self.sparkline.hideAxis("bottom")
+        self.sparkline.setMouseEnabled(x=False, y=False)
+        self.sparkline.hideButtons()
+        self.spark_curve = self.sparkline.plot([], [], pen=pg.mkPen(width=1))
+        layout.addWidget(self.sparkline)
+
+        self.connected = None
+        self.check_link()
+
+        fields = tuple(field for field, _ in CARD_FIELDS)
+        rig.views.subscribe(self, fields + ("status", "alarms"), self.refresh)
+
+    def check_link(self):
+        reader = self.rig.reader
+        connected = reader is not None and reader.connected
+        if connected != self.connected:
+            self.connected = connected
+            self.link_label.setText("connected" if connected else "no link")
+            self.link_label.setStyleSheet("color: green;" if connected else "color: red;")
+            if not connected and reader is not None and reader.last_error:
+                self.link_label.setToolTip(reader.last_error)
+
+    def refresh(self):
+        rig = self.rig
+        for field, fmt in CARD_FIELDS:
+            value = rig.latest.get(field, math.nan)
+            self.value_labels[field].setText("--" if math.isnan(value) else fmt.format(value))
+        active = rig.alarms.active_rules()
+        if active:
+            self.state_label.setText(f"ALARM: {', '.join(rule.name for rule in active)}")
+            self.state_label.setStyleSheet("color: red; font-weight: bold;")
+        else:
+            self.state_label.setText(rig.device_state or "--")
+            self.state_label.setStyleSheet("")
+
+        if len(rig.store):
+            # Whole-test sparkline of the battery voltage from the pyramid
+            last = rig.store.last_time()
+            x, y = rig.lod.view(rig.store.channels[0], -math.inf, last, SPARKLINE_POINTS)
+            self.spark_curve.setData(x, y, skipFiniteCheck=True)
+
+    def mouseDoubleClickEvent(self, event):
+        self.on_open(self.name)
+
+
+class RigOverview(QMainWindow):
+    def __init__(self, rigs):
+        """rigs: [(name, MainWindow)], each already wired to its own reader."""
+        super().__init__()
+        self.setWindowTitle(f"ELB Display - {len(rigs)} rigs")
+        self.resize(1200, 800)
+
+        self.rigs = dict(rigs)
+        self.stack = QStackedWidget()
+        self.setCentralWidget(self.stack)
+
+        # ---- Page 0: card grid ----
+        grid_page = QWidget()
+        grid = QGridLayout(grid_page)
+        self.cards = {}
+        for i, (name, rig) in enumerate(rigs):
+            card = RigCard(name, rig, self.open_rig)
+            self.cards[name] = card
+            grid.addWidget(card, i // CARD_COLUMNS, i % CARD_COLUMNS)
+        grid.setRowStretch(len(rigs) // CARD_COLUMNS + 1, 1)
+
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        scroll.setWidget(grid_page)
+        self.stack.addWidget(scroll)
+
+        # ---- One drill-down page per rig ----
+        self.pages = {}
+        for name, rig in rigs:
+            page = QWidget()
+            layout = QVBoxLayout(page)
+            bar = QHBoxLayout()
+            back = QPushButton("< All rigs")
+            back.clicked.connect(self.show_overview)
+            title = QLabel(name)
+            title.setStyleSheet("font-size: 16px; font-weight: bold;")
+            bar.addWidget(back)
+            bar.addWidget(title)
+            bar.addStretch()
+            layout.addLayout(bar)
+
+            # Embed the rig's window as a plain widget
+            rig.setWindowFlags(Qt.WindowType.Widget)
+            layout.addWidget(rig, stretch=1)
+            rig.show()      # setWindowFlags() hides it; the stack decides visibility
+            self.pages[name] = page
+            self.stack.addWidget(page)
+
+        self.link_timer = QTimer(self)
+        self.link_timer.timeout.connect(self.check_links)
+        self.link_timer.start(LINK_CHECK_INTERVAL_MS)
+
+    def check_links(self):
+        for card in self.cards.values():
+            card.check_link()
+
+    def open_rig(self, name):
+        self.stack.setCurrentWidget(self.pages[name])
+
+    def show_overview(self):
+        self.stack.setCurrentIndex(0)
+
+    def closeEvent(self, event):
+        # Stops every rig's reader, recorder and export
+        for rig in self.rigs.values():
+            rig.close()
+        super().closeEvent(event)
@@ -0,0 +1,185 @@
+"""
+RP2040 UART line protocol (see the UART Communication Contract in README.md).
+"""
+
+import math
+import warnings
+
+import numpy as np
+
+# DATA,<test_v>,<test_i>,<aux_i>,<sink_t>,<batt_t>,<pot_v>
+#      [,<seq>,<t_us>[,<pre_driver_v>,<driver_v>,<power_v>]]
+DATA_FIELDS = (
+    "test_battery_voltage_V",
+    "test_battery_current_A",
+    "aux_battery_current_A",
+    "heatsink_temp_C",
+    "battery_temp_C",
+    "i_set_pot_V",
+    "seq",
+    "t_us",
+    "pre_driver_V",
+    "driver_V",
+    "power_stage_V",
+)
+DATA_VALUE_COUNT = 6
+
+# Shunt used by the RP2040 (30A / 75mV); the GUI shows the shunt voltage
+# implied by the reported test current.
+SHUNT_RESISTANCE = 0.0025
+
+# Line kinds returned by parse_line()
+KIND_DATA = "DATA"
+KIND_STATUS = "STATUS"
+KIND_ERROR = "ERROR"
+KIND_SYNC = "SYNC"
+KIND_ACK = "ACK"
+KIND_OTHER = "OTHER"
+
+# Stages of ACK,<id>,<stage>,<t_us>: parsed, in effect, not understood
+ACK_RECEIVED = "RX"
+ACK_DONE = "DONE"
+ACK_UNKNOWN = "UNKNOWN"
+
+
+def parse_data(line):
+    """
+    Returns a DATA_FIELDS tuple of floats, or None if the line is not a
+    valid DATA line. Trailing fields older firmware doesn't send are NaN.
+    """
+    parts = line.split(",")
+    if parts[0] != KIND_DATA or len(parts) < DATA_VALUE_COUNT + 1:
+        return None
+    try:
+        values = [float(p) for p in parts[1:len(DATA_FIELDS) + 1]]
+    except ValueError:
+        return None
+    while len(values) < len(DATA_FIELDS):
+        values.append(float("nan"))
+    return tuple(values)
+
+
+def parse_data_block(lines):
+    """
+    Bulk parse_data(): lines is a list of raw b"DATA,..." lines (no newline).
+    Returns (samples, bad): a (n, len(DATA_FIELDS)) float array of the valid
+    lines in order, and how many lines were rejected.
+
+    Lines are grouped by field count and each group is parsed by a single
+    np.fromstring() over the joined block, so the per-value work happens in C.
+    A group that doesn't parse cleanly falls back to parse_data() per line.
+    """
+    width = len(DATA_FIELDS)
+    if not lines:
+        return np.empty((0, width)), 0
+
+    prefix = len(KIND_DATA) + 1
+    bodies = [line[prefix:] for line in lines]
+
+    # Commas per line, counted over the joined bytes without a Python loop
+    joined = b"\n".join(bodies).replace(b"\r", b"")
+    raw = np.frombuffer(joined, dtype=np.uint8)
+    ends = np.append(np.flatnonzero(raw == ord("\n")), len(raw))
+    commas = np.diff(np.searchsorted(np.flatnonzero(raw == ord(",")), ends), prepend=0)
+
+    out = np.full((len(lines), width), np.nan)
+    ok = np.ones(len(lines), dtype=bool)
+    if commas.min() == commas.max():
+        groups = [(int(commas[0]) + 1, None)]
+    else:
+        groups = [(int(c) + 1, np.flatnonzero(commas == c)) for c in np.unique(commas)]
+
+    for fields, rows in groups:
+        where = slice(None) if rows is None else rows
+        if fields < DATA_VALUE_COUNT:
+            ok[where] = False
+            continue
+
+        # One C-level pass over the whole group
+        if rows is None:
+            block = joined.replace(b"\n", b",")
+        else:
+            block = b",".join(bodies[i] for i in rows.tolist()).replace(b"\r", b"")
+        count = len(lines) if rows is None else len(rows)
+        with warnings.catch_warnings():
+            # Older NumPy warns and returns what it parsed, newer raises
+            warnings.simplefilter("ignore", DeprecationWarning)
+            try:
+                values = np.fromstring(block, sep=",")
+            except ValueError:
+                values = None
+        if values is not None and values.size == count * fields:
+            out[where, :min(fields, width)] = values.reshape(count, fields)[:, :width]
+            continue
+
+        # Something in this group isn't a number: sort it out line by line
+        indices = range(len(lines)) if rows is None else rows.tolist()
+        for i in indices:
+            sample = parse_data(lines[i].decode("ascii", "ignore").strip())
+            if sample is None:
+                ok[i] = False
+            else:
+                out[i] = sample
+
+    bad = len(lines) - int(ok.sum())
+    return (out if not bad else out[ok]), bad
+
+
+def _int_field(value):
+    return "%d" % value if math.isfinite(value) else "nan"
+
+
+def format_data_lines(samples):
+    """
+    (n, len(DATA_FIELDS)) array -> b"DATA,...\n" lines, as parse_data_block()
+    reads them. seq and t_us are integers, or nan where missing (legacy rows,
+    filled gaps).
+    """
+    if not len(samples):
+        return b""
+    rows = samples.tolist()
+    return ("".join(
+        "DATA,%r,%r,%r,%r,%r,%r,%s,%s,%r,%r,%r\n"
+        % (*row[:6], _int_field(row[6]), _int_field(row[7]), *row[8:])
+        for row in rows
+    )).encode("ascii")
+
+
+def parse_status(line):
+    """
+    STATUS,<state>[,<i2c_hz>,<i2c_error_rate>] -> dict
+    """
+    parts = line.split(",")
+    status = {"state": parts[1] if len(parts) > 1 else ""}
+    if len(parts) >= 4:
+        try:
+            status["i2c_hz"] = int(parts[2])
+            status["i2c_error_rate"] = float(parts[3])
+        except ValueError:
+            pass
+    return status
+
+
+def format_command(cmd_id, command):
+    """A command the RP2040 acknowledges: CMD,<id>,<command>"""
+    return f"CMD,{cmd_id},{command}\n"
+
+
+def parse_ack(line):
+    """
+    ACK,<id>,<stage>,<t_us> -> (id, stage, t_us), or None if malformed
+    """
+    parts = line.split(",")
+    if len(parts) != 4 or parts[0] != KIND_ACK:
+        return None
+    try:
+        return int(parts[1]), parts[2], int(parts[3])
+    except ValueError:
+        return None
+
+
+def line_kind(line):
+    head = line.split(",", 1)[0]
+    if head in (KIND_DATA, KIND_STATUS, KIND_ERROR, KIND_SYNC, KIND_ACK):
+        return head
+    return KIND_OTHER
@@ -0,0 +1,302 @@
+"""
+Headless recorder: logs one or more rigs to session files without the GUI.
+
+    python recorder.py --port /dev/ttyACM0 [--port bench2=/dev/ttyACM1]
+                       [--record-dir sessions] [--stats 10] [--duration 3600]
+                       [--serve [HOST:]PORT] [--alarms rules.json]
+
+Uses the same ingest.SerialReader and session_store.SessionWriter as
+gui.py, so its sessions open with gui.py --open / --replay. It imports
+NumPy (and pyserial once a port opens) but never PySide6 or pyqtgraph, so
+it starts in a fraction of a second and runs fine on a headless box next
+to the rig. gui.py imports its shared pieces (rig setup, sample clock) from
+here, not the other way round.
+"""
+
+import argparse
+import signal
+import sys
+import threading
+import time
+
+import numpy as np
+
+import alarms
+import protocol
+from calibration import Calibration
+from fanout import FanoutServer, parse_address
+from ingest import SerialReader, open_serial
+from metrics import ROLLING_CHANNELS, DischargeMetrics
+from session_store import SessionWriter, new_session_path
+from usb_stream import USB_PREFIX, UsbStreamReader
+
+# On-disk session layout: plot time plus every DATA field as received
+SESSION_COLUMNS = ("time_minutes",) + protocol.DATA_FIELDS
+DEFAULT_SESSION_DIR = "sessions"
+
+DRAIN_INTERVAL_S = 0.2
+STATS_INTERVAL_S = 10.0
+
+F_TEST_V = protocol.DATA_FIELDS.index("test_battery_voltage_V")
+F_T_US = protocol.DATA_FIELDS.index("t_us")
+
+
+def rig_name_for_port(spec):
+    """'bench2=/dev/ttyACM1' -> ('bench2', '/dev/ttyACM1'); else the port's basename."""
+    if "=" in spec:
+        name, port = spec.split("=", 1)
+        return name, port
+    return spec.rstrip("/").rsplit("/", 1)[-1], spec
+
+
+def record_device_lines(writer, lines):
+    """
+    Keeps what a session needs from non-sample lines (Batch.other): RAW and
+    CAL lines go to raw.log in order, for calibration.recalibrate_session(),
+    and the latest CAL constants to meta.json.
+    """
+    raw = [line for line in lines if line.startswith(("RAW,", "CAL,"))]
+    if not raw:
+        return
+    writer.log_raw(raw)
+    for line in raw:
+        if line.startswith("CAL,"):
+            try:
+                cal = Calibration.from_cal_line(line)
+            except ValueError:
+                continue
+            writer.update_meta(calibration=cal.as_dict())
+
+
+def open_rig(spec, baud, record_dir=None, multi=False, serve=None):
+    """
+    Starts a SerialReader for one --port spec, a SessionWriter for it unless
+    record_dir is None, and a FanoutServer on serve=(host, port) unless
+    that is None. Returns (name, reader, writer, server). A port given as
+    usb:<port> is the RP2040's USB console, read as a binary frame stream.
+    """
+    name, port = rig_name_for_port(spec)
+    source = "serial"
+    if port.startswith(USB_PREFIX):
+        port = port[len(USB_PREFIX):]
+        name = name[len(USB_PREFIX):] if name.startswith(USB_PREFIX) else name
+        source = "usb"
+        reader = UsbStreamReader(lambda: open_serial(port, baud), name=name)
+    else:
+        reader = SerialReader(lambda: open_serial(port, baud), name=name)
+    server = None
+    if serve is not None:
+        server = FanoutServer(*serve)
+        reader.tap = server.publish
+        server.start()
+    writer = None
+    if record_dir is not None:
+        writer = SessionWriter(
+            new_session_path(record_dir, prefix=f"elb_{name}" if multi else "elb"),
+            SESSION_COLUMNS,
+            meta={"rig": name, "port": port, "baud": baud, "source": source},
+        )
+        writer.start()
+    reader.start()
+    return name, reader, writer, server
+
+
+def serve_addresses(serve, count):
+    """--serve [HOST:]PORT for count rigs -> one (host, port) each, PORT, PORT+1, ..."""
+    if serve is None:
+        return [None] * count
+    host, port = parse_address(serve)
+    return [(host, port + i) for i in range(count)]
+
+
+class SampleClock:
+    """
+    Maps DATA t_us stamps to minutes since the first sample. Prefers the
+    RP2040 sample clock; falls back to arrival time for firmware that
+    doesn't stamp DATA lines.
+    """
+
+    def __init__(self, device_t0_us=None):
+        self.device_t0_us = device_t0_us
+        self.host_t0 = None
+
+    def minutes(self, t_us):
+        stamped = ~np.isnan(t_us)
+        minutes = np.empty(len(t_us))
+
+        if stamped.any():
+            if self.device_t0_us is None:
+                self.device_t0_us = t_us[stamped][0]
+            minutes[stamped] = (t_us[stamped] - self.device_t0_us) / 60e6
+
+        if not stamped.all():
+            now = time.monotonic()
+            if self.host_t0 is None:
+                self.host_t0 = now
+            minutes[~stamped] = (now - self.host_t0) / 60.0
+
+        return minutes
+
+
+class RigRecorder:
+    """Drains one rig's reader into its session file."""
+
+    def __init__(self, name, reader, writer, server=None, alarm_rules=alarms.DEFAULT_RULES):
+        self.name = name
+        self.reader = reader
+        self.writer = writer
+        self.server = server
+        self.clock = SampleClock()
+        self.metrics = DischargeMetrics()
+        self.alarms = alarms.AlarmEngine(alarm_rules)
+        self.state = None
+        self.latest_v = float("nan")
+        self.samples = 0
+        self.dropped = 0
+
+        self._last_samples = 0
+        self._last_bytes = 0
+
+    def poll(self):
+        batch = self.reader.drain()
+        for status in batch.status:
+            self.state = status["state"]
+        for line in batch.errors:
+            print(f"[{self.name}] RP2040 {line}", file=sys.stderr)
+        if self.writer is not None:
+            record_device_lines(self.writer, batch.other)
+        self.dropped += batch.dropped
+
+        samples = batch.sample_array()
+        if not len(samples):
+            return 0
+        minutes = self.clock.minutes(samples[:, F_T_US])
+        self.metrics.extend(minutes * 60.0, {
+            name: samples[:, protocol.DATA_FIELDS.index(name)] for name in ROLLING_CHANNELS
+        })
+        if self.writer is not None:
+            self.writer.append(np.column_stack((minutes, samples)))
+            self.writer.update_meta(metrics=self.metrics.summary())
+        for event in self.alarms.evaluate(minutes * 60.0, samples):
+            event.update(time=time.time(), rig=self.name)
+            print(f"ALARM {alarms.format_event(event)}", file=sys.stderr, flush=True)
+            if self.writer is not None:
+                self.writer.log_event(event)
+        self.samples += len(samples)
+        self.latest_v = samples[-1, F_TEST_V]
+        return len(samples)
+
+    def stats_line(self, elapsed):
+        reader = self.reader
+        rate = (self.samples - self._last_samples) / elapsed if elapsed > 0 else 0.0
+        kbps = (reader.bytes_read - self._last_bytes) / elapsed / 1e3 if elapsed > 0 else 0.0
+        self._last_samples = self.samples
+        self._last_bytes = reader.bytes_read
+
+        link = "connected" if reader.connected else f"no link ({reader.last_error or 'opening'})"
+        text = (f"{self.name}: {link}, {self.state or '--'}, {self.samples} samples "
+                f"({rate:.1f}/s, {kbps:.1f} kB/s)")
+        if self.latest_v == self.latest_v:
+            text += f", {self.latest_v:.3f} V, {self.metrics.amp_hours:.3f} Ah"
+        if self.dropped:
+            text += f", {self.dropped} dropped"
+        active = self.alarms.active_rules()
+        if active:
+            text += f", ALARM {', '.join(rule.name for rule in active)}"
+        if self.writer is not None:
+            text += f", {self.writer.rows_written} rows on disk"
+            if self.writer.rows_dropped:
+                text += f" ({self.writer.rows_dropped} dropped, disk too slow)"
+            if self.writer.last_error:
+                text += f", WRITE ERROR {self.writer.last_error}"
+        if self.server is not None:
+            viewers = self.server.stats()
+            text += f", {len(viewers)} viewers"
+            slow = [v for v in viewers if v["decimation"] > 1 or v["dropped_bytes"]]
+            if slow:
+                text += f" ({len(slow)} behind)"
+        return text
+
+    def close(self):
+        if self.server is not None:
+            self.server.stop()
+        self.reader.stop()
+        self.reader.join(timeout=2.0)
+        self.poll()     # whatever arrived before the reader stopped
+        if self.writer is not None:
+            self.writer.close()
+
+
+def run(rigs, stats_interval=STATS_INTERVAL_S, duration=None, stop_event=None):
+    """Polls every RigRecorder until stop_event is set or duration runs out."""
+    stop_event = stop_event or threading.Event()
+    start = last_stats = time.monotonic()
+    try:
+        while not stop_event.wait(DRAIN_INTERVAL_S):
+            for rig in rigs:
+                rig.poll()
+            now = time.monotonic()
+            if stats_interval and now - last_stats >= stats_interval:
+                for rig in rigs:
+                    print(rig.stats_line(now - last_stats), flush=True)
+                last_stats = now
+            if duration is not None and now - start >= duration:
+                break
+    finally:
+        for rig in rigs:
+            rig.close()
+        for rig in rigs:
+            where = f" -> {rig.writer.path}" if rig.writer is not None else ""
+            print(f"{rig.name}: {rig.samples} samples{where}", flush=True)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="ELB headless recorder (no GUI)")
+    parser.add_argument("--port", action="append", required=True,
+                        help="RP2040 serial port (usb:PORT for the USB frame stream), "
+                             "optionally NAME=PORT; repeat for several rigs")
+    parser.add_argument("--baud", type=int, default=115200)
+    parser.add_argument("--record-dir", default=DEFAULT_SESSION_DIR,
+                        help="directory for recorded sessions (default: %(default)s)")
+    parser.add_argument("--no-record", action="store_true",
+                        help="only print throughput stats, don't write sessions")
+    parser.add_argument("--stats", type=float, default=STATS_INTERVAL_S, metavar="SECONDS",
+                        help="throughput stats interval, 0 to disable (default: %(default)s)")
+    parser.add_argument("--duration", type=float, metavar="SECONDS",
+                        help="stop after this long (default: until Ctrl-C / SIGTERM)")
+    parser.add_argument("--serve", metavar="[HOST:]PORT",
+                        help="stream each rig to viewers (gui.py --connect) on PORT, PORT+1, ... "
+                             "(host defaults to 127.0.0.1)")
+    parser.add_argument("--alarms", metavar="FILE",
+                        help="alarm rules as JSON (default: built-in temperature/voltage limits)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    record_dir = None if args.no_record else args.record_dir
+    alarm_rules = alarms.load_rules(args.alarms) if args.alarms else alarms.DEFAULT_RULES
+
+    rigs = []
+    serve = serve_addresses(args.serve, len(args.port))
+    for spec, address in zip(args.port, serve):
+        name, reader, writer, server = open_rig(
+            spec, args.baud, record_dir, multi=len(args.port) > 1, serve=address,
+        )
+        rigs.append(RigRecorder(name, reader, writer, server, alarm_rules))
+        if writer is not None:
+            print(f"{name}: recording to {writer.path}", flush=True)
+        if server is not None:
+            print(f"{name}: serving on {server.address[0]}:{server.address[1]}", flush=True)
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    try:
+        run(rigs, args.stats, args.duration, stop_event)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
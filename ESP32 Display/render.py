@@ -0,0 +1,66 @@
+"""
+Dirty-flag, visibility-aware rendering for the GUI tabs.
+
+Every widget that shows data registers a View: the channels it reads, the
+page (tab) it lives on and a render callback. Ingestion only bumps a version
+counter per channel (touch()); render() then repaints just the views whose
+page is visible and whose channels changed since their last paint. Hidden
+tabs cost nothing per tick and catch up once, when they are shown again.
+"""
+
+
+class View:
+    __slots__ = ("page", "channels", "callback", "seen", "again")
+
+    def __init__(self, page, channels, callback):
+        self.page = page
+        self.channels = tuple(channels)
+        self.callback = callback
+        self.seen = {}          # channel -> version at the last paint
+        self.again = False      # callback asked for another frame (animation)
+
+
+class ViewRegistry:
+    def __init__(self):
+        self.versions = {}
+        self.views = []
+
+    def subscribe(self, page, channels, callback):
+        """
+        callback() repaints the widget; returning True keeps the view dirty
+        for the next tick (e.g. a smoothed axis still converging).
+        """
+        view = View(page, channels, callback)
+        self.views.append(view)
+        return view
+
+    def touch(self, *channels):
+        versions = self.versions
+        for name in channels:
+            versions[name] = versions.get(name, 0) + 1
+
+    def is_dirty(self, view):
+        if view.again:
+            return True
+        versions = self.versions
+        seen = view.seen
+        for name in view.channels:
+            if seen.get(name, 0) != versions.get(name, 0):
+                return True
+        return False
+
+    def render(self):
+        """Repaints dirty views on visible pages; returns how many ran."""
+        rendered = 0
+        for view in self.views:
+            if not view.page.isVisible() or not self.is_dirty(view):
+                continue
+            view.seen = {name: self.versions.get(name, 0) for name in view.channels}
+            view.again = bool(view.callback())
+            rendered += 1
+        return rendered
+
+    def invalidate(self, view=None):
+        """Forces a repaint of one view (or all) on its next visible tick."""
+        for v in self.views if view is None else (view,):
+            v.seen = {}
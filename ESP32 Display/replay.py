@@ -0,0 +1,168 @@
+"""
+Replay of recorded tests through the live GUI pipeline.
+
+ReplaySource has the reader interface the GUI already drains (drain(),
+send(), stop(), connected, last_error): every drain() returns a Batch of
+DATA samples whose recorded time has come due, at 1x, Nx or as fast as the
+repaint loop takes them. Samples carry t_us = recorded time, so the plots
+show the original time axis.
+
+Sources: a session directory (session_store) or a CSV written by the
+export (time_minutes plus any of the exported channels).
+"""
+
+import os
+import time
+
+import numpy as np
+
+import protocol
+from ingest import Batch
+from session_store import Session
+
+SPEED_MAX = None            # as fast as possible
+MAX_ROWS_PER_DRAIN = 20_000
+
+F_T_US = protocol.DATA_FIELDS.index("t_us")
+F_SEQ = protocol.DATA_FIELDS.index("seq")
+
+
+class ReplaySource:
+    def __init__(self, t_minutes, samples, speed=1.0, name="replay", clock=time.monotonic):
+        """
+        t_minutes: (n,) recorded times. samples: (n, len(DATA_FIELDS)) in
+        protocol.DATA_FIELDS order (NaN where a field wasn't recorded).
+        """
+        self.name = name
+        self.clock = clock
+        self.t = np.asarray(t_minutes, dtype=np.float64)
+        self.samples = np.array(samples, dtype=np.float64).reshape(len(self.t), len(protocol.DATA_FIELDS))
+        self.samples[:, F_T_US] = self.t * 60e6
+        missing_seq = np.isnan(self.samples[:, F_SEQ])
+        self.samples[missing_seq, F_SEQ] = np.flatnonzero(missing_seq)
+
+        self.speed = speed
+        self.paused = False
+        self.index = 0          # next sample to emit
+
+        # Reader interface
+        self.connected = True
+        self.last_error = None
+
+        self._anchor_wall = self.clock()
+        self._anchor_t = self.t[0] if len(self.t) else 0.0
+
+    # -------- Loading --------
+    @classmethod
+    def from_session(cls, path, **kwargs):
+        session = Session(path)
+        columns = [
+            session.column(name) if name in session.columns else np.full(len(session), np.nan)
+            for name in protocol.DATA_FIELDS
+        ]
+        return cls(session.column("time_minutes"), np.column_stack(columns),
+                   name=os.path.basename(os.path.normpath(path)), **kwargs)
+
+    @classmethod
+    def from_csv(cls, path, **kwargs):
+        with open(path) as f:
+            header = f.readline().strip().split(",")
+        data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+        if "time_minutes" not in header:
+            raise ValueError(f"{path}: no time_minutes column")
+        col = {name: data[:, i] for i, name in enumerate(header)}
+
+        samples = np.full((len(data), len(protocol.DATA_FIELDS)), np.nan)
+        for i, name in enumerate(protocol.DATA_FIELDS):
+            if name in col:
+                samples[:, i] = col[name]
+        if "shunt_voltage_V" in col and "test_battery_current_A" not in col:
+            samples[:, protocol.DATA_FIELDS.index("test_battery_current_A")] = (
+                col["shunt_voltage_V"] / protocol.SHUNT_RESISTANCE
+            )
+        return cls(col["time_minutes"], samples, name=os.path.basename(path), **kwargs)
+
+    @classmethod
+    def open(cls, path, **kwargs):
+        if os.path.isdir(path):
+            return cls.from_session(path, **kwargs)
+        return cls.from_csv(path, **kwargs)
+
+    # -------- Transport --------
+    @property
+    def duration(self):
+        return self.t[-1] - self.t[0] if len(self.t) else 0.0
+
+    @property
+    def first_time(self):
+        return self.t[0] if len(self.t) else 0.0
+
+    @property
+    def finished(self):
+        return self.index >= len(self.t)
+
+    def position(self):
+        """Current replay time in recorded minutes."""
+        if self.paused:
+            return self._anchor_t
+        if self.speed is SPEED_MAX or self.finished:
+            return self.t[self.index - 1] if self.index else self.first_time
+        return self._anchor_t + (self.clock() - self._anchor_wall) * self.speed / 60.0
+
+    def _reanchor(self, t_minutes):
+        self._anchor_t = t_minutes
+        self._anchor_wall = self.clock()
+
+    def set_speed(self, speed):
+        self._reanchor(self.position())
+        self.speed = speed
+
+    def pause(self):
+        if not self.paused:
+            self._reanchor(self.position())
+            self.paused = True
+
+    def resume(self):
+        if self.paused:
+            self.paused = False
+            self._reanchor(self._anchor_t)
+
+    def seek(self, t_minutes):
+        """Jumps to recorded time t_minutes; history() is the data before it."""
+        t_minutes = min(max(t_minutes, self.first_time), self.first_time + self.duration)
+        self.index = int(np.searchsorted(self.t, t_minutes, side="right"))
+        self._reanchor(t_minutes)
+
+    def history(self):
+        """Samples before the current position, as a (n, fields) array."""
+        return self.samples[:self.index]
+
+    # -------- Reader interface --------
+    def start(self):
+        self._reanchor(self.position())
+
+    def drain(self):
+        batch = Batch()
+        if self.paused or self.finished:
+            return batch
+
+        if self.speed is SPEED_MAX:
+            hi = self.index + MAX_ROWS_PER_DRAIN
+        else:
+            hi = int(np.searchsorted(self.t, self.position(), side="right"))
+            if hi - self.index > MAX_ROWS_PER_DRAIN:
+                # Can't keep up at this speed: play what fits, don't burst later
+                hi = self.index + MAX_ROWS_PER_DRAIN
+                self._reanchor(self.t[hi - 1])
+        hi = min(hi, len(self.t))
+
+        if hi > self.index:
+            batch.blocks.append(self.samples[self.index:hi])
+            self.index = hi
+        return batch
+
+    def send(self, text):
+        return False    # no device on the other end
+
+    def stop(self):
+        self.pause()
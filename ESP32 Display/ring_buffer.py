@@ -0,0 +1,111 @@
+"""
+Preallocated NumPy time-series store: one shared time axis, many channels.
+"""
+
+import numpy as np
+
+from extrema import WindowExtrema
+
+
+class RingBuffer:
+    """
+    Circular buffer whose most recent samples are always one contiguous
+    slice, so plots can be handed views instead of fresh copies.
+
+    Storage is 2 * capacity long and every sample is written twice, at i
+    and i + capacity. The last n samples are then always
+    [head + capacity - n, head + capacity) with no wrap-around.
+    """
+
+    def __init__(self, capacity, channels, dtype=np.float64, track_extrema=False):
+        self.capacity = int(capacity)
+        self.channels = tuple(channels)
+        self.index = {name: i for i, name in enumerate(self.channels)}
+
+        # Per-channel running min/max over exactly the buffered window
+        self.extrema = None
+        if track_extrema:
+            self.extrema = {name: WindowExtrema(self.capacity) for name in self.channels}
+
+        self._t = np.zeros(2 * self.capacity, dtype=np.float64)
+        # Channel-major so each channel's window is a contiguous 1-D view
+        self._data = np.zeros((len(self.channels), 2 * self.capacity), dtype=dtype)
+
+        self._head = 0      # next write position in [0, capacity)
+        self.count = 0      # valid samples (<= capacity)
+        self.total = 0      # samples ever appended
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self._head = 0
+        self.count = 0
+        self.total = 0
+        if self.extrema:
+            for tracker in self.extrema.values():
+                tracker.clear()
+
+    # -------- Writes --------
+    def extend(self, t, values):
+        """
+        t: (n,) sample times. values: (n, len(channels)) in channel order.
+        Only the last `capacity` rows are kept if n is larger.
+        """
+        t = np.asarray(t, dtype=np.float64)
+        values = np.asarray(values)
+        n = len(t)
+        if n == 0:
+            return
+        if n > self.capacity:
+            t = t[-self.capacity:]
+            values = values[-self.capacity:]
+            self.total += n - self.capacity
+            n = self.capacity
+
+        pos = (self._head + np.arange(n)) % self.capacity
+        mirror = pos + self.capacity
+
+        self._t[pos] = t
+        self._t[mirror] = t
+        cols = values.T
+        self._data[:, pos] = cols
+        self._data[:, mirror] = cols
+
+        self._head = (self._head + n) % self.capacity
+        self.count = min(self.capacity, self.count + n)
+        self.total += n
+
+        if self.extrema:
+            for name, tracker in self.extrema.items():
+                tracker.extend(values[:, self.index[name]])
+
+    def append(self, t, values):
+        self.extend((t,), (values,))
+
+    # -------- Views (no copies) --------
+    def _window(self, n):
+        n = self.count if n is None else min(n, self.count)
+        end = self._head + self.capacity
+        return slice(end - n, end)
+
+    def time(self, n=None):
+        return self._t[self._window(n)]
+
+    def channel(self, name, n=None):
+        return self._data[self.index[name], self._window(n)]
+
+    def last(self, name):
+        if not self.count:
+            return None
+        return self._data[self.index[name], self._head + self.capacity - 1]
+
+    def last_time(self):
+        if not self.count:
+            return None
+        return self._t[self._head + self.capacity - 1]
+
+    def min_max(self, name):
+        """O(1) (min, max) of a channel's buffered window; needs track_extrema."""
+        tracker = self.extrema[name]
+        return tracker.min, tracker.max
@@ -0,0 +1,304 @@
+"""
+Crash-safe on-disk session store.
+
+A session is a directory holding one raw little-endian float64 file per
+column plus a meta.json. Rows are only ever appended, so after a crash
+every column is intact up to its last flushed row and the session length
+is simply the shortest column. Reopening maps the column files with
+numpy.memmap; nothing is parsed, however long the test was.
+
+    elb_20260101_120000/
+        meta.json
+        events.jsonl            (alarms and other events, one JSON per line)
+        raw.log                 (RAW and CAL lines in arrival order, while MODE,RAW is on)
+        time_minutes.f64
+        test_battery_voltage_V.f64
+        ...
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+COLUMN_DTYPE = np.dtype("<f8")
+COLUMN_SUFFIX = ".f64"
+META_FILE = "meta.json"
+EVENTS_FILE = "events.jsonl"
+RAW_FILE = "raw.log"
+FORMAT_VERSION = 1
+
+FSYNC_INTERVAL_S = 2.0
+MAX_QUEUED_CHUNKS = 10_000
+
+
+def _write_json_atomic(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def new_session_path(root, prefix="elb"):
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+    path = os.path.join(root, f"{prefix}_{stamp}")
+    n = 1
+    while os.path.exists(path):
+        path = os.path.join(root, f"{prefix}_{stamp}_{n}")
+        n += 1
+    return path
+
+
+class SessionWriter(threading.Thread):
+    """
+    Appends row chunks to a new session on a background thread.
+
+    append() only queues the chunk, so the caller (the GUI refresh tick)
+    never blocks on disk. The thread writes chunks as they arrive and
+    fsyncs every column at most every fsync_interval seconds. If the disk
+    falls MAX_QUEUED_CHUNKS behind, further chunks are dropped rather than
+    stalling the caller, and counted in rows_dropped / events_dropped /
+    raw_lines_dropped (also saved in meta.json).
+    """
+
+    def __init__(self, path, columns, meta=None, fsync_interval=FSYNC_INTERVAL_S):
+        super().__init__(name="session-writer", daemon=True)
+        self.path = path
+        self.columns = tuple(columns)
+        self.fsync_interval = fsync_interval
+
+        os.makedirs(path)
+        self.meta = {
+            "format": FORMAT_VERSION,
+            "columns": list(self.columns),
+            "dtype": COLUMN_DTYPE.str,
+            "start_time": time.time(),
+            "start_time_iso": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        }
+        self.meta.update(meta or {})
+        _write_json_atomic(os.path.join(path, META_FILE), self.meta)
+
+        self._files = [
+            open(os.path.join(path, name + COLUMN_SUFFIX), "ab") for name in self.columns
+        ]
+        self._events = None     # opened on the first event
+        self._raw = None        # opened on the first RAW/CAL line
+        self._queue = queue.Queue(MAX_QUEUED_CHUNKS)
+        self._meta_lock = threading.Lock()
+        self._meta_dirty = False
+        self._meta_dropped = (0, 0, 0)
+
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.events_dropped = 0
+        self.raw_lines_dropped = 0
+        self.last_error = None
+
+    # -------- Caller side --------
+    def append(self, rows):
+        """rows: (n, len(columns)) array in column order."""
+        rows = np.asarray(rows, dtype=COLUMN_DTYPE).reshape(-1, len(self.columns))
+        if len(rows):
+            # Column-major copy so the thread can write each column in one go
+            try:
+                self._queue.put_nowait(np.ascontiguousarray(rows.T))
+            except queue.Full:
+                self.rows_dropped += len(rows)
+
+    def log_event(self, event):
+        """Queues one JSON-serialisable dict for events.jsonl."""
+        try:
+            self._queue.put_nowait(dict(event))
+        except queue.Full:
+            self.events_dropped += 1
+
+    def log_raw(self, lines):
+        """Queues RAW/CAL lines (str, no newline) for raw.log, in order."""
+        if not lines:
+            return
+        try:
+            self._queue.put_nowait(tuple(lines))
+        except queue.Full:
+            self.raw_lines_dropped += len(lines)
+
+    def update_meta(self, **fields):
+        with self._meta_lock:
+            self.meta.update(fields)
+            self._meta_dirty = True
+
+    def close(self):
+        """Flushes everything queued so far and stops the thread."""
+        self._queue.put(None)
+        if self.is_alive():
+            self.join()
+
+    # -------- Thread --------
+    def run(self):
+        last_sync = time.monotonic()
+        pending_sync = False
+
+        while True:
+            try:
+                chunk = self._queue.get(timeout=self.fsync_interval)
+            except queue.Empty:
+                chunk = False
+
+            if chunk is None:
+                break
+            if isinstance(chunk, dict):
+                self._write_event(chunk)
+                pending_sync = True
+            elif isinstance(chunk, tuple):
+                self._write_raw(chunk)
+                pending_sync = True
+            elif chunk is not False:
+                self._write(chunk)
+                pending_sync = True
+
+            if time.monotonic() - last_sync >= self.fsync_interval:
+                if pending_sync:
+                    self._sync()
+                    pending_sync = False
+                self._sync_meta()
+                last_sync = time.monotonic()
+
+        self._sync()
+        self._sync_meta()
+        for f in self._files:
+            f.close()
+        for f in (self._events, self._raw):
+            if f is not None:
+                f.close()
+
+    def _write(self, cols):
+        try:
+            for f, col in zip(self._files, cols):
+                f.write(col.tobytes())
+            self.rows_written += cols.shape[1]
+        except OSError as exc:
+            self.last_error = str(exc)
+
+    def _write_event(self, event):
+        try:
+            if self._events is None:
+                self._events = open(os.path.join(self.path, EVENTS_FILE), "a")
+            self._events.write(json.dumps(event) + "\n")
+        except (OSError, TypeError, ValueError) as exc:
+            self.last_error = str(exc)
+
+    def _write_raw(self, lines):
+        try:
+            if self._raw is None:
+                self._raw = open(os.path.join(self.path, RAW_FILE), "a")
+            self._raw.write("\n".join(lines) + "\n")
+        except OSError as exc:
+            self.last_error = str(exc)
+
+    def _sync(self):
+        try:
+            files = self._files + [f for f in (self._events, self._raw) if f is not None]
+            for f in files:
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as exc:
+            self.last_error = str(exc)
+
+    def _sync_meta(self):
+        dropped = (self.rows_dropped, self.events_dropped, self.raw_lines_dropped)
+        with self._meta_lock:
+            if not self._meta_dirty and dropped == self._meta_dropped:
+                return
+            meta = dict(self.meta)
+            self._meta_dirty = False
+            self._meta_dropped = dropped
+        meta["rows_written"] = self.rows_written
+        if any(dropped):
+            meta["rows_dropped"], meta["events_dropped"], meta["raw_lines_dropped"] = dropped
+        try:
+            _write_json_atomic(os.path.join(self.path, META_FILE), meta)
+        except OSError as exc:
+            self.last_error = str(exc)
+
+
+class Session:
+    """Read-only view of a session directory; columns are memory-mapped."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.columns = tuple(self.meta["columns"])
+        self.dtype = np.dtype(self.meta.get("dtype", COLUMN_DTYPE.str))
+        self._maps = {}
+        self.count = 0
+        self.refresh()
+
+    def __len__(self):
+        return self.count
+
+    def refresh(self):
+        """Re-maps the columns; picks up rows appended by a live writer."""
+        sizes = []
+        for name in self.columns:
+            try:
+                sizes.append(os.path.getsize(self._file(name)))
+            except OSError:
+                sizes.append(0)
+        # A crash can leave columns of different length (or a torn last
+        # row); only rows present in every column count.
+        self.count = min(sizes, default=0) // self.dtype.itemsize
+        self._maps = {}
+        return self.count
+
+    def _file(self, name):
+        return os.path.join(self.path, name + COLUMN_SUFFIX)
+
+    def column(self, name):
+        if name not in self._maps:
+            if self.count:
+                data = np.memmap(self._file(name), dtype=self.dtype, mode="r", shape=(self.count,))
+            else:
+                data = np.empty(0, dtype=self.dtype)
+            self._maps[name] = data
+        return self._maps[name]
+
+    def columns_array(self, names=None):
+        names = self.columns if names is None else names
+        return np.column_stack([self.column(name) for name in names])
+
+    def events(self):
+        """Logged events in order; a torn last line after a crash is skipped."""
+        events = []
+        try:
+            with open(os.path.join(self.path, EVENTS_FILE)) as f:
+                for line in f:
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError:
+            pass
+        return events
+
+    @property
+    def raw_log_path(self):
+        """raw.log if RAW lines were recorded, else None."""
+        path = os.path.join(self.path, RAW_FILE)
+        return path if os.path.exists(path) else None
+
+
+def list_sessions(root):
+    """Session directories under root, oldest first."""
+    if not os.path.isdir(root):
+        return []
+    found = []
+    for entry in sorted(os.listdir(root)):
+        path = os.path.join(root, entry)
+        if os.path.isfile(os.path.join(path, META_FILE)):
+            found.append(path)
+    return found
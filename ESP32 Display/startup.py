@@ -0,0 +1,77 @@
+"""
+Startup profiling for gui.py --profile-startup.
+
+Imported first by gui.py. When enabled it times every new top-level import
+(including the ones deferred until a tab is built) and collects named
+milestones such as "first paint"; report() prints both, in milliseconds
+since gui.py started executing (interpreter startup is not included).
+"""
+
+import builtins
+import sys
+import time
+
+T0 = time.perf_counter()
+MIN_IMPORT_MS = 1.0     # shorter imports are left out of the report
+
+PROFILE = None          # the active StartupProfile, if enabled
+
+
+class StartupProfile:
+    def __init__(self, t0=T0):
+        self.t0 = t0
+        self.imports = []   # (start ms, duration ms, module)
+        self.marks = []     # (ms, label)
+        self.reported = False
+        self._depth = 0
+
+    def now_ms(self):
+        return (time.perf_counter() - self.t0) * 1e3
+
+    def install_import_timer(self):
+        original = builtins.__import__
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules or self._depth:
+                return original(name, globals, locals, fromlist, level)
+            start = time.perf_counter()
+            self._depth += 1
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                self._depth -= 1
+                ms = (time.perf_counter() - start) * 1e3
+                if ms >= MIN_IMPORT_MS:
+                    self.imports.append(((start - self.t0) * 1e3, ms, name))
+
+        builtins.__import__ = timed_import
+
+    def mark(self, label):
+        self.marks.append((self.now_ms(), label))
+
+    def report(self, file=None):
+        file = file or sys.stderr
+        self.reported = True
+        print("Startup profile (ms since gui.py started)", file=file)
+        print("  imports:", file=file)
+        for start, ms, name in sorted(self.imports, key=lambda i: -i[1]):
+            print(f"    {name:<28} {ms:8.1f}   (at {start:7.1f})", file=file)
+        print(f"    {'total':<28} {sum(i[1] for i in self.imports):8.1f}", file=file)
+        print("  milestones:", file=file)
+        for ms, label in self.marks:
+            print(f"    {ms:8.1f}  {label}", file=file)
+        file.flush()
+
+
+def enable():
+    """Starts profiling (idempotent); returns the StartupProfile."""
+    global PROFILE
+    if PROFILE is None:
+        PROFILE = StartupProfile()
+        PROFILE.install_import_timer()
+    return PROFILE
+
+
+def mark(label):
+    if PROFILE is not None:
+        PROFILE.mark(label)
@@ -0,0 +1,85 @@
+"""
+RAW re-conversion: per-START CAL lines, bad RAW lines and recorded sessions.
+
+    cd "ESP32 Display" && python -m pytest -q tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import calibration  # noqa: E402
+from recorder import record_device_lines  # noqa: E402
+from session_store import Session, SessionWriter  # noqa: E402
+
+BASE = calibration.KNOWN_CALIBRATIONS[1]
+
+
+def cal_line(shunt_zero):
+    constants = BASE.replace(shunt_zero=shunt_zero).as_dict()
+    return "CAL,1," + ",".join(repr(constants[name]) for name in calibration.CAL_FIELDS)
+
+
+def raw_line(seq, shunt_code=1000):
+    codes = [100] * (len(calibration.RAW_CHANNELS) - 1) + [shunt_code]
+    return f"RAW,{seq},{seq * 10},1," + ",".join(map(str, codes))
+
+
+# Two STARTs with their own shunt zero, a truncated RAW line in between
+LOG = (
+    [raw_line(0), cal_line(0.001)]
+    + [raw_line(seq) for seq in (1, 2, 3)]
+    + ["RAW,4,40,1,1,2", cal_line(0.002)]
+    + [raw_line(seq) for seq in (5, 6, 7)]
+)
+
+
+def expected_current(shunt_zero):
+    return calibration.shunt_current(np.array([1000]), BASE.replace(shunt_zero=shunt_zero))[0]
+
+
+def check(seq, values):
+    assert seq.tolist() == [0, 1, 2, 3, 5, 6, 7]
+    current = values["test_battery_current_A"]
+    # Samples before the first CAL line use the first one
+    assert np.allclose(current[:4], expected_current(0.001))
+    assert np.allclose(current[4:], expected_current(0.002))
+
+
+def test_parse_raw_lines_skips_bad_rows_and_keeps_cal_order():
+    seq, _, _, codes, cals, bad = calibration.parse_raw_lines(line + "\n" for line in LOG)
+    assert bad == 1
+    assert codes.shape == (7, len(calibration.RAW_CHANNELS))
+    assert [(row, cal.shunt_zero) for row, cal in cals] == [(1, 0.001), (4, 0.002)]
+
+
+def test_recalibrate_log_uses_each_starts_cal(tmp_path):
+    path = tmp_path / "run.log"
+    path.write_text("\n".join(LOG) + "\n")
+    seq, _, values = calibration.recalibrate_log(str(path))
+    check(seq, values)
+
+
+def test_recorded_session_can_be_recalibrated(tmp_path):
+    writer = SessionWriter(str(tmp_path / "s"), ("time_minutes",))
+    writer.start()
+    record_device_lines(writer, LOG[:5] + ["SET,1,2,3.0000", "PROFILE,DONE"])
+    record_device_lines(writer, LOG[5:])
+    writer.close()
+
+    session = Session(writer.path)
+    assert session.meta["calibration"]["shunt_zero"] == 0.002
+    seq, _, values = calibration.recalibrate_session(session)
+    check(seq, values)
+
+
+def test_session_without_raw_data(tmp_path):
+    writer = SessionWriter(str(tmp_path / "s"), ("time_minutes",))
+    writer.start()
+    writer.close()
+    with pytest.raises(ValueError):
+        calibration.recalibrate_session(Session(writer.path))
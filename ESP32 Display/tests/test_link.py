@@ -0,0 +1,147 @@
+"""
+End-to-end link test: mock.py's pty emulator -> an owning SerialReader
+with a FanoutServer (recorder.open_rig) -> one TCP viewer.
+
+    cd "ESP32 Display" && python -m pytest -q tests
+
+Needs pyserial (to open the pty) and a POSIX pty; no hardware.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("serial")
+if not hasattr(os, "openpty"):
+    pytest.skip("needs a POSIX pty", allow_module_level=True)
+
+import protocol  # noqa: E402
+from fanout import open_remote  # noqa: E402
+from ingest import SerialReader  # noqa: E402
+from mock import DischargeModel, Rp2040Emulator  # noqa: E402
+from recorder import open_rig  # noqa: E402
+from usb_stream import USB_PREFIX  # noqa: E402
+
+RATE_HZ = 2000
+RUN_S = 2.0
+TIMEOUT_S = 10.0
+F_SEQ = protocol.DATA_FIELDS.index("seq")
+
+
+@pytest.fixture
+def emulator():
+    emu = Rp2040Emulator(DischargeModel(), rate_hz=RATE_HZ, autostart=True, seed=1)
+    emu.open()
+    stop = threading.Event()
+    thread = threading.Thread(target=emu.run, args=(stop, 0), daemon=True)
+    thread.start()
+    yield emu
+    stop.set()
+    thread.join(timeout=2.0)
+
+
+def start_viewer(server):
+    address = "%s:%d" % server.address
+    viewer = SerialReader(lambda: open_remote(address), name="viewer",
+                          sync_interval=0, supports_commands=False)
+    viewer.start()
+    return viewer
+
+
+class Collector:
+    """Drains a reader, keeping every seq and ACK it delivered."""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.seq = []
+        self.acks = []
+
+    def poll(self):
+        batch = self.reader.drain()
+        samples = batch.sample_array()
+        if len(samples):
+            self.seq.append(samples[:, F_SEQ])
+        self.acks.extend(batch.acks)
+
+    def seq_array(self):
+        return np.concatenate(self.seq) if self.seq else np.empty(0)
+
+
+def run_until(collectors, done, timeout=TIMEOUT_S):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        for c in collectors:
+            c.poll()
+        if done():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def assert_contiguous(seq, min_samples):
+    assert len(seq) >= min_samples, f"only {len(seq)} samples"
+    gaps = np.flatnonzero(np.diff(seq) != 1)
+    assert not len(gaps), f"seq gaps at {seq[gaps][:5]} -> {seq[gaps + 1][:5]}"
+
+
+def close_rig(reader, server, *viewers):
+    for r in (reader,) + viewers:
+        r.stop()
+        r.join(timeout=2.0)
+    server.stop()
+
+
+def test_serial_owner_and_viewer(emulator):
+    _, owner, _, server = open_rig(emulator.path, 115200, serve=("127.0.0.1", 0))
+    viewer = start_viewer(server)
+    own, view = Collector(owner), Collector(viewer)
+    try:
+        assert run_until([own, view], lambda: owner.connected and viewer.connected)
+        time.sleep(0.2)     # let the viewer's connection be accepted
+
+        cmd_id = owner.send_command("STATUS")
+        assert cmd_id is not None
+        assert viewer.send_command("STATUS") is None
+
+        start = time.monotonic()
+        assert run_until([own, view], lambda: (
+            any(a[0] == cmd_id and a[1] == protocol.ACK_DONE for a in own.acks)
+            and time.monotonic() - start >= RUN_S
+        ))
+        stages = [stage for ack_id, stage, _ in own.acks if ack_id == cmd_id]
+        assert stages == [protocol.ACK_RECEIVED, protocol.ACK_DONE]
+        assert owner.commands.summary()["STATUS"]["done"]["n"] == 1
+        # The owner's ACKs are not forwarded to (or matched by) the viewer
+        assert view.acks == []
+
+        min_samples = int(RATE_HZ * RUN_S * 0.5)
+        assert_contiguous(own.seq_array(), min_samples)
+        assert_contiguous(view.seq_array(), min_samples)
+    finally:
+        close_rig(owner, server, viewer)
+
+
+def test_usb_stream_owner_and_viewer(emulator):
+    _, owner, _, server = open_rig(USB_PREFIX + emulator.path, 115200, serve=("127.0.0.1", 0))
+    viewer = start_viewer(server)
+    own, view = Collector(owner), Collector(viewer)
+    try:
+        assert not owner.supports_commands
+        assert owner.send_command("STATUS") is None
+
+        start = time.monotonic()
+        assert run_until([own, view], lambda: time.monotonic() - start >= RUN_S)
+        assert emulator.usb_stream
+
+        min_samples = int(RATE_HZ * RUN_S * 0.25)
+        assert_contiguous(own.seq_array(), min_samples)
+        assert_contiguous(view.seq_array(), min_samples)
+        assert owner.bad_frames == 0
+    finally:
+        close_rig(owner, server, viewer)
@@ -0,0 +1,164 @@
+"""
+Host side of the RP2040's USB CDC sample stream (RP2040 Code/usb_stream.py).
+
+    python gui.py --port usb:/dev/ttyACM0        # or recorder.py --port ...
+
+The RP2040's USB console streams every sample as a binary frame once it
+gets STREAM,USB[,<interval_ms>], while the UART feed to the display drops
+to its own slow rate. A frame is
+
+    A5 5A | type u8 | length u8 | seq u32 | t_us u64 | 9 x float32 | crc32 u32
+
+(little endian; CRC-32 over type, length and payload). The same console
+carries print() text, so parse_frames() resyncs on the magic and drops
+anything that isn't a whole frame with a good CRC. Runs of back-to-back
+frames, the normal case, are decoded with one NumPy view.
+"""
+
+import zlib
+
+import numpy as np
+
+import protocol
+from ingest import Batch, SerialReader
+
+USB_PREFIX = "usb:"
+MAGIC = b"\xa5\x5a"
+FRAME_SAMPLE = 1
+DEFAULT_INTERVAL_MS = 10
+
+FRAME_DTYPE = np.dtype([
+    ("magic", "<u2"),
+    ("type", "u1"),
+    ("length", "u1"),
+    ("seq", "<u4"),
+    ("t_us", "<u8"),
+    ("values", "<f4", (9,)),
+    ("crc", "<u4"),
+])
+FRAME_SIZE = FRAME_DTYPE.itemsize
+PAYLOAD_SIZE = FRAME_SIZE - 8
+MAGIC_U16 = int.from_bytes(MAGIC, "little")
+
+# DATA_FIELDS columns of the 9 frame values (seq and t_us come separately)
+VALUE_FIELDS = (0, 1, 2, 3, 4, 5, 8, 9, 10)
+F_SEQ = protocol.DATA_FIELDS.index("seq")
+F_T_US = protocol.DATA_FIELDS.index("t_us")
+
+
+def frames_to_samples(frames):
+    out = np.empty((len(frames), len(protocol.DATA_FIELDS)))
+    out[:, VALUE_FIELDS] = frames["values"]
+    out[:, F_SEQ] = frames["seq"]
+    out[:, F_T_US] = frames["t_us"]
+    return out
+
+
+def encode_frames(samples):
+    """(n, len(DATA_FIELDS)) array -> frame bytes, as the firmware sends them (mock.py)."""
+    frames = np.zeros(len(samples), dtype=FRAME_DTYPE)
+    frames["magic"] = MAGIC_U16
+    frames["type"] = FRAME_SAMPLE
+    frames["length"] = PAYLOAD_SIZE
+    frames["seq"] = samples[:, F_SEQ]
+    frames["t_us"] = samples[:, F_T_US]
+    frames["values"] = samples[:, VALUE_FIELDS]
+    view = memoryview(frames.view(np.uint8))
+    frames["crc"] = [zlib.crc32(view[i + 2:i + FRAME_SIZE - 4])
+                     for i in range(0, len(view), FRAME_SIZE)]
+    return frames.tobytes()
+
+
+def parse_frames(data):
+    """
+    Decodes every whole frame in data. Returns (samples, tail, bad, skipped):
+    a (n, len(DATA_FIELDS)) array, the bytes to carry into the next read,
+    frames dropped for a bad CRC and non-frame bytes skipped.
+    """
+    parts = []
+    bad = skipped = 0
+    pos = 0
+    n = len(data)
+    while True:
+        start = data.find(MAGIC, pos)
+        if start < 0:
+            # Keep a trailing A5 in case its 5A is in the next read
+            keep = n - 1 if n > pos and data[-1] == MAGIC[0] else n
+            skipped += keep - pos
+            pos = keep
+            break
+        skipped += start - pos
+        count = (n - start) // FRAME_SIZE
+        if not count:
+            pos = start
+            break
+
+        frames = np.frombuffer(data, dtype=FRAME_DTYPE, count=count, offset=start)
+        ok = ((frames["magic"] == MAGIC_U16) & (frames["type"] == FRAME_SAMPLE)
+              & (frames["length"] == PAYLOAD_SIZE))
+        run = count if ok.all() else int(np.argmin(ok))
+        if not run:
+            # A5 5A inside text or a torn frame: look past it
+            skipped += 1
+            pos = start + 1
+            continue
+
+        view = memoryview(data)
+        end = start + run * FRAME_SIZE
+        crcs = [zlib.crc32(view[i + 2:i + FRAME_SIZE - 4]) for i in range(start, end, FRAME_SIZE)]
+        good = frames["crc"][:run] == np.array(crcs, dtype=np.uint32)
+        if not good.all():
+            # Keep what came before; a lost byte shifts everything after
+            # it, so rescan from just past the bad frame's magic
+            first_bad = int(np.argmin(good))
+            parts.append(frames[:first_bad])
+            bad += 1
+            pos = start + first_bad * FRAME_SIZE + 1
+            continue
+        parts.append(frames[:run])
+        pos = end
+
+    samples = frames_to_samples(np.concatenate(parts)) if parts else np.empty((0, len(protocol.DATA_FIELDS)))
+    return samples, data[pos:], bad, skipped
+
+
+def stream_command(interval_ms=DEFAULT_INTERVAL_MS):
+    return f"STREAM,USB,{int(interval_ms)}\n"
+
+
+class UsbStreamReader(SerialReader):
+    """
+    SerialReader for the USB console: asks for the stream on every connect
+    and decodes frames instead of lines. Replies to commands (SYNC, ACK)
+    go out on the UART, so there is no clock sync or send_command() here;
+    samples carry the RP2040's t_us.
+    """
+
+    def __init__(self, open_port, name="rp2040-usb", interval_ms=DEFAULT_INTERVAL_MS):
+        super().__init__(open_port, name=name, sync_interval=0, supports_commands=False)
+        self.interval_ms = interval_ms
+        self.bad_frames = 0
+        self.skipped_bytes = 0
+
+    def _connect(self):
+        if not super()._connect():
+            return False
+        self.send(stream_command(self.interval_ms))
+        return True
+
+    def _consume(self, data, recv_time):
+        samples, carry, bad, skipped = parse_frames(data)
+        self.bad_frames += bad
+        self.skipped_bytes += skipped
+        if not len(samples):
+            return carry
+
+        batch = Batch()
+        batch.blocks.append(samples)
+        if self.tap is not None:
+            # Viewers (fanout) speak the line protocol
+            self.tap(protocol.format_data_lines(samples))
+        self.lines_read += len(samples)
+        self.samples_read += len(samples)
+        self._publish(batch)
+        return carry
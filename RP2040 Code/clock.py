@@ -0,0 +1,30 @@
+import time
+
+
+# ============================================================
+# MONOTONIC MICROSECOND CLOCK
+# ============================================================
+class MonotonicClock:
+    """
+    Unwraps time.ticks_us() into a non-wrapping microsecond count since boot.
+    ticks_us wraps every 2**30 us (~17.9 min) on the RP2040, so now_us()
+    has to be called at least every ~8 min; the main loop does so every pass.
+    """
+
+    def __init__(self):
+        self._last_ticks = time.ticks_us()
+        self._us = 0
+
+    def now_us(self):
+        ticks = time.ticks_us()
+        self._us += time.ticks_diff(ticks, self._last_ticks)
+        self._last_ticks = ticks
+        return self._us
+
+    def from_ticks(self, ticks):
+        """
+        Converts a recent raw ticks_us stamp (e.g. taken in a timer
+        callback) onto the monotonic time base.
+        """
+        now = self.now_us()
+        return now + time.ticks_diff(ticks, self._last_ticks)
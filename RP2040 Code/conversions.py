@@ -0,0 +1,47 @@
+import math
+
+# ============================================================
+# PURE-PYTHON HOT PATHS
+# Reference versions of the per-sample bit twiddling and conversion
+# math. conversions_native.py has @native/@viper variants with the same
+# signatures; fastpath.py benchmarks both at boot and picks the faster.
+# ============================================================
+
+def decode_ads(buf):
+    """
+    Big-endian ADS1115 conversion register -> signed 16-bit code.
+    """
+    raw = int.from_bytes(buf, "big")
+    if raw & 0x8000:
+        raw -= 65536
+    return raw
+
+
+def pack_u16(buf, value):
+    """
+    Writes a 16-bit register value big-endian into a 2-byte buffer.
+    """
+    buf[0] = (value >> 8) & 0xFF
+    buf[1] = value & 0xFF
+
+
+def pack_dac(buf, code):
+    """
+    MCP4725 fast-write format into a 2-byte buffer:
+    byte0 = [C2 C1 PD1 PD0 D11 D10 D9 D8], byte1 = [D7..D0]
+    """
+    buf[0] = (code >> 8) & 0x0F
+    buf[1] = code & 0xFF
+
+
+def thermistor_temp(v_adc, v_supply, r_fixed, r0, t0, beta):
+    if v_adc <= 0 or v_adc >= v_supply:
+        return None
+
+    r = r_fixed * (v_supply - v_adc) / v_adc
+    if r <= 0:
+        return None
+
+    ln = math.log(r / r0)
+    temp_k = 1 / ((1/t0) + (ln / beta))
+    return temp_k - 273.15
@@ -0,0 +1,66 @@
+import math
+import micropython
+
+# ============================================================
+# NATIVE / VIPER HOT PATHS
+# Same signatures as conversions.py. Kept in a separate module so a
+# firmware built without the native emitters only fails this import
+# (fastpath.py then falls back to the pure versions).
+# ============================================================
+
+@micropython.viper
+def decode_ads_viper(buf) -> int:
+    p = ptr8(buf)
+    raw = (p[0] << 8) | p[1]
+    if raw & 0x8000:
+        raw -= 65536
+    return raw
+
+
+@micropython.native
+def decode_ads_native(buf):
+    raw = (buf[0] << 8) | buf[1]
+    if raw & 0x8000:
+        raw -= 65536
+    return raw
+
+
+@micropython.viper
+def pack_u16_viper(buf, value: int):
+    p = ptr8(buf)
+    p[0] = (value >> 8) & 0xFF
+    p[1] = value & 0xFF
+
+
+@micropython.native
+def pack_u16_native(buf, value):
+    buf[0] = (value >> 8) & 0xFF
+    buf[1] = value & 0xFF
+
+
+@micropython.viper
+def pack_dac_viper(buf, code: int):
+    p = ptr8(buf)
+    p[0] = (code >> 8) & 0x0F
+    p[1] = code & 0xFF
+
+
+@micropython.native
+def pack_dac_native(buf, code):
+    buf[0] = (code >> 8) & 0x0F
+    buf[1] = code & 0xFF
+
+
+# Float math gains nothing from viper (floats stay boxed), so native only.
+@micropython.native
+def thermistor_temp_native(v_adc, v_supply, r_fixed, r0, t0, beta):
+    if v_adc <= 0 or v_adc >= v_supply:
+        return None
+
+    r = r_fixed * (v_supply - v_adc) / v_adc
+    if r <= 0:
+        return None
+
+    ln = math.log(r / r0)
+    temp_k = 1 / ((1/t0) + (ln / beta))
+    return temp_k - 273.15
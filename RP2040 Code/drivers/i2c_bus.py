@@ -0,0 +1,153 @@
+import time
+
+# ============================================================
+# BUS CLOCK LADDER (fastest first)
+# ============================================================
+I2C_FREQ_STEPS = (400_000, 200_000, 100_000, 50_000, 25_000)
+
+PROBE_ROUNDS       = 20     # clean transactions per device to accept a clock
+ERROR_PAIR_OPS     = 50     # two errors this close together -> step down
+STEP_UP_AFTER_OPS  = 5_000  # clean transactions before trying a faster clock
+STEP_UP_MAX_OPS    = 320_000
+PROBATION_OPS      = 200    # an error this soon after stepping up -> back off
+ERROR_EMA_ALPHA    = 1 / 512
+
+
+class AdaptiveI2C:
+    """
+    Wraps machine.I2C and picks the bus clock at runtime.
+
+    probe() finds the fastest clock where every device answers cleanly.
+    Each transaction is counted; an error shortly after another one (or
+    right after a step up) drops to the next slower clock, and a long
+    clean run tries the next faster one again. OSError is still raised to
+    the caller so it can retry the transaction.
+    """
+
+    def __init__(self, make_bus, freqs=I2C_FREQ_STEPS, start_freq=None):
+        # make_bus(freq) -> machine.I2C
+        self._make_bus = make_bus
+        self.freqs = freqs
+        self.level = len(freqs) - 1 if start_freq is None else freqs.index(start_freq)
+        self.max_level = self.level  # fastest level allowed, raised by probe()
+
+        self.ops = 0
+        self.errors = 0
+        self.error_rate = 0.0       # EMA of failed transactions
+        self.changed = False        # set on every clock change, cleared by caller
+
+        self._ops_since_error = STEP_UP_AFTER_OPS
+        self._ops_at_level = 0
+        self._step_up_after = STEP_UP_AFTER_OPS
+        self._on_probation = False
+
+        self.bus = self._make_bus(self.freq)
+
+    @property
+    def freq(self):
+        return self.freqs[self.level]
+
+    # -------- Clock selection --------
+    def _set_level(self, level):
+        self.level = level
+        self.bus = self._make_bus(self.freq)
+        self._ops_at_level = 0
+        self.changed = True
+
+    def probe(self, addrs):
+        """
+        Tries each clock from fastest to slowest and keeps the first one
+        where every address in addrs is found and answers PROBE_ROUNDS
+        reads without error. Returns the chosen frequency.
+        """
+        for level in range(len(self.freqs)):
+            self._set_level(level)
+            if self._probe_level(addrs):
+                self.max_level = level
+                print("I2C probe -> using {} Hz".format(self.freq))
+                return self.freq
+            print("I2C probe -> {} Hz unreliable".format(self.freq))
+            time.sleep_ms(5)
+
+        self.max_level = len(self.freqs) - 1
+        self._set_level(self.max_level)
+        return self.freq
+
+    def _probe_level(self, addrs):
+        try:
+            found = self.bus.scan()
+            if any(addr not in found for addr in addrs):
+                return False
+            for _ in range(PROBE_ROUNDS):
+                for addr in addrs:
+                    self.bus.readfrom(addr, 2)
+        except OSError:
+            return False
+        return True
+
+    def recover(self):
+        """Re-creates the bus at the current clock and returns a scan."""
+        self.bus = self._make_bus(self.freq)
+        return self.bus.scan()
+
+    # -------- Error tracking --------
+    def _record_ok(self):
+        self.ops += 1
+        self.error_rate -= ERROR_EMA_ALPHA * self.error_rate
+        self._ops_since_error += 1
+        self._ops_at_level += 1
+
+        if self._on_probation and self._ops_at_level >= PROBATION_OPS:
+            self._on_probation = False
+
+        if (
+            self.level > self.max_level
+            and self._ops_since_error >= self._step_up_after
+        ):
+            self._set_level(self.level - 1)
+            self._on_probation = True
+            # Each faster level has to earn its own clean run
+            self._ops_since_error = 0
+
+    def _record_error(self):
+        self.ops += 1
+        self.errors += 1
+        self.error_rate += ERROR_EMA_ALPHA * (1.0 - self.error_rate)
+
+        step_down = self._on_probation or self._ops_since_error < ERROR_PAIR_OPS
+        if self._on_probation:
+            # The faster clock didn't hold; wait longer before the next try
+            self._step_up_after = min(self._step_up_after * 2, STEP_UP_MAX_OPS)
+            self._on_probation = False
+
+        self._ops_since_error = 0
+        if step_down and self.level < len(self.freqs) - 1:
+            self._set_level(self.level + 1)
+
+    def _call(self, method, *args):
+        try:
+            result = method(*args)
+        except OSError:
+            self._record_error()
+            raise
+        self._record_ok()
+        return result
+
+    # -------- machine.I2C interface --------
+    def scan(self):
+        return self.bus.scan()
+
+    def writeto(self, addr, buf):
+        return self._call(self.bus.writeto, addr, buf)
+
+    def readfrom(self, addr, nbytes):
+        return self._call(self.bus.readfrom, addr, nbytes)
+
+    def writeto_mem(self, addr, memaddr, buf):
+        return self._call(self.bus.writeto_mem, addr, memaddr, buf)
+
+    def readfrom_mem(self, addr, memaddr, nbytes):
+        return self._call(self.bus.readfrom_mem, addr, memaddr, nbytes)
+
+    def readfrom_mem_into(self, addr, memaddr, buf):
+        return self._call(self.bus.readfrom_mem_into, addr, memaddr, buf)
@@ -0,0 +1,87 @@
+import time
+
+import conversions
+
+try:
+    import conversions_native
+except (ImportError, SyntaxError, ValueError) as exc:
+    # Firmware without native emitters (or .mpy built for another arch)
+    print("fastpath -> native variants unavailable:", exc)
+    conversions_native = None
+
+# ============================================================
+# BENCHMARK SETTINGS
+# ============================================================
+BENCH_CALLS = 2000
+BUFFER_SENTINELS = (0xAA, 0x55)     # pre-fill of pack buffers for the correctness check
+
+# name -> (variant suffixes in conversions_native, sample args)
+HOT_PATHS = {
+    "decode_ads": (("native", "viper"), (b"\xff\x38",)),
+    "pack_u16": (("native", "viper"), (bytearray(2), 0xC383)),
+    "pack_dac": (("native", "viper"), (bytearray(2), 0x0ABC)),
+    "thermistor_temp": (("native",), (2.1, 4.9, 4990.0, 12000, 298.15, 3950.0)),
+}
+
+
+def _time_us(fn, args, calls):
+    start = time.ticks_us()
+    for _ in range(calls):
+        fn(*args)
+    return time.ticks_diff(time.ticks_us(), start)
+
+
+def _results(fn, args):
+    """
+    What fn computes for args, once per sentinel fill. Pack functions
+    return nothing and fill args[0], so each call gets its own buffer
+    pre-filled with a sentinel; a variant that skips bytes then can't
+    inherit the reference's output.
+    """
+    if not isinstance(args[0], bytearray):
+        return [fn(*args)]
+    out = []
+    for fill in BUFFER_SENTINELS:
+        buf = bytearray(len(args[0]))
+        for i in range(len(buf)):
+            buf[i] = fill
+        ret = fn(buf, *args[1:])
+        out.append(bytes(buf) if ret is None else ret)
+    return out
+
+
+def choose(calls=BENCH_CALLS, verbose=True):
+    """
+    Times every variant of each hot path and returns
+    {name: (function, variant_name)} with the fastest variant that
+    produces the same result as the pure-Python reference.
+    """
+    chosen = {}
+
+    for name, (suffixes, args) in HOT_PATHS.items():
+        reference = getattr(conversions, name)
+        expected = _results(reference, args)
+
+        best_fn = reference
+        best_variant = "python"
+        best_us = _time_us(reference, args, calls)
+        timings = ["python={}us".format(best_us)]
+
+        for suffix in suffixes:
+            fn = getattr(conversions_native, name + "_" + suffix, None) if conversions_native else None
+            if fn is None:
+                continue
+            if _results(fn, args) != expected:
+                timings.append("{}=mismatch".format(suffix))
+                continue
+
+            elapsed = _time_us(fn, args, calls)
+            timings.append("{}={}us".format(suffix, elapsed))
+            if elapsed < best_us:
+                best_fn, best_variant, best_us = fn, suffix, elapsed
+
+        chosen[name] = (best_fn, best_variant)
+        if verbose:
+            print("fastpath {} x{} -> {} ({})".format(name, calls, best_variant, ", ".join(timings)))
+
+    return chosen
@@ -2,19 +2,57 @@ from machine import I2C, Pin
 from machine import UART
 import time
 import math
+from array import array
+
+import fastpath
+import profiles
+import usb_stream
+from clock import MonotonicClock
+from drivers.i2c_bus import AdaptiveI2C
 
 # ============================================================
 # UART SETUP
 # ============================================================
 uart = UART(0, baudrate=115200, tx=Pin(0), rx=Pin(1))
 start_led = Pin("LED", Pin.OUT)
+clock = MonotonicClock()
 LIVE_VALUE_SAMPLE_INTERVAL_S = 30
 
+# Binary sample frames on the USB console (STREAM,USB[,<ms>]); while on,
+# the loop samples at the USB interval and the UART keeps getting DATA
+# lines only every LIVE_VALUE_SAMPLE_INTERVAL_S.
+usb = usb_stream.UsbStream()
+
 # ============================================================
 # I2C SETUP
 # ============================================================
-I2C_FREQ = 25_000
-i2c = I2C(0, sda=Pin(4), scl=Pin(5), freq=I2C_FREQ)
+# Bus clock is chosen at startup (probe, up to 400 kHz) and adapted at
+# runtime by AdaptiveI2C; it starts at the slowest step (25 kHz).
+I2C_READ_ATTEMPTS = 2
+
+
+def make_i2c(freq):
+    return I2C(0, sda=Pin(4), scl=Pin(5), freq=freq)
+
+
+i2c = AdaptiveI2C(make_i2c)
+
+# ============================================================
+# FAST PATH SELECTION
+# Benchmarks the pure-Python, @native and @viper variants of the hot
+# conversion helpers (conversions.py / conversions_native.py) and binds
+# the fastest correct one.
+# ============================================================
+FASTPATH = fastpath.choose()
+decode_ads       = FASTPATH["decode_ads"][0]
+pack_u16         = FASTPATH["pack_u16"][0]
+pack_dac         = FASTPATH["pack_dac"][0]
+_thermistor_temp = FASTPATH["thermistor_temp"][0]
+
+# Preallocated I2C buffers (no per-read allocation)
+_ads_config_buf = bytearray(2)
+_ads_conv_buf   = bytearray(2)
+_dac_buf        = bytearray(2)
 
 # ============================================================
 # ADS1115 CONFIG
@@ -39,7 +77,6 @@ COMP_DISABLE = 0x0003
 # ±0.256V range
 PGA_0_256 = 0x0A00
 
-BASE_CONFIG = PGA_6_144 | MODE_SINGLE | DR_128SPS | COMP_DISABLE
 ADC_LSB = 6.144 / 32768  # volts per bit
 
 # ============================================================
@@ -124,6 +161,30 @@ TEST_BATTERY_DIVIDER_RATIO = 11.0
 TEST_BATTERY_VOLTAGE_CAL = 12.1 / 11.8
 TEST_BATTERY_CURRENT_CAL = 8.4 / 11.6
 
+# ============================================================
+# AUX CURRENT OFFSET
+# ============================================================
+AUX_I_OFFSET = 0.05  # amps, subtracted after the hall conversion
+
+# ============================================================
+# CALIBRATION VERSION
+# Bump whenever any conversion constant above changes. RAW lines carry
+# it so host-side logs can be re-converted with the right constants
+# (see ESP32 Display/calibration.py).
+# ============================================================
+CAL_VERSION = 1
+
+# ============================================================
+# RAW TELEMETRY
+# Slot order of the codes in a RAW line: the 12 single-ended channels
+# (0x48 AIN0-3, 0x49 AIN0-3, 0x4A AIN0-3) at ±6.144V, then the shunt
+# read of 0x48 AIN0 at ±0.256V.
+# ============================================================
+RAW_ADC_ORDER = (ADC_48, ADC_49, ADC_4A)
+RAW_SHUNT_SLOT = 12
+frame_codes = array("h", [0] * 13)
+telemetry_raw = False
+
 # ============================================================
 # SHUNT CURRENT FUNCTION (30A / 75mV)
 # ============================================================
@@ -169,54 +230,74 @@ def blink_start_led():
 
 
 def reset_i2c():
-    global i2c
-    i2c = I2C(0, sda=Pin(4), scl=Pin(5), freq=I2C_FREQ)
-    return i2c.scan()
+    return i2c.recover()
 
 # ============================================================
 # ADS READ FUNCTION
 # ============================================================
-def read_ads(addr, channel):
-    config = 0x8000 | MUX[channel] | BASE_CONFIG
-    try:
-        i2c.writeto_mem(addr, REG_CONFIG, config.to_bytes(2, "big"))
-    except OSError as exc:
-        raise RuntimeError(
-            "I2C write failed for device 0x{:02X} channel {}: {}".format(addr, channel, exc)
-        ) from exc
-    time.sleep_ms(8)
+def read_ads_raw(addr, channel, pga=PGA_6_144):
+    """
+    Single-shot conversion, returns the signed 16-bit code.
+    A failed transaction is retried once (AdaptiveI2C has already
+    stepped the bus down if errors are clustering).
+    """
+    config = 0x8000 | MUX[channel] | pga | MODE_SINGLE | DR_128SPS | COMP_DISABLE
 
-    try:
-        data = i2c.readfrom_mem(addr, REG_CONVERSION, 2)
-    except OSError as exc:
-        raise RuntimeError(
-            "I2C read failed for device 0x{:02X} channel {}: {}".format(addr, channel, exc)
-        ) from exc
-    raw = int.from_bytes(data, "big")
+    for attempt in range(1, I2C_READ_ATTEMPTS + 1):
+        pack_u16(_ads_config_buf, config)
+        try:
+            i2c.writeto_mem(addr, REG_CONFIG, _ads_config_buf)
+        except OSError as exc:
+            if attempt < I2C_READ_ATTEMPTS:
+                continue
+            raise RuntimeError(
+                "I2C write failed for device 0x{:02X} channel {}: {}".format(addr, channel, exc)
+            ) from exc
+        time.sleep_ms(8)
+
+        try:
+            i2c.readfrom_mem_into(addr, REG_CONVERSION, _ads_conv_buf)
+            break
+        except OSError as exc:
+            if attempt < I2C_READ_ATTEMPTS:
+                continue
+            raise RuntimeError(
+                "I2C read failed for device 0x{:02X} channel {}: {}".format(addr, channel, exc)
+            ) from exc
+
+    return decode_ads(_ads_conv_buf)
 
-    if raw & 0x8000:
-        raw -= 65536
 
+def read_ads(addr, channel):
+    raw = read_ads_raw(addr, channel)
+    frame_codes[RAW_ADC_ORDER.index(addr) * 4 + channel] = raw
     return raw * ADC_LSB
 
 # ============================================================
 # MCP4725 WRITE FUNCTION
 # ============================================================
+def dac_code_for_voltage(voltage):
+    """
+    Converts a DAC output voltage to a 12-bit code (clamped to range).
+    """
+    clamped_voltage = min(max(voltage, 0.0), DAC_VREF)
+    return int(round((clamped_voltage / DAC_VREF) * 4095))
+
+
+def dac_voltage_for_code(code):
+    return code * DAC_VREF / 4095
+
 def write_dac_voltage(voltage):
     """
     Writes a voltage (in volts) to MCP4725.
     Automatically clamps to DAC range.
     """
     clamped_voltage = min(max(voltage, 0.0), DAC_VREF)
+    dac_value = dac_code_for_voltage(clamped_voltage)
 
-    # Convert voltage to 12-bit value
-    dac_value = int(round((clamped_voltage / DAC_VREF) * 4095))
-
-    # MCP4725 fast-write format:
-    # byte0 = [C2 C1 PD1 PD0 D11 D10 D9 D8], byte1 = [D7..D0]
-    buffer = bytearray(2)
-    buffer[0] = (dac_value >> 8) & 0x0F
-    buffer[1] = dac_value & 0xFF
+    # MCP4725 fast-write format (see conversions.pack_dac)
+    buffer = _dac_buf
+    pack_dac(buffer, dac_value)
 
     last_error = None
     for attempt in range(1, DAC_WRITE_RETRIES + 1):
@@ -281,16 +362,7 @@ def scan_i2c_or_die():
 # THERMISTOR FUNCTION
 # ============================================================
 def thermistor_temp(v_adc, V_SUPPLY):
-    if v_adc <= 0 or v_adc >= V_SUPPLY:
-        return None
-
-    r = R_FIXED * (V_SUPPLY - v_adc) / v_adc
-    if r <= 0:
-        return None
-
-    ln = math.log(r / R0)
-    temp_k = 1 / ((1/T0) + (ln / BETA))
-    return temp_k - 273.15
+    return _thermistor_temp(v_adc, V_SUPPLY, R_FIXED, R0, T0, BETA)
 
 # ============================================================
 # HALL ZERO CALIBRATION
@@ -342,15 +414,8 @@ def read_shunt_voltage(addr, channel):
     """
 
     # Local config using high gain
-    config = 0x8000 | MUX[channel] | PGA_0_256 | MODE_SINGLE | DR_128SPS | COMP_DISABLE
-    i2c.writeto_mem(addr, REG_CONFIG, config.to_bytes(2, "big"))
-    time.sleep_ms(8)
-
-    data = i2c.readfrom_mem(addr, REG_CONVERSION, 2)
-    raw = int.from_bytes(data, "big")
-
-    if raw & 0x8000:
-        raw -= 65536
+    raw = read_ads_raw(addr, channel, PGA_0_256)
+    frame_codes[RAW_SHUNT_SLOT] = raw
 
     # LSB for ±0.256V
     lsb = 0.256 / 32768.0
@@ -366,33 +431,294 @@ def read_shunt_current(addr, channel):
     return ((v_shunt - SHUNT_ZERO) / SHUNT_RESISTANCE) * TEST_BATTERY_CURRENT_CAL
 
 # ============================================================
-# MAIN LOOP
+# CURRENT PROFILE SEQUENCER
 # ============================================================
-scan_i2c_or_die()
-SHUNT_ZERO = 0.0
-drawdown_active = False
+def write_dac_frame(frame):
+    i2c.writeto(DAC_60, frame)
 
-print("Waiting for START command...\n")
 
-while True:
-    command = read_uart_command()
+def profile_volts_to_code(volts):
+    # Same pre-distortion as the pot-follow path
+    return dac_code_for_voltage(calibrated_dac_target(volts))
+
+
+sequencer = profiles.ProfileSequencer(write_dac_frame, profile_volts_to_code)
+
+
+def handle_profile_command(command):
+    """
+    PROFILE,CLEAR
+    PROFILE,HOLD|RAMP|PULSE,...     (append a segment, see profiles.py)
+    PROFILE,RUN[,<repeat>[,<tick_us>]]
+    PROFILE,STOP
+    """
+    fields = command.split(",")[1:]
+    if not fields:
+        uart.write("ERROR,PROFILE_EMPTY\n")
+        return
+
+    action = fields[0]
+    try:
+        if action == "CLEAR":
+            sequencer.clear()
+            uart.write("PROFILE,CLEARED\n")
+        elif action == "STOP":
+            sequencer.stop()
+            uart.write("PROFILE,STOPPED\n")
+        elif action == "RUN":
+            if not drawdown_active:
+                uart.write("ERROR,PROFILE_NOT_ACTIVE\n")
+                return
+            repeat = int(fields[1]) if len(fields) > 1 else 1
+            tick_us = int(fields[2]) if len(fields) > 2 else profiles.DEFAULT_TICK_US
+            sequencer.load(repeat, tick_us)
+            sequencer.start()
+            uart.write("PROFILE,RUNNING,{},{},{}\n".format(
+                len(sequencer.segments), sequencer.duration_ms(), repeat
+            ))
+        else:
+            sequencer.add_segment(fields)
+            uart.write("PROFILE,SEGMENT,{}\n".format(len(sequencer.segments)))
+    except (ValueError, IndexError) as exc:
+        print("PROFILE ERROR ->", command, exc)
+        uart.write("ERROR,PROFILE_INVALID\n")
+
+
+def emit_setpoint_events():
+    """
+    Forwards setpoints applied by the sequencer as SET,<t_us>,<code>,<volts>
+    on the same monotonic time base as DATA lines.
+    """
+    for ticks, code in sequencer.drain_events():
+        uart.write("SET,{},{},{:.4f}\n".format(
+            clock.from_ticks(ticks), code, dac_voltage_for_code(code)
+        ))
+
+    if sequencer.events_lost:
+        uart.write("ERROR,SET_OVERFLOW,{}\n".format(sequencer.events_lost))
+        sequencer.events_lost = 0
+
+    if sequencer.steps_skipped:
+        uart.write("ERROR,SET_SKIPPED,{}\n".format(sequencer.steps_skipped))
+        sequencer.steps_skipped = 0
+
+    if sequencer.finished:
+        sequencer.finished = False
+        uart.write("PROFILE,DONE\n")
+
+
+# ============================================================
+# CLOCK SYNC
+# ============================================================
+def handle_sync_command(command):
+    """
+    SYNC[,<token>] -> SYNC,<t_us>[,<token>]
+    t_us is taken as soon as the command is read so receivers can pair it
+    with their own send/receive times to estimate offset and drift.
+    """
+    t_us = clock.now_us()
+    fields = command.split(",", 1)
+    if len(fields) > 1:
+        uart.write("SYNC,{},{}\n".format(t_us, fields[1]))
+    else:
+        uart.write("SYNC,{}\n".format(t_us))
+
+# ============================================================
+# STATUS
+# ============================================================
+def send_status():
+    """
+    STATUS,<state>,<i2c_hz>,<i2c_error_rate>
+    """
+    state = "ACTIVE" if drawdown_active else "IDLE"
+    uart.write("STATUS,{},{},{:.5f}\n".format(state, i2c.freq, i2c.error_rate))
+    i2c.changed = False
+
+# ============================================================
+# RAW TELEMETRY
+# ============================================================
+def send_calibration():
+    """
+    CAL,<version>,<divider_ratio>,<v_cal>,<i_cal>,<shunt_ohms>,<shunt_zero_v>,
+        <hall_v_per_amp>,<uout_zero_v>,<aux_i_offset>,<r_fixed>,<r0>,<t0>,<beta>
+    """
+    uart.write("CAL,{},{},{},{},{},{},{},{},{},{},{},{},{}\n".format(
+        CAL_VERSION,
+        TEST_BATTERY_DIVIDER_RATIO,
+        TEST_BATTERY_VOLTAGE_CAL,
+        TEST_BATTERY_CURRENT_CAL,
+        SHUNT_RESISTANCE,
+        SHUNT_ZERO,
+        HALL_V_PER_AMP,
+        UOUT_ZERO,
+        AUX_I_OFFSET,
+        R_FIXED,
+        R0,
+        T0,
+        BETA,
+    ))
+
+
+def handle_mode_command(command):
+    """
+    MODE,RAW -> RAW lines are sent alongside DATA lines
+    MODE,ENG -> DATA lines only
+    """
+    global telemetry_raw
+
+    mode = command.split(",", 1)[1]
+    if mode == "RAW":
+        telemetry_raw = True
+        send_calibration()
+    elif mode == "ENG":
+        telemetry_raw = False
+    else:
+        uart.write("ERROR,MODE_INVALID\n")
+        return
+    uart.write("MODE,{}\n".format(mode))
+
+
+def raw_line(seq, t_us):
+    """
+    RAW,<seq>,<t_us>,<cal_version>,<code0>,...,<code12>
+    """
+    return "RAW,{},{},{},{}\n".format(
+        seq, t_us, CAL_VERSION, ",".join(str(c) for c in frame_codes)
+    )
+
+# ============================================================
+# COMMAND HANDLING
+# ============================================================
+def split_command_id(command):
+    """
+    CMD,<id>,<command> -> (id, command); a bare command -> (None, command)
+    """
+    if command.startswith("CMD,"):
+        fields = command.split(",", 2)
+        if len(fields) == 3:
+            return fields[1], fields[2]
+    return None, command
+
+
+def send_ack(cmd_id, stage):
+    """
+    ACK,<id>,<stage>,<t_us>   stage: RX (parsed), DONE (in effect), UNKNOWN
+    """
+    uart.write("ACK,{},{},{}\n".format(cmd_id, stage, clock.now_us()))
+
+
+def handle_stream_command(command):
+    """
+    STREAM,USB[,<interval_ms>] -> framed samples on USB at that interval
+    STREAM,OFF                 -> UART DATA lines only
+    """
+    fields = command.split(",")
+    if fields[1:2] == ["USB"]:
+        try:
+            usb.enable(int(fields[2]) if len(fields) > 2 else None)
+        except ValueError:
+            uart.write("ERROR,STREAM_INVALID\n")
+            return
+        uart.write("STREAM,USB,{}\n".format(usb.interval_ms))
+    elif fields[1:2] == ["OFF"]:
+        usb.disable()
+        uart.write("STREAM,OFF\n")
+    else:
+        uart.write("ERROR,STREAM_INVALID\n")
+
+
+def handle_command(command):
+    """Returns False for commands this firmware doesn't know."""
+    global drawdown_active, SHUNT_ZERO
+
     if command == "START":
         if not drawdown_active:
             blink_start_led()
             print("Draw down test starting. Recalibrating shunt zero...")
             SHUNT_ZERO = calibrate_shunt_zero(ADC_48)
             drawdown_active = True
-            uart.write("STATUS,ACTIVE\n")
+            send_status()
+            if telemetry_raw:
+                send_calibration()  # carries the fresh shunt zero
     elif command == "STOP":
         if drawdown_active:
             print("Draw down test stopped.")
+            sequencer.stop()
             drawdown_active = False
-            uart.write("STATUS,IDLE\n")
+            send_status()
+    elif command == "STATUS":
+        send_status()
+    elif command == "CAL":
+        send_calibration()
+    elif command.startswith("MODE,"):
+        handle_mode_command(command)
+    elif command == "SYNC" or command.startswith("SYNC,"):
+        handle_sync_command(command)
+    elif command.startswith("PROFILE,"):
+        handle_profile_command(command)
+    elif command.startswith("STREAM,"):
+        handle_stream_command(command)
+    else:
+        return False
+    return True
+
+
+def service_uart():
+    # Commands are accepted from the display (UART) and from a PC on USB
+    command = read_uart_command() or usb.read_command()
+    if command:
+        cmd_id, command = split_command_id(command)
+        if cmd_id is None:
+            handle_command(command)
+        else:
+            # RX before the handler runs; DONE once it returns, i.e. after
+            # START's shunt calibration and with the new state in effect
+            send_ack(cmd_id, "RX")
+            send_ack(cmd_id, "DONE" if handle_command(command) else "UNKNOWN")
+    sequencer.service()
+    emit_setpoint_events()
+    if i2c.changed:
+        print("I2C clock now {} Hz (error rate {:.5f})".format(i2c.freq, i2c.error_rate))
+        send_status()
+    clock.now_us()  # keep the ticks_us unwrap current
+
+
+def wait_interval(seconds):
+    """
+    Sleeps until the next sample is due while still answering commands,
+    writing due profile steps and draining the setpoint log. Returns early
+    if the test is stopped.
+    """
+    deadline = time.ticks_add(time.ticks_ms(), int(seconds * 1000))
+    while time.ticks_diff(deadline, time.ticks_ms()) > 0:
+        service_uart()
+        if not drawdown_active:
+            return
+        # Wake every ms while a profile plays so its steps land on time
+        nap = 1 if sequencer.running else 10
+        time.sleep_ms(min(nap, max(0, time.ticks_diff(deadline, time.ticks_ms()))))
+
+# ============================================================
+# MAIN LOOP
+# ============================================================
+i2c.probe(list(REQUIRED_I2C_DEVICES))
+scan_i2c_or_die()
+SHUNT_ZERO = 0.0
+drawdown_active = False
+sample_seq = 0
+last_uart_data_us = None
+
+print("Waiting for START command...\n")
+
+while True:
+    service_uart()
 
     if not drawdown_active:
-        time.sleep_ms(100)
+        time.sleep_ms(10)
         continue
 
+    frame_start_us = clock.now_us()
+
     # -------- 0x48 --------
     V_Sense     = read_ads(ADC_48, CH_V_SENSE)
     Test_V1_Div = read_ads(ADC_48, CH_TEST_V1_DIV)
@@ -400,17 +726,28 @@ while True:
     Power_V     = read_ads(ADC_48, CH_POWER_V)
 
     # -------- 0x49 --------
+    # Profile steps due during the ADC reads are written between banks
+    sequencer.service()
     Pyranometer = read_ads(ADC_49, CH_PYRANOMETER)
     I_SET_POT_V = read_ads(ADC_49, CH_I_SET_POT)
 
-    # Pre-distort the DAC command so the measured output better matches the pot.
-    DAC_Target_V = calibrated_dac_target(I_SET_POT_V)
-    DAC_Command_V, DAC_Code, DAC_Write_OK, DAC_Write_Attempts, DAC_Write_Error = write_dac_voltage(DAC_Target_V)
+    if sequencer.running:
+        # The profile owns the DAC; report what it last applied.
+        DAC_Code = sequencer.current_code
+        DAC_Command_V = dac_voltage_for_code(DAC_Code)
+        DAC_Write_OK = sequencer.last_write_ok
+        DAC_Write_Attempts = 1
+        DAC_Write_Error = None
+    else:
+        # Pre-distort the DAC command so the measured output better matches the pot.
+        DAC_Target_V = calibrated_dac_target(I_SET_POT_V)
+        DAC_Command_V, DAC_Code, DAC_Write_OK, DAC_Write_Attempts, DAC_Write_Error = write_dac_voltage(DAC_Target_V)
     CURRENT_SET_EXPECTED_V = min(max(I_SET_POT_V, 0), DAC_VREF) * DAC_DIVIDER_GAIN
     Panel_T_V   = read_ads(ADC_49, CH_PANEL_TEMP)
     VR_5V       = read_ads(ADC_49, CH_5V_VR)
 
     # -------- 0x4A --------
+    sequencer.service()
     Batt_T_V    = read_ads(ADC_4A, CH_BATT_TEMP)
     Sink_T_V    = read_ads(ADC_4A, CH_SINK_TEMP)
     Aux_V       = read_ads(ADC_4A, CH_AUX_I)
@@ -421,47 +758,71 @@ while True:
     Batt_Temp  = thermistor_temp(Batt_T_V, VR_5V)
     Sink_Temp  = thermistor_temp(Sink_T_V, VR_5V)
 
-    AuxI = -1* ((Aux_V - UOUT_ZERO) / HALL_V_PER_AMP) - 0.05
+    AuxI = -1* ((Aux_V - UOUT_ZERO) / HALL_V_PER_AMP) - AUX_I_OFFSET
     I_SET_Percent = (I_SET_POT_V / VR_5V) * 100.0
 
     TestI = read_shunt_current(ADC_48, CH_V_SENSE)
     TestV = Test_V1_Div * TEST_BATTERY_DIVIDER_RATIO * TEST_BATTERY_VOLTAGE_CAL
 
-    # -------- Output --------
-    output = (
-        f"TestI:{fmt(TestI)}, "
-        f"TV1:{fmt(Test_V1_Div)}, "
-        f"DRV:{fmt(Driver_V)}, "
-        f"PWR:{fmt(Power_V)}, "
-        f"PYR:{fmt(Pyranometer)}, "
-        f"POT%:{fmt(I_SET_Percent,1)}, "
-        f"I_SET_POT:{fmt(I_SET_POT_V)}, "
-        f"DACcmd:{fmt(DAC_Command_V)}, "
-        f"DACcode:{DAC_Code}, "
-        f"DACok:{DAC_Write_OK}, "
-        f"DACtries:{DAC_Write_Attempts}, "
-        f"CurrentSetExp:{fmt(CURRENT_SET_EXPECTED_V)}, "
-        f"5VR:{fmt(VR_5V)}, "
-        f"PanelT:{fmt(Panel_Temp,2)}, "
-        f"BattT:{fmt(Batt_Temp,2)}, "
-        f"SinkT:{fmt(Sink_Temp,2)}, "
-        f"PreDrv:{fmt(Pre_Driver)}, "
-        f"AuxI:{fmt(AuxI)}A"
-    )
+    # Stamp the sample at the middle of its acquisition window
+    frame_end_us = clock.now_us()
+    Sample_T_us = (frame_start_us + frame_end_us) // 2
 
-    line = "DATA,{},{},{},{},{},{}\n".format(
+    # -------- Output --------
+    values = (
         numeric_or_zero(TestV),
         numeric_or_zero(TestI),
         numeric_or_zero(AuxI),
         numeric_or_zero(Sink_Temp),
         numeric_or_zero(Batt_Temp),
         numeric_or_zero(I_SET_POT_V),
+        numeric_or_zero(Pre_Driver),
+        numeric_or_zero(Driver_V),
+        numeric_or_zero(Power_V),
     )
-    print (line)
-    uart.write(line)
-
-    print(output)
-    if DEBUG_DAC:
+    if usb.enabled:
+        usb.send_sample(sample_seq, Sample_T_us, values)
+
+    # The UART feed keeps its own (slower) rate while USB streams every sample
+    uart_due = (not usb.enabled or last_uart_data_us is None
+                or Sample_T_us - last_uart_data_us >= LIVE_VALUE_SAMPLE_INTERVAL_S * 1_000_000)
+    if uart_due:
+        last_uart_data_us = Sample_T_us
+        line = "DATA,{},{},{},{},{},{},{},{},{},{},{}\n".format(
+            values[0], values[1], values[2], values[3], values[4], values[5],
+            sample_seq,
+            Sample_T_us,
+            values[6], values[7], values[8],
+        )
+        if telemetry_raw:
+            uart.write(raw_line(sample_seq, Sample_T_us))
+        uart.write(line)
+    sample_seq += 1
+
+    # Debug text shares the USB console with the frames; keep it off then
+    if not usb.enabled:
+        print(line)
+        print(
+            f"TestI:{fmt(TestI)}, "
+            f"TV1:{fmt(Test_V1_Div)}, "
+            f"DRV:{fmt(Driver_V)}, "
+            f"PWR:{fmt(Power_V)}, "
+            f"PYR:{fmt(Pyranometer)}, "
+            f"POT%:{fmt(I_SET_Percent,1)}, "
+            f"I_SET_POT:{fmt(I_SET_POT_V)}, "
+            f"DACcmd:{fmt(DAC_Command_V)}, "
+            f"DACcode:{DAC_Code}, "
+            f"DACok:{DAC_Write_OK}, "
+            f"DACtries:{DAC_Write_Attempts}, "
+            f"CurrentSetExp:{fmt(CURRENT_SET_EXPECTED_V)}, "
+            f"5VR:{fmt(VR_5V)}, "
+            f"PanelT:{fmt(Panel_Temp,2)}, "
+            f"BattT:{fmt(Batt_Temp,2)}, "
+            f"SinkT:{fmt(Sink_Temp,2)}, "
+            f"PreDrv:{fmt(Pre_Driver)}, "
+            f"AuxI:{fmt(AuxI)}A"
+        )
+    if DEBUG_DAC and not usb.enabled:
         if DAC_Write_OK:
             print(
                 "DAC DEBUG -> pot_read={}V, command={}V, code={}, attempts={}".format(
@@ -474,7 +835,10 @@ while True:
                     fmt(I_SET_POT_V), fmt(DAC_Command_V), DAC_Code, DAC_Write_Attempts, DAC_Write_Error
                 )
             )
-    time.sleep(LIVE_VALUE_SAMPLE_INTERVAL_S)
+    # Pace from the start of the frame so the sample period doesn't drift
+    elapsed_s = (clock.now_us() - frame_start_us) / 1_000_000
+    interval_s = usb.interval_s if usb.enabled else LIVE_VALUE_SAMPLE_INTERVAL_S
+    wait_interval(interval_s - elapsed_s)
 
     # line = "DATA,1,2,3,4,5,6\n"
     # uart.write(line)
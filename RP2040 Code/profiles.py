@@ -0,0 +1,301 @@
+from array import array
+from machine import Timer
+import time
+
+# ============================================================
+# PROFILE LIMITS
+# ============================================================
+PROFILE_MAX_SEGMENTS = 32
+PROFILE_MAX_ENTRIES  = 4096   # run-length table entries after compile
+PROFILE_RAMP_STEPS   = 256    # max distinct levels per ramp segment
+DEFAULT_TICK_US      = 1000   # 1 kHz playback clock
+MIN_TICK_US          = 200
+EVENT_LOG_SIZE       = 128
+
+DAC_MAX_CODE = 4095
+
+# Segment kinds (as sent over UART)
+SEG_HOLD  = "HOLD"    # PROFILE,HOLD,<volts>,<ms>
+SEG_RAMP  = "RAMP"    # PROFILE,RAMP,<v_start>,<v_end>,<ms>
+SEG_PULSE = "PULSE"   # PROFILE,PULSE,<v_high>,<v_low>,<period_ms>,<duty_pct>,<cycles>
+
+SEGMENT_ARGS = {
+    SEG_HOLD: 2,
+    SEG_RAMP: 3,
+    SEG_PULSE: 5,
+}
+
+
+# ============================================================
+# MCP4725 FAST-WRITE FRAME
+# ============================================================
+def pack_fast_write(code):
+    """
+    Packs a 12-bit DAC code into the MCP4725 fast-write format:
+    byte0 = [C2 C1 PD1 PD0 D11 D10 D9 D8], byte1 = [D7..D0]
+    """
+    return bytes(((code >> 8) & 0x0F, code & 0xFF))
+
+
+# ============================================================
+# SEGMENT PARSING
+# ============================================================
+def parse_segment(fields):
+    """
+    Parses the fields after "PROFILE," into a segment tuple.
+    Raises ValueError on unknown kinds or bad arguments.
+    """
+    kind = fields[0]
+    if kind not in SEGMENT_ARGS:
+        raise ValueError("unknown segment {}".format(kind))
+
+    args = fields[1:]
+    if len(args) != SEGMENT_ARGS[kind]:
+        raise ValueError("{} expects {} args".format(kind, SEGMENT_ARGS[kind]))
+
+    values = [float(a) for a in args]
+    if kind == SEG_HOLD:
+        if values[1] <= 0:
+            raise ValueError("duration must be > 0")
+    elif kind == SEG_RAMP:
+        if values[2] <= 0:
+            raise ValueError("duration must be > 0")
+    elif kind == SEG_PULSE:
+        if values[2] <= 0 or not (0 < values[3] < 100) or values[4] < 1:
+            raise ValueError("bad pulse timing")
+        values[4] = int(values[4])
+
+    return (kind,) + tuple(values)
+
+
+# ============================================================
+# COMPILER
+# ============================================================
+def _ms_to_ticks(ms, tick_us):
+    return max(1, int(round(ms * 1000 / tick_us)))
+
+
+def compile_profile(segments, tick_us, volts_to_code):
+    """
+    Compiles segments into a run-length table of DAC codes.
+
+    Returns (codes, ticks): codes[i] is applied for ticks[i] timer ticks.
+    Adjacent entries with the same code are merged, so long holds cost a
+    single entry and the DAC is only written on changes.
+    """
+    codes = array("H")
+    ticks = array("I")
+
+    def emit(code, n):
+        if n <= 0:
+            return
+        if len(codes) and codes[-1] == code:
+            ticks[-1] += n
+            return
+        if len(codes) >= PROFILE_MAX_ENTRIES:
+            raise ValueError("profile exceeds {} entries".format(PROFILE_MAX_ENTRIES))
+        codes.append(code)
+        ticks.append(n)
+
+    for seg in segments:
+        kind = seg[0]
+
+        if kind == SEG_HOLD:
+            emit(volts_to_code(seg[1]), _ms_to_ticks(seg[2], tick_us))
+
+        elif kind == SEG_RAMP:
+            v_start, v_end = seg[1], seg[2]
+            n = _ms_to_ticks(seg[3], tick_us)
+            code_span = abs(volts_to_code(v_end) - volts_to_code(v_start)) + 1
+            steps = min(n, code_span, PROFILE_RAMP_STEPS)
+            start = 0
+            for k in range(steps):
+                end = (n * (k + 1)) // steps
+                frac = k / (steps - 1) if steps > 1 else 1.0
+                emit(volts_to_code(v_start + (v_end - v_start) * frac), end - start)
+                start = end
+
+        elif kind == SEG_PULSE:
+            v_high, v_low, period_ms, duty_pct, cycles = seg[1:]
+            n_period = _ms_to_ticks(period_ms, tick_us)
+            n_high = min(n_period - 1, max(1, int(round(n_period * duty_pct / 100.0))))
+            code_high = volts_to_code(v_high)
+            code_low = volts_to_code(v_low)
+            for _ in range(cycles):
+                emit(code_high, n_high)
+                emit(code_low, n_period - n_high)
+
+    if not len(codes):
+        raise ValueError("empty profile")
+
+    return codes, ticks
+
+
+# ============================================================
+# TIMER-DRIVEN SEQUENCER
+# ============================================================
+class ProfileSequencer:
+    """
+    Plays a compiled profile. A machine.Timer counts the ticks and marks
+    the next entry due; the DAC write itself happens in service(), called
+    from the main loop, because the I2C bus is shared with the ADC reads
+    (and AdaptiveI2C may rebuild it) so it must never be used from the
+    callback.
+
+    Timing is therefore not µs-exact: the RP2040 timer callback is
+    soft-scheduled (it runs between bytecodes, so it can lag by a GC pass
+    or a long C call), and a due step waits for the main loop's next
+    service() call. Every applied code is logged with the ticks_us of the
+    actual write, so SET lines show when each level really took effect.
+    If several steps fall due between two service() calls only the latest
+    is written; the others are counted in steps_skipped.
+    """
+
+    def __init__(self, write_frame, volts_to_code):
+        # write_frame(buf) sends one 2-byte fast-write frame to the DAC
+        self._write_frame = write_frame
+        self._volts_to_code = volts_to_code
+
+        self.segments = []
+        self.tick_us = DEFAULT_TICK_US
+        self.repeat = 1          # 0 = loop forever
+
+        self._codes = array("H")
+        self._ticks = array("I")
+        self._frames = []
+        self._timer = None
+
+        self._index = 0
+        self._remaining = 0
+        self._pass = 0
+        self._due = -1           # entry marked by the timer, not yet written
+
+        self.running = False
+        self.finished = False
+        self.current_code = 0
+        self.write_errors = 0
+        self.last_write_ok = True
+        self.steps_skipped = 0
+
+        # Applied-setpoint log (written and drained by the main loop)
+        self._ev_t = array("I", [0] * EVENT_LOG_SIZE)
+        self._ev_code = array("H", [0] * EVENT_LOG_SIZE)
+        self._ev_head = 0
+        self._ev_tail = 0
+        self.events_lost = 0
+
+    # -------- Upload --------
+    def clear(self):
+        self.stop()
+        self.segments = []
+
+    def add_segment(self, fields):
+        if len(self.segments) >= PROFILE_MAX_SEGMENTS:
+            raise ValueError("too many segments")
+        self.segments.append(parse_segment(fields))
+
+    def load(self, repeat=1, tick_us=DEFAULT_TICK_US):
+        if tick_us < MIN_TICK_US:
+            raise ValueError("tick must be >= {} us".format(MIN_TICK_US))
+        codes, ticks = compile_profile(self.segments, tick_us, self._volts_to_code)
+
+        self.stop()
+        self._codes = codes
+        self._ticks = ticks
+        self._frames = [pack_fast_write(c) for c in codes]
+        self.tick_us = tick_us
+        self.repeat = repeat
+
+    def total_ticks(self):
+        return sum(self._ticks)
+
+    def duration_ms(self):
+        return (self.total_ticks() * self.tick_us) // 1000
+
+    # -------- Playback --------
+    def start(self):
+        if not self._frames:
+            raise ValueError("no profile loaded")
+        self.stop()
+        self._index = 0
+        self._pass = 0
+        self._due = -1
+        self.finished = False
+        self.running = True
+        self._remaining = self._ticks[0]
+        self._apply(0)
+        self._timer = Timer(
+            mode=Timer.PERIODIC,
+            freq=1_000_000 / self.tick_us,
+            callback=self._tick,
+        )
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+        self.running = False
+        self._due = -1
+
+    def service(self):
+        """Writes the entry the timer marked due, if any (main loop only)."""
+        index = self._due
+        if index < 0:
+            return
+        self._due = -1
+        self._apply(index)
+
+    def _apply(self, index):
+        code = self._codes[index]
+        try:
+            self._write_frame(self._frames[index])
+            self.last_write_ok = True
+        except OSError:
+            self.write_errors += 1
+            self.last_write_ok = False
+        self.current_code = code
+        self._log(time.ticks_us(), code)
+
+    def _tick(self, _timer):
+        # Timer callback: bookkeeping only, no I2C and no allocation
+        self._remaining -= 1
+        if self._remaining > 0:
+            return
+
+        index = self._index + 1
+        if index >= len(self._codes):
+            self._pass += 1
+            if self.repeat and self._pass >= self.repeat:
+                self._timer.deinit()
+                self._timer = None
+                self.running = False
+                self.finished = True
+                return
+            index = 0
+
+        if self._due >= 0:
+            self.steps_skipped += 1
+        self._index = index
+        self._remaining = self._ticks[index]
+        self._due = index
+
+    # -------- Setpoint log --------
+    def _log(self, t_us, code):
+        head = self._ev_head
+        nxt = (head + 1) % EVENT_LOG_SIZE
+        if nxt == self._ev_tail:
+            # Full: drop the oldest entry so the newest setpoint is kept
+            self._ev_tail = (self._ev_tail + 1) % EVENT_LOG_SIZE
+            self.events_lost += 1
+        self._ev_t[head] = t_us
+        self._ev_code[head] = code
+        self._ev_head = nxt
+
+    def drain_events(self):
+        """Returns a list of (ticks_us, code) applied since the last drain."""
+        out = []
+        while self._ev_tail != self._ev_head:
+            tail = self._ev_tail
+            out.append((self._ev_t[tail], self._ev_code[tail]))
+            self._ev_tail = (tail + 1) % EVENT_LOG_SIZE
+        return out
@@ -0,0 +1,67 @@
+"""
+Host-side tests of fastpath.choose()'s correctness check with fake variants.
+
+    cd "RP2040 Code" && python -m pytest -q tests
+"""
+
+import os
+import sys
+import time
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# MicroPython's time functions, for CPython
+if not hasattr(time, "ticks_us"):
+    time.ticks_us = lambda: time.perf_counter_ns() // 1000
+    time.ticks_diff = lambda a, b: a - b
+
+import conversions  # noqa: E402
+import fastpath  # noqa: E402
+
+
+def pack_u16_low_byte_only(buf, value):
+    buf[1] = value & 0xFF
+
+
+def pack_u16_nothing(buf, value):
+    pass
+
+
+def pack_dac_instant(buf, code):
+    # Correct; timed as the fastest by the fixture below
+    buf[0] = (code >> 8) & 0x0F
+    buf[1] = code & 0xFF
+
+
+@pytest.fixture
+def variants(monkeypatch):
+    fake = types.SimpleNamespace(
+        pack_u16_native=pack_u16_low_byte_only,
+        pack_u16_viper=pack_u16_nothing,
+        pack_dac_native=pack_dac_instant,
+    )
+    monkeypatch.setattr(fastpath, "conversions_native", fake)
+    monkeypatch.setattr(fastpath, "_time_us",
+                        lambda fn, args, calls: 0 if fn is pack_dac_instant else 1000)
+    return fake
+
+
+def test_partial_or_empty_pack_variants_are_rejected(variants, capsys):
+    chosen = fastpath.choose(calls=10)
+    assert chosen["pack_u16"] == (conversions.pack_u16, "python")
+    assert "native=mismatch" in capsys.readouterr().out
+
+
+def test_correct_pack_variant_is_chosen(variants):
+    chosen = fastpath.choose(calls=10, verbose=False)
+    assert chosen["pack_dac"] == (pack_dac_instant, "native")
+
+
+def test_reference_output_is_independent_of_the_buffer():
+    args = fastpath.HOT_PATHS["pack_u16"][1]
+    results = fastpath._results(conversions.pack_u16, args)
+    assert len(results) == len(fastpath.BUFFER_SENTINELS)
+    assert len(set(results)) == 1
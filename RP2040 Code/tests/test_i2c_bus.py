@@ -0,0 +1,112 @@
+"""
+Host-side tests of drivers/i2c_bus.AdaptiveI2C's clock ladder with a fake bus.
+
+    cd "RP2040 Code" && python -m pytest -q tests
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from drivers.i2c_bus import (  # noqa: E402
+    ERROR_PAIR_OPS,
+    I2C_FREQ_STEPS,
+    PROBATION_OPS,
+    STEP_UP_AFTER_OPS,
+    AdaptiveI2C,
+)
+
+ADDR = 0x48
+
+
+class FakeBus:
+    """machine.I2C stand-in; raises OSError while fail is set."""
+
+    def __init__(self, freq):
+        self.freq = freq
+        self.fail = False
+
+    def readfrom(self, addr, nbytes):
+        if self.fail:
+            raise OSError(5)
+        return bytes(nbytes)
+
+
+class Harness:
+    def __init__(self):
+        self.i2c = AdaptiveI2C(FakeBus, start_freq=I2C_FREQ_STEPS[0])
+        self.changes = []   # (op number, freq) at every clock change
+
+    def run(self, n, fail=False):
+        for _ in range(n):
+            self.i2c.bus.fail = fail
+            level = self.i2c.level
+            try:
+                self.i2c.readfrom(ADDR, 2)
+            except OSError:
+                pass
+            if self.i2c.level != level:
+                self.changes.append((self.i2c.ops, self.i2c.freq))
+
+
+def drop_to_slowest(h):
+    # The first error is tolerated, then back-to-back errors step down one level each
+    h.run(len(I2C_FREQ_STEPS), fail=True)
+    assert h.i2c.freq == I2C_FREQ_STEPS[-1]
+    h.changes.clear()
+
+
+def test_errors_step_down_one_level_each():
+    h = Harness()
+    h.run(1, fail=True)
+    assert h.i2c.freq == I2C_FREQ_STEPS[0]      # a single error is tolerated
+    h.run(ERROR_PAIR_OPS - 1)
+    h.run(1, fail=True)
+    assert h.i2c.freq == I2C_FREQ_STEPS[1]
+
+
+def test_each_faster_level_needs_its_own_clean_run():
+    h = Harness()
+    drop_to_slowest(h)
+    start = h.i2c.ops
+    h.run(STEP_UP_AFTER_OPS * len(I2C_FREQ_STEPS))
+
+    steps = [(ops - start, freq) for ops, freq in h.changes]
+    assert [freq for _, freq in steps] == list(reversed(I2C_FREQ_STEPS[:-1]))
+    gaps = [b[0] - a[0] for a, b in zip([(0, None)] + steps, steps)]
+    assert all(gap >= STEP_UP_AFTER_OPS for gap in gaps), steps
+
+
+def test_error_on_probation_steps_back_and_backs_off():
+    h = Harness()
+    drop_to_slowest(h)
+    h.run(STEP_UP_AFTER_OPS)
+    assert h.i2c.freq == I2C_FREQ_STEPS[-2]
+
+    h.run(PROBATION_OPS // 2)
+    h.run(1, fail=True)
+    assert h.i2c.freq == I2C_FREQ_STEPS[-1]
+
+    # The next try waits twice as long
+    h.run(STEP_UP_AFTER_OPS)
+    assert h.i2c.freq == I2C_FREQ_STEPS[-1]
+    h.run(STEP_UP_AFTER_OPS)
+    assert h.i2c.freq == I2C_FREQ_STEPS[-2]
+
+
+def test_never_above_probed_clock():
+    h = Harness()
+    h.i2c.max_level = 2
+    drop_to_slowest(h)
+    h.run(STEP_UP_AFTER_OPS * 10)
+    assert h.i2c.freq == I2C_FREQ_STEPS[2]
+
+
+@pytest.mark.parametrize("level", range(len(I2C_FREQ_STEPS)))
+def test_bus_rebuilt_at_level_clock(level):
+    h = Harness()
+    h.i2c._set_level(level)
+    assert h.i2c.bus.freq == I2C_FREQ_STEPS[level]
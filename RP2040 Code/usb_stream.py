@@ -0,0 +1,91 @@
+import binascii
+import struct
+import sys
+
+try:
+    import select
+except ImportError:
+    import uselect as select
+
+# ============================================================
+# USB CDC SAMPLE STREAM
+# ============================================================
+# Frame: A5 5A | type u8 | length u8 | payload | crc32 u32 (little endian)
+# CRC-32 covers type, length and payload. The USB console also carries
+# print() text, so the host resyncs on the magic and drops bad frames.
+MAGIC = b"\xa5\x5a"
+FRAME_SAMPLE = 1
+
+# seq, t_us, then test_v, test_i, aux_i, sink_t, batt_t, pot_v,
+# pre_driver_v, driver_v, power_v as float32
+SAMPLE_FORMAT = "<IQ9f"
+SAMPLE_PAYLOAD = struct.calcsize(SAMPLE_FORMAT)
+HEADER_SIZE = 4
+FRAME_SIZE = HEADER_SIZE + SAMPLE_PAYLOAD + 4
+
+DEFAULT_INTERVAL_MS = 10
+MIN_INTERVAL_MS = 1
+MAX_COMMAND_LEN = 64
+
+
+class UsbStream:
+    """
+    Binary sample frames on the USB console (sys.stdout.buffer), plus
+    non-blocking command lines read from it (sys.stdin).
+    """
+
+    def __init__(self, out=None, inp=None):
+        self.out = out or sys.stdout.buffer
+        self.inp = inp or sys.stdin
+        self.enabled = False
+        self.interval_ms = DEFAULT_INTERVAL_MS
+        self.frames_sent = 0
+        self.write_errors = 0
+
+        self._frame = bytearray(FRAME_SIZE)
+        self._frame[0:2] = MAGIC
+        self._frame[2] = FRAME_SAMPLE
+        self._frame[3] = SAMPLE_PAYLOAD
+        self._crc_view = memoryview(self._frame)[2:HEADER_SIZE + SAMPLE_PAYLOAD]
+
+        self._poll = select.poll()
+        self._poll.register(self.inp, select.POLLIN)
+        self._line = ""
+
+    @property
+    def interval_s(self):
+        return self.interval_ms / 1000
+
+    def enable(self, interval_ms=None):
+        if interval_ms is not None:
+            self.interval_ms = max(MIN_INTERVAL_MS, int(interval_ms))
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def send_sample(self, seq, t_us, values):
+        """values: the 9 floats in SAMPLE_FORMAT order."""
+        frame = self._frame
+        struct.pack_into(SAMPLE_FORMAT, frame, HEADER_SIZE, seq, t_us, *values)
+        struct.pack_into("<I", frame, HEADER_SIZE + SAMPLE_PAYLOAD,
+                         binascii.crc32(self._crc_view) & 0xFFFFFFFF)
+        try:
+            self.out.write(frame)
+            self.frames_sent += 1
+        except OSError:
+            self.write_errors += 1
+
+    def read_command(self):
+        """A complete command line from the USB console, or None (never blocks)."""
+        while self._poll.poll(0):
+            ch = self.inp.read(1)
+            if not ch:
+                break
+            if ch in "\r\n":
+                line, self._line = self._line.strip().upper(), ""
+                if line:
+                    return line
+            elif len(self._line) < MAX_COMMAND_LEN:
+                self._line += ch
+        return None
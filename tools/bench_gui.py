@@ -0,0 +1,290 @@
+"""
+Headless rendering benchmark for the desktop GUI (ESP32 Display/gui.py).
+
+Runs MainWindow on Qt's offscreen platform and drives it with a synthetic
+DATA stream, one update_plot() + repaint per frame, for every combination
+of buffer size, samples per frame and number of drawn series.
+
+    python tools/bench_gui.py [--history 10000,200000] [--per-tick 1,100,2000]
+                              [--series 3,9] [--frames 200] [--out bench.json]
+    python tools/bench_gui.py --compare old.json new.json
+
+Per case it reports frame time percentiles (split into update and paint),
+CPU time per ingested sample and RSS growth. Results are JSON so runs from
+different versions can be compared with --compare.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+GUI_DIR = Path(__file__).resolve().parent.parent / "ESP32 Display"
+sys.path.insert(0, str(GUI_DIR))
+
+import numpy as np  # noqa: E402
+
+DEFAULT_HISTORY = (10_000, 200_000)
+DEFAULT_PER_TICK = (1, 100, 2_000)
+DEFAULT_SERIES = (3, 9)
+DEFAULT_FRAMES = 200
+SAMPLE_PERIOD_US = 10_000
+
+
+def parse_ints(text):
+    return tuple(int(v) for v in text.split(",") if v)
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        import resource  # peak, not current, outside Linux
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def percentiles(ms):
+    ms = np.asarray(ms)
+    return {
+        "p50": float(np.percentile(ms, 50)),
+        "p90": float(np.percentile(ms, 90)),
+        "p99": float(np.percentile(ms, 99)),
+        "max": float(ms.max()),
+        "mean": float(ms.mean()),
+    }
+
+
+class SyntheticStream:
+    """DATA-layout samples: slow discharge + ripple + noise + rare spikes."""
+
+    def __init__(self, seed=0):
+        import protocol
+
+        self.fields = len(protocol.DATA_FIELDS)
+        self.rng = np.random.default_rng(seed)
+        self.seq = 0
+
+    def rows(self, n):
+        idx = self.seq + np.arange(n)
+        minutes = idx * SAMPLE_PERIOD_US / 60e6
+        out = np.empty((n, self.fields))
+        out[:, 0] = 12.6 - 0.01 * minutes + self.rng.normal(0, 0.002, n)
+        out[:, 1] = 8.0 + np.sin(idx / 500.0) + self.rng.normal(0, 0.05, n)
+        out[:, 2] = 1.5 + 0.25 * np.sin(idx / 2000.0) + self.rng.normal(0, 0.05, n)
+        out[:, 3] = 41.3
+        out[:, 4] = 27.8
+        out[:, 5] = 1.65
+        out[:, 6] = idx
+        out[:, 7] = idx * SAMPLE_PERIOD_US
+        out[:, 8] = 5.10
+        out[:, 9] = 10.02
+        out[:, 10] = 12.58
+        spikes = self.rng.random(n) < 1e-4
+        out[spikes, 0] += 2.0
+        self.seq += n
+        return out
+
+
+class BenchReader:
+    """Reader stand-in whose drain() hands out pre-built batches."""
+
+    def __init__(self, batches):
+        self.batches = batches
+        self.connected = True
+        self.last_error = None
+
+    def drain(self):
+        return self.batches.pop() if self.batches else self._empty()
+
+    @staticmethod
+    def _empty():
+        from ingest import Batch
+
+        return Batch()
+
+    def send(self, text):
+        return False
+
+    def stop(self):
+        pass
+
+
+def run_case(app, history, per_tick, series, frames):
+    import pyqtgraph as pg
+
+    import gui
+    from ingest import Batch
+
+    stream = SyntheticStream()
+    prefill = stream.rows(history)
+
+    # Batches are built up front (as the reader's parsed blocks) so sample
+    # generation isn't timed as GUI work
+    batches = []
+    for _ in range(frames):
+        batch = Batch()
+        batch.blocks.append(stream.rows(per_tick))
+        batches.append(batch)
+    batches.reverse()   # drain() pops from the end
+
+    rss_start = rss_mb()
+    gui.HISTORY_POINTS = history
+    window = gui.MainWindow(BenchReader(batches))
+    window.timer.stop()
+    window.resize(1280, 800)
+    window.show()
+    window.show_current_tab()   # tabs are built lazily after the first paint
+
+    # Extra series: more curves on the same plots, fed through the same path
+    channels = [channel for _, _, channel in window.plot_curves]
+    plots = [plot for plot, _, _ in window.plot_curves]
+    for i in range(len(window.plot_curves), series):
+        curve = plots[i % len(plots)].plot([], [], pen=pg.mkPen(width=1))
+        window.plot_curves += ((plots[i % len(plots)], curve, channels[i % len(channels)]),)
+
+    window.apply_samples(prefill)
+    app.processEvents()
+    rss_filled = rss_mb()
+
+    update_ms, paint_ms, frame_ms = [], [], []
+    cpu0 = time.process_time()
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        window.update_plot()
+        t1 = time.perf_counter()
+        window.repaint()
+        app.processEvents()
+        t2 = time.perf_counter()
+        update_ms.append((t1 - t0) * 1e3)
+        paint_ms.append((t2 - t1) * 1e3)
+        frame_ms.append((t2 - t0) * 1e3)
+    cpu = time.process_time() - cpu0
+    rss_end = rss_mb()
+
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+
+    ingested = frames * per_tick
+    return {
+        "history": history,
+        "per_tick": per_tick,
+        "series": series,
+        "frames": frames,
+        "frame_ms": percentiles(frame_ms),
+        "update_ms": percentiles(update_ms),
+        "paint_ms": percentiles(paint_ms),
+        "cpu_s": cpu,
+        "cpu_us_per_sample": cpu / ingested * 1e6 if ingested else None,
+        "rss_mb": {
+            "start": rss_start,
+            "after_prefill": rss_filled,
+            "end": rss_end,
+            "growth": rss_end - rss_start,
+        },
+    }
+
+
+def environment():
+    import pyqtgraph
+    import PySide6
+
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=GUI_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        rev = None
+    return {
+        "git_rev": rev,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pyside6": PySide6.__version__,
+        "pyqtgraph": pyqtgraph.__version__,
+        "qpa": os.environ.get("QT_QPA_PLATFORM"),
+    }
+
+
+def case_key(case):
+    return case["history"], case["per_tick"], case["series"]
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = {case_key(c): c for c in json.load(f)["results"]}
+    with open(new_path) as f:
+        new = json.load(f)["results"]
+
+    print(f"{'history':>9} {'tick':>6} {'series':>6}  {'p50 ms':>15}  {'p99 ms':>15}  {'us/sample':>15}")
+    for case in new:
+        before = old.get(case_key(case))
+        if before is None:
+            continue
+
+        def cell(a, b):
+            if a is None or b is None:
+                return f"{'-':>15}"
+            return f"{a:6.2f}->{b:6.2f}" + ("!" if b > a * 1.2 else " ")
+
+        print(f"{case['history']:>9} {case['per_tick']:>6} {case['series']:>6}  "
+              f"{cell(before['frame_ms']['p50'], case['frame_ms']['p50'])}  "
+              f"{cell(before['frame_ms']['p99'], case['frame_ms']['p99'])}  "
+              f"{cell(before['cpu_us_per_sample'], case['cpu_us_per_sample'])}")
+    print("! = more than 20% slower")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--history", type=parse_ints, default=DEFAULT_HISTORY,
+                        help="ring buffer sizes / prefilled samples (comma separated)")
+    parser.add_argument("--per-tick", type=parse_ints, default=DEFAULT_PER_TICK,
+                        help="samples ingested per frame (comma separated)")
+    parser.add_argument("--series", type=parse_ints, default=DEFAULT_SERIES,
+                        help="curves drawn (3 = the normal window; comma separated)")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES)
+    parser.add_argument("--out", help="write JSON results here (default: stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="compare two result files instead of running")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication([])
+
+    results = []
+    for history in args.history:
+        for per_tick in args.per_tick:
+            for series in args.series:
+                case = run_case(app, history, per_tick, series, args.frames)
+                results.append(case)
+                print(f"history={history} per_tick={per_tick} series={series}: "
+                      f"p50 {case['frame_ms']['p50']:.2f} ms, p99 {case['frame_ms']['p99']:.2f} ms, "
+                      f"{case['cpu_us_per_sample'] or 0:.1f} us/sample", file=sys.stderr)
+
+    report = json.dumps({"environment": environment(), "results": results}, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Compiles the RP2040 driver and conversion modules to .mpy (runs on the host).
+
+    pip install mpy-cross
+    python tools/build_mpy.py [--out build/rp2040]
+    mpremote connect <port> fs cp -r build/rp2040/. :
+
+MicroPython imports foo.py before foo.mpy, so deploy the build directory
+instead of the source folder. main.py is copied as source (the firmware
+only runs main.py). -march=armv6m is required for the @native/@viper code.
+"""
+
+import argparse
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "RP2040 Code"
+
+MODULES = (
+    "clock.py",
+    "conversions.py",
+    "conversions_native.py",
+    "fastpath.py",
+    "profiles.py",
+    "usb_stream.py",
+    "drivers/current_dac.py",
+    "drivers/i2c_bus.py",
+    "drivers/temperature.py",
+)
+
+SOURCE_FILES = (
+    "main.py",
+)
+
+MPY_ARCH = "armv6m"  # RP2040 (Cortex-M0+)
+
+
+def build(out_dir, mpy_cross="mpy-cross"):
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    for rel in MODULES:
+        src = SRC_DIR / rel
+        dst = (out_dir / rel).with_suffix(".mpy")
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        subprocess.run(
+            [mpy_cross, f"-march={MPY_ARCH}", "-O2", "-o", str(dst), str(src)],
+            check=True,
+        )
+        print(f"{rel} -> {dst.relative_to(out_dir)}")
+
+    for rel in SOURCE_FILES:
+        dst = out_dir / rel
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(SRC_DIR / rel, dst)
+        print(f"{rel} (source)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", default="build/rp2040", help="output directory")
+    parser.add_argument("--mpy-cross", default="mpy-cross", help="mpy-cross executable")
+    args = parser.parse_args()
+
+    try:
+        build(Path(args.out), args.mpy_cross)
+    except FileNotFoundError:
+        sys.exit("mpy-cross not found (pip install mpy-cross)")
+    except subprocess.CalledProcessError as exc:
+        sys.exit(f"mpy-cross failed: {exc}")
+
+
+if __name__ == "__main__":
+    main()